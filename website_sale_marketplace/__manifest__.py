@@ -3,7 +3,7 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 {
     'name': 'Marketplace',
-    'version': '19.0.0.0.2',
+    'version': '19.0.0.0.14',
     'category': 'Sales',
     'license': 'AGPL-3',
     'summary': 'Post, Sell, its your marketplace',
@@ -17,20 +17,31 @@
         'uom',
         'html_editor',
         'sale_management',
-        'stock_dropshipping'
+        'stock_dropshipping',
+        'purchase_stock'
     ],
     'data': [
         'security/security.xml',
         'security/ir.model.access.csv',
+        'data/ir_cron.xml',
+        'data/mail_templates.xml',
         'views/res_users_views.xml',
         'views/res_partner_views.xml',
         'views/product_category_views.xml',
         'views/product_views.xml',
+        'views/purchase_views.xml',
+        'views/marketplace_po_outbox_views.xml',
+        'views/marketplace_reprice_job_views.xml',
+        'views/marketplace_approval_rule_views.xml',
+        'views/marketplace_metric_views.xml',
+        'views/marketplace_vendor_notification_views.xml',
+        'views/marketplace_vendor_ledger_views.xml',
         'views/portal_templates.xml',
     ],
     'assets': {
         'web.assets_backend': [
             'website_sale_marketplace/static/src/views/product_kanban.scss',
+            'website_sale_marketplace/static/src/fields/lazy_html_field.js',
         ],
         'website_sale_marketplace.webclient': [
             ('include', 'web._assets_helpers'),
@@ -46,7 +57,6 @@
             'web/static/lib/odoo_ui_icons/*',
             'web/static/src/webclient/navbar/navbar.scss',
             'web/static/src/scss/animation.scss',
-            'web/static/src/core/color_picker/color_picker.scss',
             'web/static/src/scss/mimetypes.scss',
             'web/static/src/scss/ui.scss',
             'web/static/src/views/fields/translation_dialog.scss',
@@ -58,7 +68,6 @@
             'web/static/lib/luxon/luxon.js',
             'web/static/lib/owl/owl.js',
             'web/static/lib/owl/odoo_module.js',
-            'web/static/lib/jquery/jquery.js',
             'web/static/lib/popper/popper.js',
             'web/static/lib/bootstrap/js/dist/util/index.js',
             'web/static/lib/bootstrap/js/dist/dom/data.js',
@@ -88,7 +97,6 @@
             'web/static/lib/bootstrap/js/dist/toast.js',
             'web/static/lib/dompurify/DOMpurify.js',
             'web/static/src/libs/bootstrap.js',
-            'web/static/src/legacy/js/libs/jquery.js',
 
             'base/static/src/css/modules.css',
 
@@ -108,6 +116,9 @@
             'web/static/src/views/view_dialogs/**/*',
             'web/static/src/views/widgets/**/*',
             'web/static/src/webclient/**/*',
+            # Vendors only use list, form and kanban views
+            ('remove', 'web/static/src/views/graph/**/*'),
+            ('remove', 'web/static/src/views/pivot/**/*'),
             ('remove', 'web/static/src/webclient/clickbot/clickbot.js'),
             ('remove', 'web/static/src/views/form/button_box/*.scss'),
             ('remove', 'web/static/src/core/emoji_picker/emoji_data.js'),
@@ -123,15 +134,25 @@
 
             'web/static/src/views/form/button_box/*.scss',
 
-            'bus/static/src/**/*.js',
+            'website_sale_marketplace/static/src/fields/lazy_html_field.js',
+            'website_sale_marketplace/static/src/marketplace_product_management/**/*',
+        ],
+        # Loaded on demand by the marketplace_lazy_html field
+        'website_sale_marketplace.webclient_html_editor': [
+            ('include', 'web._assets_helpers'),
+            ('include', 'web._assets_backend_helpers'),
+            'web/static/src/scss/pre_variables.scss',
+            'web/static/lib/bootstrap/scss/_variables.scss',
+            'web/static/lib/bootstrap/scss/_variables-dark.scss',
+            'web/static/lib/bootstrap/scss/_maps.scss',
 
+            # Services the HTML editor relies on, left out of the first paint with it
+            'bus/static/src/**/*.js',
             ('include', 'html_editor.assets_editor'),
             'html_editor/static/src/others/dynamic_placeholder_plugin.js',
             'html_editor/static/src/backend/**/*',
             'html_editor/static/src/fields/**/*',
             'html_editor/static/lib/vkbeautify/**/*',
-
-            'website_sale_marketplace/static/src/marketplace_product_management/**/*',
         ],
     },
     'installable': True,
@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 # Copyright 2024 ERPGAP/PROMPTEQUATION LDA
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import copy
+import hashlib
+import json
+
 from odoo import http
-from odoo.http import request
+from odoo.exceptions import AccessError, ValidationError
+from odoo.http import Response, request
 from odoo.addons.portal.controllers import portal
 
+from ..models.marketplace_product_import import IMPORT_COLUMNS
+
 
 class CustomerPortal(portal.CustomerPortal):
 
@@ -12,57 +19,65 @@ class CustomerPortal(portal.CustomerPortal):
         values = super()._prepare_home_portal_values(counters)
 
         if 'marketplace_product_count' in counters:
-            values['marketplace_product_count'] = 1
+            # Counts are summed from the vendor's count changes, so this does not depend on the size of the catalog
+            vendor_partner = self._get_vendor_partner().sudo()
+            if vendor_partner.is_marketplace_vendor:
+                values.update({
+                    'marketplace_product_count': vendor_partner.marketplace_product_count,
+                    'marketplace_product_draft_count': vendor_partner.marketplace_product_draft_count,
+                    'marketplace_product_approval_count': vendor_partner.marketplace_product_approval_count,
+                    'marketplace_product_approved_count': vendor_partner.marketplace_product_approved_count,
+                    'marketplace_product_published_count': vendor_partner.marketplace_product_published_count,
+                })
+            else:
+                values['marketplace_product_count'] = 0
 
         return values
 
     def _get_vendor_partner(self):
         """Get the vendor partner for current user"""
-        partner = request.env.user.partner_id
-        return partner.parent_id if partner.parent_id else partner
+        return request.env.user.marketplace_vendor_id
 
     def _prepare_marketplace_product_management_session_info(self, vendor_partner):
         """Prepare session info for marketplace product management web client"""
         session_info = request.env['ir.http'].session_info()
-        user_context = dict(request.env.context) if request.session.uid else {}
 
         if request.env.lang:
-            lang = request.env.lang
-            session_info['user_context']['lang'] = lang
-            user_context['lang'] = lang
+            session_info['user_context']['lang'] = request.env.lang
 
         vendor_company = vendor_partner.company_id or request.env.user.company_id
 
-        # Get the action ID to set as home action
-        action = request.env.ref('website_sale_marketplace.marketplace_product_management_action')
-
+        # Vendor independent keys (home action, companies, currencies, menus) are cached
+        bootstrap = request.env['ir.http']._get_marketplace_webclient_bootstrap(
+            request.env.lang, vendor_company.id,
+        )
+        session_info.update(copy.deepcopy(bootstrap))
         session_info.update(
-            action_name="website_sale_marketplace.marketplace_product_management_action",
             vendor_partner_id=vendor_partner.id,
             vendor_partner_name=vendor_partner.name,
-            user_companies={
-                'current_company': vendor_company.id,
-                'allowed_companies': {
-                    vendor_company.id: {
-                        'id': vendor_company.id,
-                        'name': vendor_company.name,
-                    },
-                },
-            },
-            currencies=request.env['res.currency'].get_all_currencies(),
-            home_action_id=action.id,  # Set as home action
         )
 
         # Add vendor_partner_id to user context for action domain filtering
         session_info['user_context']['vendor_partner_id'] = vendor_partner.id
 
-        # Provide empty menu structure to avoid menu service errors
-        session_info['menus'] = {
-            'root': {'id': 'root', 'children': [], 'name': 'root', 'appID': False},
-        }
-
         return session_info
 
+    def _get_marketplace_product_management_etag(self, session_info):
+        """ETag of the web client page: it only depends on the session and its session info
+
+        The session info must be built first, as it holds user data that no
+        cache sequence follows: a matching ETag saves the rendering of the
+        page and its transfer, not the session info.
+        """
+        registry = request.env.registry
+        signature = json.dumps([
+            request.session.sid,
+            registry.registry_sequence,
+            sorted(registry.cache_sequences.items()),
+            session_info,
+        ], sort_keys=True, default=str)
+        return hashlib.sha256(signature.encode()).hexdigest()
+
     @http.route(['/my/products', '/my/products/<path:subpath>'], type='http', auth='user', methods=['GET'])
     def portal_my_products(self, subpath=None, **kwargs):
         """Display vendor's products in web client view"""
@@ -72,8 +87,84 @@ class CustomerPortal(portal.CustomerPortal):
         if not vendor_partner.is_marketplace_vendor:
             return request.redirect('/my')
 
-        # Render the web client view
-        return request.render(
-            'website_sale_marketplace.marketplace_product_management_portal',
-            {'session_info': self._prepare_marketplace_product_management_session_info(vendor_partner)},
-        )
\ No newline at end of file
+        session_info = self._prepare_marketplace_product_management_session_info(vendor_partner)
+
+        # Repeat visits of an unchanged page are answered without rendering nor sending it again
+        etag = self._get_marketplace_product_management_etag(session_info)
+        if request.httprequest.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            # Render the web client view
+            response = request.render(
+                'website_sale_marketplace.marketplace_product_management_portal',
+                {'session_info': session_info},
+            )
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @http.route('/my/products/import', type='http', auth='user', methods=['GET'], website=True)
+    def portal_my_products_import_form(self, **kwargs):
+        """Display the bulk product import form"""
+        vendor_partner = self._get_vendor_partner()
+        if not vendor_partner.is_marketplace_vendor:
+            return request.redirect('/my')
+        return request.render('website_sale_marketplace.portal_my_products_import', {
+            'page_name': 'products',
+            'import_columns': IMPORT_COLUMNS,
+        })
+
+    @http.route('/my/products/import', type='http', auth='user', methods=['POST'], website=True)
+    def portal_my_products_import(self, import_file=None, **kwargs):
+        """Queue the creation or update of vendor products from a CSV/XLSX file
+
+        The file is stored on the import and processed by a cron; the progress
+        is reported by ``/my/products/import/<id>``.
+        """
+        vendor_partner = self._get_vendor_partner()
+        if not vendor_partner.is_marketplace_vendor:
+            return request.make_json_response({'error': 'Only marketplace vendors can import products'}, status=403)
+        if not import_file:
+            return request.make_json_response({'error': 'No file uploaded'}, status=400)
+
+        product_import = request.env['marketplace.product.import'].sudo()._schedule(
+            vendor_partner, import_file.filename, import_file.read(),
+        )
+
+        if request.httprequest.accept_mimetypes.best == 'application/json':
+            return request.make_json_response(product_import._get_progress())
+        return request.render('website_sale_marketplace.portal_my_products_import', {
+            'page_name': 'products',
+            'import_columns': IMPORT_COLUMNS,
+            'import_result': product_import._get_progress(),
+        })
+
+    @http.route('/my/products/import/<int:import_id>', type='http', auth='user', methods=['GET'])
+    def portal_my_products_import_progress(self, import_id, **kwargs):
+        """Report the progress of a product import"""
+        product_import = request.env['marketplace.product.import'].sudo().search([
+            ('id', '=', import_id),
+            ('vendor_id', '=', self._get_vendor_partner().id),
+        ])
+        if not product_import:
+            return request.not_found()
+        return request.make_json_response(product_import._get_progress())
+
+    @http.route('/my/products/feed', type='jsonrpc', auth='user', methods=['POST'])
+    def portal_my_products_feed(self, idempotency_key=None, deltas=None, **kwargs):
+        """Apply a batch of price/availability deltas sent by a vendor
+
+        ``deltas`` is a list of ``{'sku', 'list_price', 'available'}`` dicts. A batch
+        sent again with the same ``idempotency_key`` is not applied twice.
+        """
+        vendor_partner = self._get_vendor_partner()
+        if not vendor_partner.is_marketplace_vendor:
+            raise AccessError("Only marketplace vendors can send product feeds")
+        if not idempotency_key or not isinstance(deltas, list):
+            raise ValidationError("An idempotency_key and a list of deltas are required")
+        try:
+            return request.env['marketplace.feed.batch'].sudo()._receive(
+                vendor_partner, str(idempotency_key), deltas, request.env,
+            )
+        except ValueError as e:
+            raise ValidationError(str(e))
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+
+def migrate(cr, version):
+    """Create the order notification cadence column of the vendors with its default
+
+    Adding the column with a default is immediate, while the ORM would fill
+    the default on every partner with an UPDATE.
+    """
+    if not version:
+        return
+
+    cr.execute("""
+        ALTER TABLE res_partner
+            ADD COLUMN IF NOT EXISTS marketplace_digest_cadence varchar DEFAULT 'hourly'
+    """)
+    cr.execute("""
+        ALTER TABLE res_partner
+            ALTER COLUMN marketplace_digest_cadence DROP DEFAULT
+    """)
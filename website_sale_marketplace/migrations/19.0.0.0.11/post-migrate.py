@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import logging
+
+from odoo import SUPERUSER_ID, api
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Mark the fully paid marketplace sale orders as paid and build the vendor ledger
+
+    The payment date is unknown for existing orders: the date of their last
+    invoice is used instead.
+    """
+    if not version:
+        return
+
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("SELECT DISTINCT sale_order_id FROM sale_order_marketplace_purchase_rel")
+    sale_orders = env['sale.order'].browse([row[0] for row in cr.fetchall()])
+    paid_orders = sale_orders._filter_marketplace_fully_paid()
+    cr.execute("""
+        UPDATE sale_order so
+           SET marketplace_paid_date = invoices.invoice_date
+          FROM (
+                SELECT sol.order_id, MAX(am.invoice_date) AS invoice_date
+                  FROM sale_order_line sol
+                  JOIN sale_order_line_invoice_rel rel ON rel.order_line_id = sol.id
+                  JOIN account_move_line aml ON aml.id = rel.invoice_line_id
+                  JOIN account_move am ON am.id = aml.move_id
+                 WHERE sol.order_id = ANY(%s)
+                   AND am.move_type = 'out_invoice'
+                   AND am.state = 'posted'
+              GROUP BY sol.order_id
+          ) AS invoices
+         WHERE so.id = invoices.order_id
+    """, [paid_orders.ids])
+    _logger.info('Marked %s marketplace sale orders as paid', cr.rowcount)
+
+    env['marketplace.vendor.ledger']._rebuild()
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+
+def migrate(cr, version):
+    """Protect the portal vendor record rules from updates again
+
+    The 19.0.0.0.5, 19.0.0.0.7 and 19.0.0.0.8 migrations cleared their
+    noupdate flag to let the update rewrite them, and left it cleared. Locking
+    them here brings upgraded databases in line with fresh installations.
+    """
+    if not version:
+        return
+
+    cr.execute("""
+        UPDATE ir_model_data
+           SET noupdate = TRUE
+         WHERE module = 'website_sale_marketplace'
+           AND name IN ('product_template_portal_vendor_rule', 'product_image_portal_vendor_rule',
+                        'ir_attachment_portal_vendor_rule')
+    """)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Set the vendor company of marketplace products to the commercial partner of their vendor
+
+    It was the parent of the vendor, which differs for vendors nested in
+    contacts or for companies with a parent company. The attachments of the
+    changed products follow, in SQL as in 19.0.0.0.8.
+    """
+    if not version:
+        return
+
+    cr.execute("""
+        UPDATE product_template pt
+           SET marketplace_commercial_vendor_id = rp.commercial_partner_id
+          FROM res_partner rp
+         WHERE rp.id = pt.marketplace_vendor_id
+           AND pt.marketplace_commercial_vendor_id IS DISTINCT FROM rp.commercial_partner_id
+     RETURNING pt.id
+    """)
+    template_ids = [row[0] for row in cr.fetchall()]
+    _logger.info('Changed the vendor company of %s marketplace products', len(template_ids))
+    if not template_ids:
+        return
+
+    cr.execute("""
+        UPDATE ir_attachment ia
+           SET marketplace_vendor_id = pt.marketplace_commercial_vendor_id
+          FROM product_template pt
+         WHERE ia.res_model = 'product.template'
+           AND ia.res_id = pt.id
+           AND pt.id = ANY(%(ids)s)
+    """, {'ids': template_ids})
+    cr.execute("""
+        UPDATE ir_attachment ia
+           SET marketplace_vendor_id = pt.marketplace_commercial_vendor_id
+          FROM product_product pp
+          JOIN product_template pt ON pt.id = pp.product_tmpl_id
+         WHERE ia.res_model = 'product.product'
+           AND ia.res_id = pp.id
+           AND pt.id = ANY(%(ids)s)
+    """, {'ids': template_ids})
+    cr.execute("""
+        UPDATE ir_attachment ia
+           SET marketplace_vendor_id = pt.marketplace_commercial_vendor_id
+          FROM product_image pi
+     LEFT JOIN product_product pp ON pp.id = pi.product_variant_id
+          JOIN product_template pt ON pt.id = COALESCE(pi.product_tmpl_id, pp.product_tmpl_id)
+         WHERE ia.res_model = 'product.image'
+           AND ia.res_id = pi.id
+           AND pt.id = ANY(%(ids)s)
+    """, {'ids': template_ids})
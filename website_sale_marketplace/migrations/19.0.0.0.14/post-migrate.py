@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Count the marketplace products of the vendors in their own table
+
+    The initial counts are inserted as one change per vendor. The stored
+    counter columns of the partners, filled by databases updated to
+    19.0.0.0.6 up to 19.0.0.0.13, are dropped; the former 19.0.0.0.6 script
+    filling them is removed, so that other databases skip that aggregate.
+    """
+    if not version:
+        return
+
+    cr.execute("""
+        INSERT INTO marketplace_vendor_product_count
+               (vendor_id, product_count, draft_count, approval_count, approved_count, published_count)
+        SELECT marketplace_vendor_id,
+               count(*),
+               count(*) FILTER (WHERE marketplace_state = 'draft'),
+               count(*) FILTER (WHERE marketplace_state = 'approval'),
+               count(*) FILTER (WHERE marketplace_state = 'approved'),
+               count(*) FILTER (WHERE is_published)
+          FROM product_template
+         WHERE marketplace_vendor_id IS NOT NULL
+           AND active
+      GROUP BY marketplace_vendor_id
+    """)
+    _logger.info('Counted the marketplace products of %s vendors', cr.rowcount)
+    cr.execute("""
+        ALTER TABLE res_partner
+            DROP COLUMN IF EXISTS marketplace_product_count,
+            DROP COLUMN IF EXISTS marketplace_product_draft_count,
+            DROP COLUMN IF EXISTS marketplace_product_approval_count,
+            DROP COLUMN IF EXISTS marketplace_product_approved_count,
+            DROP COLUMN IF EXISTS marketplace_product_published_count
+    """)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import logging
+
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50000
+
+
+def migrate(cr, version):
+    """Backfill the sale order <-> marketplace purchase order link
+
+    Purchase orders are processed in id ranges so the backfill never holds a
+    lock on the whole table. Lines carrying a ``sale_line_id`` give the exact
+    link; older orders are matched on their (possibly merged) ``origin``.
+    """
+    if not version:
+        return
+
+    cr.execute("SELECT MIN(id), MAX(id) FROM purchase_order")
+    min_id, max_id = cr.fetchone()
+    if min_id is None:
+        return
+
+    for start in range(min_id, max_id + 1, CHUNK_SIZE):
+        end = start + CHUNK_SIZE
+        cr.execute("""
+            INSERT INTO sale_order_marketplace_purchase_rel (sale_order_id, purchase_order_id)
+            SELECT DISTINCT sol.order_id, pol.order_id
+              FROM purchase_order_line pol
+              JOIN sale_order_line sol ON sol.id = pol.sale_line_id
+              JOIN product_product pp ON pp.id = pol.product_id
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+             WHERE pt.marketplace_vendor_id IS NOT NULL
+               AND pol.order_id >= %s AND pol.order_id < %s
+            ON CONFLICT DO NOTHING
+        """, (start, end))
+        linked = cr.rowcount
+        cr.execute("""
+            INSERT INTO sale_order_marketplace_purchase_rel (sale_order_id, purchase_order_id)
+            SELECT DISTINCT so.id, po.id
+              FROM purchase_order po
+              JOIN sale_order so ON so.name = ANY(regexp_split_to_array(po.origin, ',\\s*'))
+             WHERE po.id >= %s AND po.id < %s
+               AND po.origin IS NOT NULL
+               AND EXISTS (
+                    SELECT 1
+                      FROM purchase_order_line pol
+                      JOIN product_product pp ON pp.id = pol.product_id
+                      JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                     WHERE pol.order_id = po.id
+                       AND pt.marketplace_vendor_id IS NOT NULL
+               )
+            ON CONFLICT DO NOTHING
+        """, (start, end))
+        linked += cr.rowcount
+        _logger.info('Marketplace PO links: purchase orders %s-%s processed, %s links created',
+                     start, end - 1, linked)
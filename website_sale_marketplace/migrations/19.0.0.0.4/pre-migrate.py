@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Pre-fill the marketplace dropship flags in SQL
+
+    Creating the columns beforehand prevents the ORM from recomputing the new
+    stored fields record by record on large purchase tables.
+    """
+    if not version:
+        return
+
+    cr.execute("""
+        ALTER TABLE purchase_order_line ADD COLUMN IF NOT EXISTS is_marketplace_dropship boolean;
+        ALTER TABLE purchase_order ADD COLUMN IF NOT EXISTS has_marketplace_dropship boolean;
+    """)
+    cr.execute("""
+        UPDATE purchase_order_line pol
+           SET is_marketplace_dropship = TRUE
+          FROM product_product pp
+          JOIN product_template pt ON pt.id = pp.product_tmpl_id
+          JOIN stock_route_product srp ON srp.product_id = pt.id
+          JOIN ir_model_data imd ON imd.res_id = srp.route_id
+                                AND imd.model = 'stock.route'
+                                AND imd.module = 'stock_dropshipping'
+                                AND imd.name = 'route_drop_shipping'
+         WHERE pp.id = pol.product_id
+           AND pt.marketplace_vendor_id IS NOT NULL
+    """)
+    _logger.info('Flagged %s marketplace dropship purchase order lines', cr.rowcount)
+    cr.execute("""
+        UPDATE purchase_order po
+           SET has_marketplace_dropship = TRUE
+         WHERE EXISTS (
+                SELECT 1 FROM purchase_order_line pol
+                 WHERE pol.order_id = po.id AND pol.is_marketplace_dropship
+         )
+    """)
+    _logger.info('Flagged %s marketplace dropship purchase orders', cr.rowcount)
+    cr.execute("""
+        UPDATE purchase_order_line SET is_marketplace_dropship = FALSE WHERE is_marketplace_dropship IS NULL;
+        UPDATE purchase_order SET has_marketplace_dropship = FALSE WHERE has_marketplace_dropship IS NULL;
+    """)
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+
+def migrate(cr, version):
+    """Let the update rewrite the portal vendor record rules
+
+    The rules are declared noupdate; they now rely on the vendor partner
+    resolved on the user instead of walking the partner's parent.
+    """
+    if not version:
+        return
+
+    cr.execute("""
+        UPDATE ir_model_data
+           SET noupdate = FALSE
+         WHERE module = 'website_sale_marketplace'
+           AND name IN ('product_template_portal_vendor_rule', 'product_image_portal_vendor_rule')
+    """)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Pre-fill the vendor company of marketplace products in SQL
+
+    Creating the column beforehand prevents the ORM from recomputing the new
+    stored field product by product. The portal vendor record rules are
+    declared noupdate, let the update rewrite them to use it.
+    """
+    if not version:
+        return
+
+    cr.execute("""
+        ALTER TABLE product_template ADD COLUMN IF NOT EXISTS marketplace_commercial_vendor_id integer
+    """)
+    cr.execute("""
+        UPDATE product_template pt
+           SET marketplace_commercial_vendor_id = COALESCE(rp.parent_id, rp.id)
+          FROM res_partner rp
+         WHERE rp.id = pt.marketplace_vendor_id
+    """)
+    _logger.info('Set the vendor company of %s marketplace products', cr.rowcount)
+
+    cr.execute("""
+        UPDATE ir_model_data
+           SET noupdate = FALSE
+         WHERE module = 'website_sale_marketplace'
+           AND name IN ('product_template_portal_vendor_rule', 'product_image_portal_vendor_rule')
+    """)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Pre-fill the marketplace vendor of product attachments in SQL
+
+    Creating the column beforehand prevents the ORM from recomputing the new
+    stored field on the whole attachment table. The portal attachment record
+    rule is declared noupdate, let the update rewrite it to use it.
+    """
+    if not version:
+        return
+
+    cr.execute("""
+        ALTER TABLE ir_attachment ADD COLUMN IF NOT EXISTS marketplace_vendor_id integer
+    """)
+    cr.execute("""
+        UPDATE ir_attachment ia
+           SET marketplace_vendor_id = pt.marketplace_commercial_vendor_id
+          FROM product_template pt
+         WHERE ia.res_model = 'product.template'
+           AND ia.res_id = pt.id
+           AND pt.marketplace_commercial_vendor_id IS NOT NULL
+    """)
+    template_count = cr.rowcount
+    cr.execute("""
+        UPDATE ir_attachment ia
+           SET marketplace_vendor_id = pt.marketplace_commercial_vendor_id
+          FROM product_product pp
+          JOIN product_template pt ON pt.id = pp.product_tmpl_id
+         WHERE ia.res_model = 'product.product'
+           AND ia.res_id = pp.id
+           AND pt.marketplace_commercial_vendor_id IS NOT NULL
+    """)
+    variant_count = cr.rowcount
+    cr.execute("""
+        UPDATE ir_attachment ia
+           SET marketplace_vendor_id = pt.marketplace_commercial_vendor_id
+          FROM product_image pi
+     LEFT JOIN product_product pp ON pp.id = pi.product_variant_id
+          JOIN product_template pt ON pt.id = COALESCE(pi.product_tmpl_id, pp.product_tmpl_id)
+         WHERE ia.res_model = 'product.image'
+           AND ia.res_id = pi.id
+           AND pt.marketplace_commercial_vendor_id IS NOT NULL
+    """)
+    _logger.info('Set the marketplace vendor of %s attachments', template_count + variant_count + cr.rowcount)
+
+    cr.execute("""
+        UPDATE ir_model_data
+           SET noupdate = FALSE
+         WHERE module = 'website_sale_marketplace'
+           AND name = 'ir_attachment_portal_vendor_rule'
+    """)
@@ -6,5 +6,18 @@ from . import res_partners
 from . import product_category
 from . import product
 from . import sale_order
+from . import purchase_order
 from . import account_move
+from . import marketplace_po_outbox
+from . import marketplace_reprice_job
+from . import marketplace_product_import
+from . import marketplace_feed_batch
+from . import marketplace_approval_rule
+from . import marketplace_approval_log
 from . import payment_transaction
+from . import ir_http
+from . import ir_attachment
+from . import marketplace_metric
+from . import marketplace_vendor_notification
+from . import marketplace_vendor_ledger
+from . import marketplace_vendor_product_count
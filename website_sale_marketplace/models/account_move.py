@@ -12,7 +12,7 @@ class AccountMove(models.Model):
 
     @api.depends('line_ids.amount_residual')
     def _compute_payment_state(self):
-        """Override to auto-confirm marketplace vendor POs when invoice is paid"""
+        """Override to queue marketplace vendor PO confirmation when invoice is paid"""
         # Store previous payment states before compute
         previous_states = {move.id: move.payment_state for move in self if move.id}
 
@@ -20,63 +20,62 @@ class AccountMove(models.Model):
         result = super()._compute_payment_state()
 
         # Check for newly paid invoices
-        for move in self:
-            if (move.id and
-                move.move_type == 'out_invoice' and
-                move.state == 'posted' and
-                previous_states.get(move.id) != 'paid' and
-                move.payment_state == 'paid'):
+        newly_paid = self.filtered(lambda move: (
+            move.id and
+            move.move_type == 'out_invoice' and
+            move.state == 'posted' and
+            previous_states.get(move.id) != 'paid' and
+            move.payment_state == 'paid'
+        ))
+        if newly_paid:
+            # Only record the event: POs are confirmed by the outbox worker, outside
+            # of the payment reconciliation transaction
+            newly_paid.sudo()._enqueue_marketplace_purchase_confirmation()
 
-                # Trigger auto-confirm in a separate transaction to avoid compute issues
-                _logger.info(f'Invoice {move.name} paid - triggering marketplace PO auto-confirm')
-                move.sudo()._auto_confirm_marketplace_purchase_orders()
+        newly_paid_bills = self.filtered(lambda move: (
+            move.id and
+            move.move_type == 'in_invoice' and
+            move.state == 'posted' and
+            previous_states.get(move.id) != 'paid' and
+            move.payment_state == 'paid'
+        ))
+        if newly_paid_bills:
+            self.env['marketplace.vendor.ledger'].sudo()._record_paid_bills(newly_paid_bills)
 
         return result
 
-    def _auto_confirm_marketplace_purchase_orders(self):
-        """Auto-confirm purchase orders for marketplace vendor products"""
-        self.ensure_one()
+    def _get_marketplace_paid_sale_orders(self):
+        """Return the sale orders of these invoices whose posted invoices are all paid
 
-        # Get related sale order from invoice lines
-        sale_orders = self.line_ids.sale_line_ids.order_id
-        _logger.info(f'Checking sale orders for marketplace POs: {sale_orders.mapped("name")}')
+        Works on the whole recordset of newly paid invoices: the affected sale
+        orders and their payment status are computed with grouped queries, using
+        the in-memory payment state of the invoices in self.
+        """
+        self.env['account.move.line'].flush_model(['move_id', 'sale_line_ids'])
+        self.env['sale.order.line'].flush_model(['order_id'])
+        self.env.cr.execute("""
+            SELECT DISTINCT sol.order_id
+              FROM account_move_line aml
+              JOIN sale_order_line_invoice_rel rel ON rel.invoice_line_id = aml.id
+              JOIN sale_order_line sol ON sol.id = rel.order_line_id
+             WHERE aml.move_id = ANY(%s)
+        """, [self.ids])
+        sale_orders = self.env['sale.order'].browse([row[0] for row in self.env.cr.fetchall()])
+        return sale_orders._filter_marketplace_fully_paid({move.id: move.payment_state for move in self})
 
-        for sale_order in sale_orders:
-            # Check if all invoices for this sale order are paid
-            all_invoices = sale_order.invoice_ids.filtered(
-                lambda inv: inv.move_type == 'out_invoice' and inv.state == 'posted'
-            )
-
-            if not all_invoices or not all(inv.payment_state == 'paid' for inv in all_invoices):
-                continue
+    def _enqueue_marketplace_purchase_confirmation(self):
+        """Queue the fully paid sale orders of these invoices for marketplace PO auto-confirm
 
-            # Get all purchase orders linked to this sale order
-            purchase_orders = self.env['purchase.order'].search([
-                ('origin', '=', sale_order.name),
-                ('state', 'in', ['draft', 'sent', 'to approve'])
-            ])
-            _logger.info(f'Found {len(purchase_orders)} POs for SO {sale_order.name}: {purchase_orders.mapped("name")}')
-
-            for po in purchase_orders:
-                # Check if PO contains marketplace vendor products
-                has_marketplace_products = any(
-                    line.product_id.product_tmpl_id.marketplace_vendor_id
-                    for line in po.order_line
-                )
-                _logger.info(f'PO {po.name} has marketplace products: {has_marketplace_products}')
-                if has_marketplace_products:
-                    try:
-                        _logger.info(f'Confirming marketplace PO {po.name}')
-                        po.button_confirm()
-                        _logger.info(f'Successfully confirmed PO {po.name}')
-                    except Exception as e:
-                        # Log error but don't block payment
-                        self.env['ir.logging'].sudo().create({
-                            'name': 'Marketplace PO Auto-Confirm',
-                            'type': 'server',
-                            'level': 'error',
-                            'message': f'Failed to auto-confirm PO {po.name}: {str(e)}',
-                            'path': 'website_sale_marketplace',
-                            'func': '_auto_confirm_marketplace_purchase_orders',
-                            'line': '0',
-                        })
+        A sale order is queued at most once per transaction, however many
+        times the payment state of its invoices is recomputed.
+        """
+        handled_ids = self.env.cr.precommit.data.setdefault('marketplace.paid_sale_order_ids', set())
+        sale_orders = self._get_marketplace_paid_sale_orders().filtered(lambda so: so.id not in handled_ids)
+        if sale_orders:
+            handled_ids.update(sale_orders.ids)
+            _logger.info('Invoices %s paid - queueing marketplace PO auto-confirm for %s',
+                         self.mapped('name'), sale_orders.mapped('name'))
+            self.env['marketplace.po.outbox']._enqueue(
+                sale_orders, payment_states={move.id: move.payment_state for move in self},
+            )
+            self.env['marketplace.vendor.ledger']._record_paid_sale_orders(sale_orders)
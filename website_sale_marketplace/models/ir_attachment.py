@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo import api, fields, models
+
+# Models whose attachments belong to the vendor of the product
+MARKETPLACE_PRODUCT_MODELS = ('product.template', 'product.product', 'product.image')
+
+
+class IrAttachment(models.Model):
+    _inherit = 'ir.attachment'
+
+    # Stored so that the portal vendor record rule is a single indexed equality
+    marketplace_vendor_id = fields.Many2one(
+        'res.partner', string='Marketplace Vendor', compute='_compute_marketplace_vendor_id',
+        store=True, index='btree_not_null', ondelete='set null',
+        help='Vendor company of the marketplace product the attachment belongs to')
+
+    @api.depends('res_model', 'res_id')
+    def _compute_marketplace_vendor_id(self):
+        vendor_by_record = {}
+        for res_model in MARKETPLACE_PRODUCT_MODELS:
+            res_ids = {attachment.res_id for attachment in self if attachment.res_model == res_model and attachment.res_id}
+            if not res_ids:
+                continue
+            records = self.env[res_model].sudo().with_context(active_test=False).browse(res_ids).exists()
+            for record in records:
+                if res_model == 'product.template':
+                    template = record
+                elif res_model == 'product.image':
+                    template = record.product_tmpl_id or record.product_variant_id.product_tmpl_id
+                else:
+                    template = record.product_tmpl_id
+                vendor_by_record[res_model, record.id] = template.marketplace_commercial_vendor_id
+        for attachment in self:
+            attachment.marketplace_vendor_id = vendor_by_record.get((attachment.res_model, attachment.res_id), False)
+
+    @api.model
+    def _recompute_marketplace_vendor(self, products):
+        """Recompute the vendor of the attachments of ``products`` after a vendor change"""
+        products = products.sudo().with_context(active_test=False)
+        domain = [
+            '|', '|',
+            '&', ('res_model', '=', 'product.template'), ('res_id', 'in', products.ids),
+            '&', ('res_model', '=', 'product.product'), ('res_id', 'in', products.product_variant_ids.ids),
+            '&', ('res_model', '=', 'product.image'), ('res_id', 'in', (
+                products.product_template_image_ids | products.product_variant_ids.product_variant_image_ids
+            ).ids),
+        ]
+        # Include the attachments of binary fields, which are hidden from searches by default
+        attachments = self.sudo().search(['|', ('res_field', '=', False), ('res_field', '!=', False)] + domain)
+        self.env.add_to_compute(self._fields['marketplace_vendor_id'], attachments)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo import api, models
+from odoo.tools import ormcache
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = 'ir.http'
+
+    @api.model
+    @ormcache('lang', 'company_id')
+    def _get_marketplace_webclient_bootstrap(self, lang, company_id):
+        """Return the vendor independent part of the marketplace web client session info
+
+        Cached per database, language and company; the cache is cleared with the
+        registry caches (module updates, company and currency changes).
+        """
+        env = self.with_context(lang=lang).sudo().env
+        company = env['res.company'].browse(company_id)
+        action = env.ref('website_sale_marketplace.marketplace_product_management_action')
+        return {
+            'action_name': 'website_sale_marketplace.marketplace_product_management_action',
+            # Embedded so that the web client opens it without loading it first
+            'marketplace_action': action._get_action_dict(),
+            'user_companies': {
+                'current_company': company.id,
+                'allowed_companies': {
+                    company.id: {
+                        'id': company.id,
+                        'name': company.name,
+                    },
+                },
+            },
+            'currencies': env['res.currency'].get_all_currencies(),
+            # Empty menu structure to avoid menu service errors
+            'menus': {
+                'root': {'id': 'root', 'children': [], 'name': 'root', 'appID': False},
+            },
+        }
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo import fields, models
+
+
+class MarketplaceApprovalLog(models.Model):
+    _name = 'marketplace.approval.log'
+    _description = 'Marketplace Auto-Approval Decision'
+    _order = 'id desc'
+
+    product_id = fields.Many2one('product.template', string='Product', required=True, index=True,
+                                 ondelete='cascade', readonly=True)
+    vendor_id = fields.Many2one('res.partner', string='Vendor', index=True, ondelete='cascade', readonly=True)
+    rule_id = fields.Many2one('marketplace.approval.rule', string='Rule', index=True, ondelete='set null',
+                              readonly=True, help='Empty when no rule matches the product (previews only)')
+    dry_run = fields.Boolean(string='Preview Only', readonly=True,
+                             help='Recorded by a preview: nothing was changed')
+    published = fields.Boolean(string='Published', readonly=True)
+    create_date = fields.Datetime(string='Decided On', readonly=True)
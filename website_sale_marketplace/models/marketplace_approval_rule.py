@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from collections import defaultdict
+
+from odoo import api, fields, models
+from .res_partners import TRUST_LEVELS
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Number of pending products evaluated and committed together
+CHUNK_SIZE = 1000
+
+TRUST_RANKS = {level: rank for rank, (level, _label) in enumerate(TRUST_LEVELS)}
+
+
+class MarketplaceApprovalRule(models.Model):
+    _name = 'marketplace.approval.rule'
+    _description = 'Marketplace Auto-Approval Rule'
+    _order = 'sequence, id'
+
+    name = fields.Char(string='Name', required=True)
+    active = fields.Boolean(string='Active', default=True)
+    sequence = fields.Integer(string='Sequence', default=10,
+                              help='Products are approved by the first matching rule')
+    vendor_ids = fields.Many2many('res.partner', string='Vendors', domain=[('is_marketplace_vendor', '=', True)],
+                                  help='Leave empty to apply the rule to all vendors')
+    categ_ids = fields.Many2many('product.category', string='Categories',
+                                 help='Leave empty to apply the rule to all categories; subcategories are included')
+    min_trust_level = fields.Selection(TRUST_LEVELS, string='Minimum Vendor Trust', default='trusted',
+                                       required=True)
+    min_price = fields.Float(string='Minimum Sales Price', digits='Product Price')
+    max_price = fields.Float(string='Maximum Sales Price', digits='Product Price',
+                             help='Leave to 0 for no maximum')
+    require_image = fields.Boolean(string='Image Required', default=True)
+    min_description_length = fields.Integer(string='Minimum Description Length',
+                                            help='Minimum number of characters of the sales description')
+    auto_publish = fields.Boolean(string='Publish', help='Also publish the approved products on the website')
+    log_ids = fields.One2many('marketplace.approval.log', 'rule_id', string='Decisions')
+    approved_count = fields.Integer(string='Approved Products', compute='_compute_log_counts')
+    preview_count = fields.Integer(string='Would Approve', compute='_compute_log_counts')
+
+    def _compute_log_counts(self):
+        counts = {
+            (rule.id, dry_run): count
+            for rule, dry_run, count in self.env['marketplace.approval.log']._read_group(
+                [('rule_id', 'in', self.ids)], ['rule_id', 'dry_run'], ['__count'],
+            )
+        }
+        for rule in self:
+            rule.approved_count = counts.get((rule.id, False), 0)
+            rule.preview_count = counts.get((rule.id, True), 0)
+
+    @api.model
+    def _get_pending_domain(self):
+        return [('marketplace_vendor_id', '!=', False), ('marketplace_state', '=', 'approval')]
+
+    def _filter_products(self, products, product_ids_with_image):
+        """Return the products of ``products`` matching the rule"""
+        self.ensure_one()
+        min_rank = TRUST_RANKS[self.min_trust_level]
+        categ_paths = self.categ_ids.mapped('parent_path')
+        return products.filtered(lambda product: (
+            (not self.vendor_ids or product.marketplace_vendor_id in self.vendor_ids)
+            and TRUST_RANKS[product.marketplace_vendor_id.marketplace_trust_level or 'new'] >= min_rank
+            and (not categ_paths or (
+                product.categ_id and any(product.categ_id.parent_path.startswith(path) for path in categ_paths)
+            ))
+            and product.list_price >= self.min_price
+            and (not self.max_price or product.list_price <= self.max_price)
+            and (not self.require_image or product.id in product_ids_with_image)
+            and len((product.description_sale or '').strip()) >= self.min_description_length
+        ))
+
+    def _match(self, products):
+        """Return a dict {rule: products} assigning each product to the first matching rule in self"""
+        products = products.sudo()
+        products.fetch(['marketplace_vendor_id', 'categ_id', 'list_price', 'description_sale'])
+        products.marketplace_vendor_id.fetch(['marketplace_trust_level'])
+        products.categ_id.fetch(['parent_path'])
+        product_ids_with_image = set()
+        if any(self.mapped('require_image')):
+            # Check images with one query instead of loading them
+            product_ids_with_image = set(self.env['ir.attachment'].sudo().search_fetch([
+                ('res_model', '=', 'product.template'),
+                ('res_field', '=', 'image_1920'),
+                ('res_id', 'in', products.ids),
+            ], ['res_id']).mapped('res_id'))
+
+        products_by_rule = {}
+        for rule in self.sorted():
+            matched = rule._filter_products(products, product_ids_with_image)
+            if matched:
+                products_by_rule[rule] = matched
+                products -= matched
+        return products_by_rule
+
+    def _apply(self, products, dry_run=False):
+        """Approve (or only log, with ``dry_run``) the products matched by the rules in self
+
+        Matching products are approved with one write per rule, with compact
+        tracking, and every approval is recorded in the approval log. Rules
+        never reject products: the others stay pending for a reviewer. They are
+        logged without rule by previews only, as the hourly job evaluates every
+        pending product again and would log each of them once per run.
+        """
+        products_by_rule = self._match(products)
+        log_vals = []
+        if dry_run:
+            unmatched = products.browse().union(*products_by_rule.values())
+            log_vals += [{
+                'product_id': product.id,
+                'vendor_id': product.marketplace_vendor_id.id,
+                'rule_id': False,
+                'dry_run': True,
+            } for product in products - unmatched]
+        for rule, matched in products_by_rule.items():
+            if not dry_run:
+                matched.with_context(marketplace_compact_tracking=True)._set_marketplace_state('approved')
+                if rule.auto_publish:
+                    matched.write({'is_published': True})
+            log_vals += [{
+                'product_id': product.id,
+                'vendor_id': product.marketplace_vendor_id.id,
+                'rule_id': rule.id,
+                'dry_run': dry_run,
+                'published': rule.auto_publish and not dry_run,
+            } for product in matched]
+        self.env['marketplace.approval.log'].create(log_vals)
+        return products_by_rule
+
+    def _run(self, dry_run=False):
+        """Evaluate the rules in self on all pending products, chunk by chunk"""
+        counts = defaultdict(int)
+        if not self:
+            return counts
+        Product = self.env['product.template'].sudo()
+        last_product_id = 0
+        while True:
+            products = Product.search(
+                self._get_pending_domain() + [('id', '>', last_product_id)], order='id', limit=CHUNK_SIZE,
+            )
+            if not products:
+                break
+            last_product_id = products[-1].id
+            for rule, matched in self._apply(products, dry_run=dry_run).items():
+                counts[rule] += len(matched)
+            if not dry_run and not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+            self.env.invalidate_all()
+        for rule, count in counts.items():
+            _logger.info('Marketplace auto-approval rule %s %s %s products',
+                         rule.name, 'would approve' if dry_run else 'approved', count)
+        return counts
+
+    @api.model
+    def _cron_auto_approve(self):
+        self.search([])._run()
+
+    def action_preview(self):
+        """Dry run: report the pending products each rule would approve"""
+        preview_domain = ['|', ('rule_id', 'in', self.ids), ('rule_id', '=', False), ('dry_run', '=', True)]
+        self.env['marketplace.approval.log'].search(preview_domain).unlink()
+        self._run(dry_run=True)
+        return self.env['marketplace.approval.log']._get_records_action(
+            name='Auto-Approval Preview',
+            domain=preview_domain,
+            context={'group_by': 'rule_id'},
+        )
+
+    def action_view_approved(self):
+        self.ensure_one()
+        return self.env['marketplace.approval.log']._get_records_action(
+            name=self.name,
+            domain=[('rule_id', '=', self.id), ('dry_run', '=', False)],
+        )
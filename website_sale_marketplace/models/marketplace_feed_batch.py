@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from collections import defaultdict
+
+from odoo import api, fields, models
+from odoo.tools import float_compare
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Maximum number of deltas accepted in a single batch
+MAX_BATCH_SIZE = 10000
+
+
+class MarketplaceFeedBatch(models.Model):
+    _name = 'marketplace.feed.batch'
+    _description = 'Marketplace Vendor Price Feed Batch'
+    _order = 'id desc'
+
+    vendor_id = fields.Many2one('res.partner', string='Vendor', required=True, index=True,
+                                ondelete='cascade', readonly=True)
+    idempotency_key = fields.Char(string='Idempotency Key', required=True, readonly=True)
+    summary = fields.Json(string='Summary', readonly=True)
+    received_count = fields.Integer(string='Received Deltas', readonly=True)
+    applied_count = fields.Integer(string='Applied Deltas', readonly=True)
+
+    _vendor_key_uniq = models.Constraint(
+        'UNIQUE(vendor_id, idempotency_key)',
+        'A feed batch with this idempotency key was already received for this vendor.',
+    )
+
+    @api.model
+    def _receive(self, vendor_partner, idempotency_key, deltas, products_env):
+        """Apply a batch of vendor deltas once per idempotency key
+
+        A batch replayed with a known key is not applied again; the summary of
+        the first application is returned instead.
+        """
+        batch = self.search([('vendor_id', '=', vendor_partner.id), ('idempotency_key', '=', idempotency_key)])
+        if batch:
+            return dict(batch.summary, replayed=True)
+        if len(deltas) > MAX_BATCH_SIZE:
+            raise ValueError(f"A batch cannot contain more than {MAX_BATCH_SIZE} deltas")
+
+        summary = self._apply_deltas(vendor_partner, deltas, products_env)
+        self.create({
+            'vendor_id': vendor_partner.id,
+            'idempotency_key': idempotency_key,
+            'summary': summary,
+            'received_count': summary['received'],
+            'applied_count': summary['applied'],
+        })
+        return dict(summary, replayed=False)
+
+    @api.model
+    def _apply_deltas(self, vendor_partner, deltas, products_env):
+        """Diff ``deltas`` against the products of ``vendor_partner`` and write the actual changes
+
+        Each delta is a dict with a ``sku`` (internal reference) and optionally a
+        ``list_price`` and an ``available`` flag. No-op deltas are dropped, and the
+        remaining changes are grouped by value so that each distinct price (or
+        availability) is written once, through ``ProductTemplate.write`` and the
+        batched cost recomputation.
+        """
+        errors = []
+        # The last delta of a SKU wins
+        deltas_by_sku = {}
+        for index, delta in enumerate(deltas):
+            sku = str(delta.get('sku') or '').strip() if isinstance(delta, dict) else ''
+            if not sku:
+                errors.append({'index': index, 'error': 'Missing SKU'})
+                continue
+            deltas_by_sku[sku] = (index, delta)
+
+        ProductTemplate = products_env['product.template']
+        products = ProductTemplate.search_fetch(
+            [('marketplace_commercial_vendor_id', '=', vendor_partner.id),
+             ('default_code', 'in', list(deltas_by_sku))],
+            ['default_code', 'list_price', 'sale_ok'],
+        )
+        products_by_sku = {product.default_code: product for product in products}
+        precision = self.env['decimal.precision'].precision_get('Product Price')
+
+        product_ids_by_price = defaultdict(list)
+        product_ids_by_availability = defaultdict(list)
+        noop_count = 0
+        for sku, (index, delta) in deltas_by_sku.items():
+            product = products_by_sku.get(sku)
+            if not product:
+                errors.append({'index': index, 'sku': sku, 'error': 'Unknown SKU'})
+                continue
+            changed = False
+            if delta.get('list_price') is not None:
+                try:
+                    list_price = float(delta['list_price'])
+                except (TypeError, ValueError):
+                    errors.append({'index': index, 'sku': sku, 'error': 'Invalid list_price'})
+                    continue
+                if list_price < 0:
+                    errors.append({'index': index, 'sku': sku, 'error': 'Negative list_price'})
+                    continue
+                if float_compare(list_price, product.list_price, precision_digits=precision):
+                    product_ids_by_price[list_price].append(product.id)
+                    changed = True
+            if delta.get('available') is not None and bool(delta['available']) != product.sale_ok:
+                product_ids_by_availability[bool(delta['available'])].append(product.id)
+                changed = True
+            noop_count += not changed
+
+        for list_price, product_ids in product_ids_by_price.items():
+            ProductTemplate.browse(product_ids).write({'list_price': list_price})
+        for available, product_ids in product_ids_by_availability.items():
+            ProductTemplate.browse(product_ids).write({'sale_ok': available})
+
+        applied_ids = set().union(*product_ids_by_price.values(), *product_ids_by_availability.values())
+        return {
+            'received': len(deltas),
+            'applied': len(applied_ids),
+            'noop': noop_count,
+            'errors': errors,
+        }
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from odoo import api, fields, models
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Share of the operations measured, unless set by the website_sale_marketplace.metrics_sample_rate parameter
+DEFAULT_SAMPLE_RATE = 0.1
+# Metrics are kept for this many days
+RETENTION_DAYS = 30
+
+
+class MarketplaceMetric(models.Model):
+    _name = 'marketplace.metric'
+    _description = 'Marketplace Operation Metrics'
+    _order = 'period_start desc, operation'
+
+    operation = fields.Char(string='Operation', required=True, readonly=True)
+    period_start = fields.Datetime(string='Hour', required=True, readonly=True)
+    sample_count = fields.Integer(string='Sampled Calls', readonly=True)
+    error_count = fields.Integer(string='Errors', readonly=True)
+    record_count = fields.Integer(string='Records', readonly=True)
+    query_count = fields.Integer(string='Queries', readonly=True)
+    total_duration = fields.Float(string='Total Duration (ms)', readonly=True)
+    max_duration = fields.Float(string='Max Duration (ms)', readonly=True, aggregator='max')
+    avg_duration = fields.Float(string='Average Duration (ms)', compute='_compute_averages')
+    avg_query_count = fields.Float(string='Average Queries', compute='_compute_averages')
+
+    _operation_period_uniq = models.Constraint(
+        'UNIQUE(operation, period_start)',
+        'Metrics are aggregated per operation and hour.',
+    )
+
+    @api.depends('total_duration', 'query_count', 'sample_count')
+    def _compute_averages(self):
+        for metric in self:
+            metric.avg_duration = metric.total_duration / metric.sample_count if metric.sample_count else 0.0
+            metric.avg_query_count = metric.query_count / metric.sample_count if metric.sample_count else 0.0
+
+    @api.model
+    def _get_sample_rate(self):
+        return float(self.env['ir.config_parameter'].sudo().get_param(
+            'website_sale_marketplace.metrics_sample_rate', DEFAULT_SAMPLE_RATE,
+        ))
+
+    @contextmanager
+    def _instrument(self, operation, record_count=0):
+        """Measure duration and queries of the block for a sample of the calls
+
+        Yields a dict whose ``records`` and ``errors`` counts may be updated
+        by the block. An exception raised by the block counts as an error.
+        Measures are aggregated in memory during the transaction and written
+        in a single query once it ends, so that instrumented code never waits
+        on the metrics rows.
+        """
+        stats = {'records': record_count, 'errors': 0}
+        if random.random() >= self._get_sample_rate():
+            yield stats
+            return
+        cr = self.env.cr
+        query_count = cr.sql_log_count
+        start = time.perf_counter()
+        try:
+            yield stats
+        except Exception:
+            stats['errors'] += 1
+            raise
+        finally:
+            self._add_measure(
+                operation,
+                duration=(time.perf_counter() - start) * 1000,
+                query_count=cr.sql_log_count - query_count,
+                record_count=stats['records'],
+                error_count=stats['errors'],
+            )
+
+    def _add_measure(self, operation, duration, query_count, record_count, error_count):
+        """Aggregate a measure in the transaction, to be flushed when it ends"""
+        cr = self.env.cr
+        measures = cr.postcommit.data.get('marketplace.metrics')
+        if measures is None:
+            measures = cr.postcommit.data['marketplace.metrics'] = {}
+            # Test transactions never end, tests flush the measures themselves
+            if not self.env.registry.in_test_mode():
+                # Failures roll the transaction back: keep their measures too
+                cr.postcommit.add(lambda: self._flush_measures(measures))
+                cr.postrollback.add(lambda: self._flush_measures(measures))
+        measure = measures.setdefault(operation, {
+            'samples': 0, 'errors': 0, 'records': 0, 'queries': 0, 'duration': 0.0, 'max_duration': 0.0,
+        })
+        measure['samples'] += 1
+        measure['errors'] += error_count
+        measure['records'] += record_count
+        measure['queries'] += query_count
+        measure['duration'] += duration
+        measure['max_duration'] = max(measure['max_duration'], duration)
+
+    def _flush_measures(self, measures):
+        """Add ``measures`` to the metrics of the current hour, in a transaction of their own"""
+        if not measures:
+            return
+        operations = list(measures)
+        try:
+            with self.env.registry.cursor() as cr:
+                cr.execute("""
+                    INSERT INTO marketplace_metric
+                           (operation, period_start, sample_count, error_count, record_count, query_count,
+                            total_duration, max_duration, create_uid, create_date, write_uid, write_date)
+                    SELECT operation, date_trunc('hour', now() AT TIME ZONE 'UTC'), samples, errors, records,
+                           queries, duration, max_duration,
+                           %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+                      FROM unnest(%(operations)s::varchar[], %(samples)s::int[], %(errors)s::int[],
+                                  %(records)s::int[], %(queries)s::int[], %(durations)s::float[],
+                                  %(max_durations)s::float[])
+                           AS m(operation, samples, errors, records, queries, duration, max_duration)
+                    ON CONFLICT (operation, period_start) DO UPDATE
+                       SET sample_count = marketplace_metric.sample_count + EXCLUDED.sample_count,
+                           error_count = marketplace_metric.error_count + EXCLUDED.error_count,
+                           record_count = marketplace_metric.record_count + EXCLUDED.record_count,
+                           query_count = marketplace_metric.query_count + EXCLUDED.query_count,
+                           total_duration = marketplace_metric.total_duration + EXCLUDED.total_duration,
+                           max_duration = GREATEST(marketplace_metric.max_duration, EXCLUDED.max_duration),
+                           write_date = EXCLUDED.write_date
+                """, {
+                    'uid': self.env.uid,
+                    'operations': operations,
+                    'samples': [measures[operation]['samples'] for operation in operations],
+                    'errors': [measures[operation]['errors'] for operation in operations],
+                    'records': [measures[operation]['records'] for operation in operations],
+                    'queries': [measures[operation]['queries'] for operation in operations],
+                    'durations': [measures[operation]['duration'] for operation in operations],
+                    'max_durations': [measures[operation]['max_duration'] for operation in operations],
+                })
+        except Exception:
+            # Metrics must never break the instrumented operations
+            _logger.warning('Could not record marketplace metrics', exc_info=True)
+        measures.clear()
+
+    @api.autovacuum
+    def _gc_metrics(self):
+        self.search([('period_start', '<', fields.Datetime.now() - timedelta(days=RETENTION_DAYS))]).unlink()
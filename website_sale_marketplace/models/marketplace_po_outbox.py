@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import str2bool
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Number of attempts before an event is given up and marked as failed
+MAX_ATTEMPTS = 5
+# Delay before the first retry, doubled on every further attempt
+RETRY_BASE_DELAY = timedelta(minutes=5)
+
+
+class MarketplacePoOutbox(models.Model):
+    _name = 'marketplace.po.outbox'
+    _description = 'Marketplace PO Confirmation Queue'
+    _order = 'next_attempt_date, id'
+
+    sale_order_id = fields.Many2one('sale.order', string='Sale Order', required=True, index=True,
+                                    ondelete='cascade', readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='State', default='pending', required=True, readonly=True)
+    attempt_count = fields.Integer(string='Attempts', default=0, readonly=True)
+    next_attempt_date = fields.Datetime(string='Next Attempt', default=fields.Datetime.now,
+                                        required=True, readonly=True)
+    done_date = fields.Datetime(string='Processed On', readonly=True)
+    last_error = fields.Text(string='Last Error', readonly=True)
+
+    # Idempotency: a sale order has at most one pending event at any time
+    _sale_order_pending_uniq = models.UniqueIndex("(sale_order_id) WHERE state = 'pending'")
+    _pending_idx = models.Index("(next_attempt_date, id) WHERE state = 'pending'")
+
+    @api.model
+    def _is_sync_mode(self):
+        """Local/test mode: process events right away instead of waiting for the cron"""
+        return self.env.context.get('marketplace_outbox_sync') or str2bool(
+            self.env['ir.config_parameter'].sudo().get_param('website_sale_marketplace.outbox_sync', 'False')
+        )
+
+    @api.model
+    def _enqueue(self, sale_orders, payment_states=None):
+        """Record that ``sale_orders`` became paid
+
+        Only inserts rows, so it is cheap enough to be called from compute
+        methods. Orders that already have a pending event are skipped.
+        ``payment_states`` maps invoice ids to payment states not flushed yet,
+        for the synchronous processing of the events.
+        """
+        self.env.cr.execute("""
+            INSERT INTO marketplace_po_outbox
+                   (sale_order_id, state, attempt_count, next_attempt_date,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT so_id, 'pending', 0, now() AT TIME ZONE 'UTC',
+                   %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+              FROM unnest(%(so_ids)s::int[]) AS so_id
+            ON CONFLICT (sale_order_id) WHERE state = 'pending' DO NOTHING
+            RETURNING id
+        """, {'uid': self.env.uid, 'so_ids': sale_orders.ids})
+        events = self.browse([row[0] for row in self.env.cr.fetchall()])
+
+        if events and self._is_sync_mode():
+            events._process(payment_states)
+        elif events:
+            self.env.ref('website_sale_marketplace.ir_cron_marketplace_po_outbox')._trigger()
+        return events
+
+    @api.model
+    def _acquire_batch(self, limit):
+        """Lock a batch of due events, skipping the ones held by other workers"""
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT id
+              FROM marketplace_po_outbox
+             WHERE state = 'pending'
+               AND next_attempt_date <= now() AT TIME ZONE 'UTC'
+          ORDER BY next_attempt_date, id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [limit])
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _process(self, payment_states=None):
+        """Confirm the marketplace POs of the paid sale orders of these events
+
+        ``payment_states`` is given when processing from the payment state
+        computation, whose new values are only in cache.
+        """
+        events = self.filtered(lambda event: event.state == 'pending')
+        sale_orders = events.sale_order_id
+        try:
+            paid_orders = sale_orders._filter_marketplace_fully_paid(payment_states)
+            failures = paid_orders._auto_confirm_marketplace_pos()
+        except Exception as e:
+            _logger.exception('Marketplace PO outbox: batch of %s events failed', len(events))
+            events._schedule_retry(str(e))
+            return events
+
+        failed_events = events.filtered(lambda event: event.sale_order_id in failures)
+        for event in failed_events:
+            event._schedule_retry(str(failures[event.sale_order_id]))
+        (events - failed_events).write({
+            'state': 'done',
+            'done_date': fields.Datetime.now(),
+            'last_error': False,
+        })
+        return failed_events
+
+    def _schedule_retry(self, error):
+        """Reschedule events with an exponential backoff, or give up on them"""
+        now = fields.Datetime.now()
+        for event in self:
+            attempt_count = event.attempt_count + 1
+            if attempt_count >= MAX_ATTEMPTS:
+                _logger.error('Marketplace PO outbox: giving up on SO %s after %s attempts: %s',
+                              event.sale_order_id.name, attempt_count, error,
+                              extra={'marketplace_outbox_event': {
+                                  'id': event.id,
+                                  'sale_order': event.sale_order_id.name,
+                                  'attempt_count': attempt_count,
+                                  'error': error,
+                              }})
+                event.write({'state': 'failed', 'attempt_count': attempt_count, 'last_error': error})
+            else:
+                event.write({
+                    'attempt_count': attempt_count,
+                    'next_attempt_date': now + RETRY_BASE_DELAY * 2 ** (attempt_count - 1),
+                    'last_error': error,
+                })
+
+    @api.model
+    def _cron_process_outbox(self, batch_size=100, max_batches=50):
+        """Drain the outbox in batches
+
+        Events are locked with ``FOR UPDATE SKIP LOCKED``, so several workers
+        can run this method in parallel without processing an event twice.
+        Each batch is committed on its own.
+        """
+        for _i in range(max_batches):
+            events = self._acquire_batch(batch_size)
+            if not events:
+                break
+            events._process()
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+
+    def action_retry(self):
+        """Put failed events back in the queue"""
+        failed_events = self.filtered(lambda event: event.state == 'failed')
+        pending_orders = self.search([
+            ('state', '=', 'pending'),
+            ('sale_order_id', 'in', failed_events.sale_order_id.ids),
+        ]).sale_order_id
+        # Keep a single pending event per sale order
+        events_by_order = {}
+        for event in failed_events:
+            if event.sale_order_id not in pending_orders:
+                events_by_order.setdefault(event.sale_order_id, event)
+        self.browse([event.id for event in events_by_order.values()]).write({
+            'state': 'pending',
+            'attempt_count': 0,
+            'next_attempt_date': fields.Datetime.now(),
+        })
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import csv
+import io
+import itertools
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from odoo import api, fields, models
+from odoo.tools import split_every
+import logging
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Number of rows created/updated and committed together
+CHUNK_SIZE = 500
+# Seconds a cron run may spend on imports before handing over to the next run
+TIME_BUDGET = 240
+# Only the first errors are kept, to bound the size of the report
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_COLUMNS = ('default_code', 'name', 'list_price', 'category', 'description_sale')
+
+
+class MarketplaceProductImport(models.Model):
+    _name = 'marketplace.product.import'
+    _description = 'Marketplace Product Import'
+    _order = 'id desc'
+
+    vendor_id = fields.Many2one('res.partner', string='Vendor', required=True, index=True,
+                                ondelete='cascade', readonly=True)
+    user_id = fields.Many2one('res.users', string='Imported By', required=True, ondelete='cascade',
+                              readonly=True, default=lambda self: self.env.user)
+    file_name = fields.Char(string='File', readonly=True)
+    import_file = fields.Binary(string='Uploaded File', attachment=True, readonly=True,
+                                help='Dropped once the import is finished')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='State', default='pending', required=True, readonly=True)
+    row_count = fields.Integer(string='Processed Rows', readonly=True,
+                               help='Rows are processed in file order; the import resumes after this many rows')
+    created_count = fields.Integer(string='Created Products', readonly=True)
+    updated_count = fields.Integer(string='Updated Products', readonly=True)
+    error_count = fields.Integer(string='Errors', readonly=True)
+    error_report = fields.Text(string='Error Report', readonly=True)
+
+    def _get_progress(self):
+        self.ensure_one()
+        return {
+            'id': self.id,
+            'state': self.state,
+            'rows': self.row_count,
+            'created': self.created_count,
+            'updated': self.updated_count,
+            'errors': self.error_count,
+            'error_report': self.error_report or '',
+        }
+
+    @api.model
+    def _schedule(self, vendor, file_name, content):
+        """Store an uploaded file as a new import of ``vendor`` and queue it
+
+        The file is processed by a cron, so that uploads return at once
+        whatever the number of rows. It is stored as is in the attachment of
+        ``import_file``, without the base64 round trip of a field write.
+        """
+        product_import = self.create({
+            'vendor_id': vendor.id,
+            'file_name': file_name,
+        })
+        self.env['ir.attachment'].sudo().create({
+            'name': 'import_file',
+            'res_model': self._name,
+            'res_field': 'import_file',
+            'res_id': product_import.id,
+            'raw': content,
+        })
+        self.env.ref('website_sale_marketplace.ir_cron_marketplace_product_import').sudo()._trigger()
+        return product_import
+
+    @contextmanager
+    def _open_import_file(self):
+        """Open the uploaded file for reading, from the filestore when it is stored there"""
+        self.ensure_one()
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'import_file'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+        if attachment.store_fname:
+            content = io.open(attachment._full_path(attachment.store_fname), 'rb')
+        else:
+            content = io.BytesIO(attachment.raw or b'')
+        with content:
+            yield content
+
+    def _read_rows(self, content):
+        """Return an iterator of (row number, dict) pairs read from ``content``, the uploaded CSV or XLSX file"""
+        self.ensure_one()
+        if (self.file_name or '').lower().endswith('.xlsx'):
+            if not openpyxl:
+                raise ValueError("XLSX files are not supported on this server, please upload a CSV file")
+            workbook = openpyxl.load_workbook(content, read_only=True, data_only=True)
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(cell or '').strip() for cell in next(rows, ())]
+            rows = (dict(zip(header, ('' if value is None else str(value) for value in row))) for row in rows)
+        else:
+            text_stream = io.TextIOWrapper(content, encoding='utf-8-sig', newline='')
+            rows = csv.DictReader(text_stream)
+        # Header is row 1
+        return zip(itertools.count(2), rows)
+
+    def _run(self, time_budget=TIME_BUDGET):
+        """Import the uploaded files chunk by chunk, committing each chunk
+
+        Products are created and updated in the environment of the vendor
+        user, so through ``ProductTemplate.create``/``write`` and the vendor
+        record rules. The file is read as a stream and the ORM cache is
+        cleared between chunks, so memory does not depend on the file size. An
+        interrupted import restarts after its last committed chunk. Returns
+        True when all imports are finished.
+        """
+        deadline = time.monotonic() + time_budget
+        for product_import in self:
+            if product_import.state not in ('pending', 'running'):
+                continue
+            products_env = self.env(user=product_import.user_id.id)
+            try:
+                with product_import._open_import_file() as content:
+                    rows = itertools.islice(product_import._read_rows(content), product_import.row_count, None)
+                    for chunk in split_every(CHUNK_SIZE, rows):
+                        if time.monotonic() > deadline:
+                            return False
+                        created, updated, errors = product_import._import_chunk(chunk, products_env)
+                        product_import.write({
+                            'state': 'running',
+                            'row_count': product_import.row_count + len(chunk),
+                            'created_count': product_import.created_count + created,
+                            'updated_count': product_import.updated_count + updated,
+                            'error_count': product_import.error_count + len(errors),
+                            'error_report': product_import._append_errors(errors),
+                        })
+                        if not self.env.registry.in_test_mode():
+                            self.env.cr.commit()
+                        self.env.invalidate_all()
+            except Exception as e:
+                _logger.exception('Marketplace product import %s failed', product_import.id)
+                if not self.env.registry.in_test_mode():
+                    # Keep the chunks committed so far, drop the failed one
+                    self.env.cr.rollback()
+                product_import.write({
+                    'state': 'failed',
+                    'import_file': False,
+                    'error_report': product_import._append_errors([(0, str(e))]),
+                })
+            else:
+                product_import.write({'state': 'done', 'import_file': False})
+                _logger.info('Marketplace product import %s finished: %s rows processed',
+                             product_import.id, product_import.row_count)
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()
+        return True
+
+    @api.model
+    def _cron_process_imports(self):
+        imports = self.search([('state', 'in', ['pending', 'running'])], order='id')
+        if not imports._run():
+            # Out of time: continue in a new cron run
+            self.env.ref('website_sale_marketplace.ir_cron_marketplace_product_import')._trigger()
+
+    def _append_errors(self, errors):
+        """Return the error report extended with ``errors``, a list of (row number, message)"""
+        reported = (self.error_report or '').splitlines()
+        reported += [f'Row {row_number}: {message}' for row_number, message in errors]
+        return '\n'.join(reported[:MAX_REPORTED_ERRORS])
+
+    def _prepare_row_vals(self, row, categories):
+        """Validate an import row and convert it to product values"""
+        vals = {}
+        name = (row.get('name') or '').strip()
+        if name:
+            vals['name'] = name
+        if row.get('list_price') not in (None, ''):
+            try:
+                list_price = float(row['list_price'])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid sales price '{row['list_price']}'")
+            if list_price < 0:
+                raise ValueError("Sales price cannot be negative")
+            vals['list_price'] = list_price
+        category_name = (row.get('category') or '').strip()
+        if category_name:
+            if category_name not in categories:
+                raise ValueError(f"Unknown category '{category_name}'")
+            vals['categ_id'] = categories[category_name]
+        if row.get('description_sale'):
+            vals['description_sale'] = row['description_sale']
+        return vals
+
+    def _import_chunk(self, chunk, products_env):
+        """Create or update the products of a chunk of rows
+
+        Rows are matched to existing products of the vendor on their internal
+        reference. Products are created with a single ``create`` and updated
+        with one ``write`` per distinct values; on failure, the rows are
+        retried one by one to report the faulty ones. Returns (created count,
+        updated count, errors).
+        """
+        ProductTemplate = products_env['product.template']
+        errors = []
+
+        category_names = {(row.get('category') or '').strip() for _row_number, row in chunk} - {''}
+        categories = {
+            category.complete_name: category.id
+            for category in products_env['product.category'].search([('complete_name', 'in', list(category_names))])
+        }
+        codes = {(row.get('default_code') or '').strip() for _row_number, row in chunk} - {''}
+        existing = {
+            product.default_code: product
+            for product in ProductTemplate.search([
+                ('marketplace_commercial_vendor_id', '=', self.vendor_id.id),
+                ('default_code', 'in', list(codes)),
+            ])
+        }
+
+        to_create = []
+        to_update = []
+        for row_number, row in chunk:
+            try:
+                vals = self._prepare_row_vals(row, categories)
+            except ValueError as e:
+                errors.append((row_number, str(e)))
+                continue
+            code = (row.get('default_code') or '').strip()
+            if code in existing:
+                to_update.append((row_number, existing[code], vals))
+            elif not vals.get('name'):
+                errors.append((row_number, "Product name is required"))
+            else:
+                to_create.append((row_number, dict(vals, default_code=code or False)))
+
+        created = 0
+        if to_create:
+            try:
+                with self.env.cr.savepoint():
+                    ProductTemplate.create([vals for _row_number, vals in to_create])
+                created = len(to_create)
+            except Exception:
+                # Find the faulty rows one by one
+                for row_number, vals in to_create:
+                    try:
+                        with self.env.cr.savepoint():
+                            ProductTemplate.create([vals])
+                        created += 1
+                    except Exception as e:
+                        errors.append((row_number, str(e)))
+
+        # The rows of a product are merged in file order, then products getting the same values are written together
+        vals_by_product = {}
+        row_numbers_by_product = defaultdict(list)
+        for row_number, product, vals in to_update:
+            if vals:
+                vals_by_product[product] = dict(vals_by_product.get(product, {}), **vals)
+                row_numbers_by_product[product].append(row_number)
+        products_by_vals = defaultdict(list)
+        for product, vals in vals_by_product.items():
+            products_by_vals[tuple(sorted(vals.items()))].append(product)
+
+        updated = 0
+        for vals_items, products in products_by_vals.items():
+            vals = dict(vals_items)
+            try:
+                with self.env.cr.savepoint():
+                    ProductTemplate.union(*products).write(vals)
+                updated += sum(len(row_numbers_by_product[product]) for product in products)
+            except Exception:
+                # Find the faulty products one by one
+                for product in products:
+                    try:
+                        with self.env.cr.savepoint():
+                            product.write(vals)
+                        updated += len(row_numbers_by_product[product])
+                    except Exception as e:
+                        errors += [(row_number, str(e)) for row_number in row_numbers_by_product[product]]
+
+        return created, updated, errors
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import time
+
+from odoo import api, fields, models
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Number of products repriced and committed together
+CHUNK_SIZE = 1000
+# Seconds a cron run may spend on jobs before handing over to the next run
+TIME_BUDGET = 240
+
+
+class MarketplaceRepriceJob(models.Model):
+    _name = 'marketplace.reprice.job'
+    _description = 'Marketplace Repricing Job'
+    _order = 'id desc'
+
+    name = fields.Char(string='Name', compute='_compute_name')
+    categ_id = fields.Many2one('product.category', string='Category', ondelete='cascade', readonly=True)
+    vendor_id = fields.Many2one('res.partner', string='Vendor', ondelete='cascade', readonly=True)
+    dry_run = fields.Boolean(string='Preview Only', readonly=True,
+                             help='Compute the impact of the repricing without changing any product')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('cancel', 'Cancelled'),
+    ], string='State', default='pending', required=True, readonly=True)
+    last_product_id = fields.Integer(string='Last Processed Product', readonly=True,
+                                     help='Products are processed by increasing id; the job resumes after this one')
+    processed_count = fields.Integer(string='Processed Products', readonly=True)
+    changed_count = fields.Integer(string='Products with New Cost', readonly=True)
+    margin_delta = fields.Float(string='Total Margin Change', readonly=True,
+                                help='Sum over products of (new margin - current margin)')
+    avg_margin_delta = fields.Float(string='Average Margin Change', compute='_compute_avg_margin_delta')
+    date_done = fields.Datetime(string='Finished On', readonly=True)
+
+    @api.depends('categ_id', 'vendor_id', 'dry_run')
+    def _compute_name(self):
+        for job in self:
+            target = job.categ_id.display_name or job.vendor_id.display_name or ''
+            job.name = f"{'Preview' if job.dry_run else 'Repricing'}: {target}"
+
+    @api.depends('margin_delta', 'changed_count')
+    def _compute_avg_margin_delta(self):
+        for job in self:
+            job.avg_margin_delta = job.margin_delta / job.changed_count if job.changed_count else 0.0
+
+    @api.model
+    def _schedule(self, categories=None, vendors=None, dry_run=False):
+        """Create repricing jobs after a markup change of ``categories`` or ``vendors``
+
+        Unfinished jobs on the same targets are superseded by the new ones.
+        """
+        categories = categories or self.env['product.category']
+        vendors = vendors or self.env['res.partner']
+        if not dry_run:
+            self.search([
+                ('dry_run', '=', False),
+                ('state', 'in', ['pending', 'running']),
+                '|', ('categ_id', 'in', categories.ids), ('vendor_id', 'in', vendors.ids),
+            ]).state = 'cancel'
+        jobs = self.create(
+            [{'categ_id': category.id, 'dry_run': dry_run} for category in categories]
+            + [{'vendor_id': vendor.id, 'dry_run': dry_run} for vendor in vendors]
+        )
+        if jobs:
+            self.env.ref('website_sale_marketplace.ir_cron_marketplace_reprice').sudo()._trigger()
+        return jobs
+
+    def _get_product_domain(self):
+        """Domain of the marketplace products whose cost depends on the job target"""
+        self.ensure_one()
+        Category = self.env['product.category'].sudo()
+        if self.categ_id:
+            # Subcategories with their own markup do not inherit this one
+            overriding_categories = Category.search([
+                ('id', 'child_of', self.categ_id.id),
+                ('id', '!=', self.categ_id.id),
+                ('marketplace_markup', '!=', 0),
+            ])
+            return [
+                ('marketplace_vendor_id', '!=', False),
+                ('categ_id', 'child_of', self.categ_id.id),
+                '!', ('categ_id', 'child_of', overriding_categories.ids),
+            ]
+        # Category markup, including inherited ones, takes precedence over vendor markup
+        marked_up_categories = Category.search([('marketplace_markup', '!=', 0)])
+        return [
+            ('marketplace_vendor_id', '=', self.vendor_id.id),
+            '!', ('categ_id', 'child_of', marked_up_categories.ids),
+        ]
+
+    def _process_chunk(self):
+        """Reprice the next chunk of products; return False once the job is finished"""
+        self.ensure_one()
+        products = self.env['product.template'].sudo().with_context(active_test=False).search(
+            self._get_product_domain() + [('id', '>', self.last_product_id)],
+            order='id', limit=CHUNK_SIZE,
+        )
+        if not products:
+            self.write({'state': 'done', 'date_done': fields.Datetime.now()})
+            return False
+
+        cost_by_product_id = products._get_marketplace_costs()
+        changed_count = 0
+        margin_delta = 0.0
+        for product in products:
+            new_cost = cost_by_product_id.get(product.id)
+            if new_cost is not None and new_cost != product.standard_price:
+                changed_count += 1
+                # margin = list_price - cost
+                margin_delta += product.standard_price - new_cost
+        if not self.dry_run:
+            products._recompute_marketplace_costs()
+
+        self.write({
+            'state': 'running',
+            'last_product_id': products[-1].id,
+            'processed_count': self.processed_count + len(products),
+            'changed_count': self.changed_count + changed_count,
+            'margin_delta': self.margin_delta + margin_delta,
+        })
+        return True
+
+    def _run(self, time_budget=TIME_BUDGET):
+        """Process jobs chunk by chunk, committing each chunk
+
+        An interrupted job restarts after its last committed chunk. Returns
+        True when all jobs are finished.
+        """
+        deadline = time.monotonic() + time_budget
+        for job in self:
+            while job.state in ('pending', 'running'):
+                if time.monotonic() > deadline:
+                    return False
+                job._process_chunk()
+                if not self.env.registry.in_test_mode():
+                    self.env.cr.commit()
+                # Keep memory bounded whatever the size of the catalog
+                self.env.invalidate_all()
+            _logger.info('%s finished: %s products processed, %s with a new cost',
+                         job.name, job.processed_count, job.changed_count)
+        return True
+
+    @api.model
+    def _cron_process_jobs(self):
+        jobs = self.search([('state', 'in', ['pending', 'running'])], order='id')
+        if not jobs._run():
+            # Out of time: continue in a new cron run
+            self.env.ref('website_sale_marketplace.ir_cron_marketplace_reprice')._trigger()
+
+    def action_apply(self):
+        """Turn a finished preview into an actual repricing job"""
+        previews = self.filtered('dry_run')
+        return self._schedule(categories=previews.categ_id, vendors=previews.vendor_id)
+
+    def action_cancel(self):
+        self.filtered(lambda job: job.state in ('pending', 'running')).state = 'cancel'
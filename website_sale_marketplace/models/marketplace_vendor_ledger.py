@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo import api, fields, models
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Sales and cost of confirmed marketplace PO lines, in the month of the PO confirmation.
+# Sales are converted from the currency of the sale order to the one of the PO at the
+# confirmation date, with the rates relative to the PO company as res.currency reads them.
+ORDERED_MOVEMENTS_QUERY = """
+    SELECT po.partner_id AS vendor_id, po.company_id, po.currency_id,
+           date_trunc('month', po.date_approve)::date AS period,
+           CASE WHEN sol.id IS NULL THEN 0
+                WHEN so.currency_id = po.currency_id THEN sol.price_subtotal
+                ELSE sol.price_subtotal * po_rate.rate / so_rate.rate
+           END AS sales_amount,
+           pol.price_subtotal AS cost_amount,
+           0 AS payout_due_amount, 0 AS paid_out_amount
+      FROM purchase_order_line pol
+      JOIN purchase_order po ON po.id = pol.order_id
+ LEFT JOIN sale_order_line sol ON sol.id = pol.sale_line_id
+ LEFT JOIN sale_order so ON so.id = sol.order_id
+ LEFT JOIN LATERAL (
+        SELECT COALESCE((SELECT r.rate FROM res_currency_rate r
+                          WHERE r.currency_id = po.currency_id AND r.name <= po.date_approve::date
+                            AND (r.company_id IS NULL OR r.company_id = po.company_id)
+                       ORDER BY r.company_id, r.name DESC LIMIT 1), 1.0) AS rate
+      ) po_rate ON TRUE
+ LEFT JOIN LATERAL (
+        SELECT COALESCE((SELECT r.rate FROM res_currency_rate r
+                          WHERE r.currency_id = so.currency_id AND r.name <= po.date_approve::date
+                            AND (r.company_id IS NULL OR r.company_id = po.company_id)
+                       ORDER BY r.company_id, r.name DESC LIMIT 1), 1.0) AS rate
+      ) so_rate ON TRUE
+     WHERE pol.is_marketplace_dropship
+       AND {where}
+"""
+# Cost owed to the vendor once the customer paid, in the month it became due
+PAYOUT_DUE_MOVEMENTS_QUERY = """
+    SELECT po.partner_id AS vendor_id, po.company_id, po.currency_id,
+           date_trunc('month', GREATEST(po.date_approve, so.marketplace_paid_date))::date AS period,
+           0 AS sales_amount, 0 AS cost_amount,
+           pol.price_subtotal AS payout_due_amount, 0 AS paid_out_amount
+      FROM purchase_order_line pol
+      JOIN purchase_order po ON po.id = pol.order_id
+      JOIN sale_order_line sol ON sol.id = pol.sale_line_id
+      JOIN sale_order so ON so.id = sol.order_id
+     WHERE pol.is_marketplace_dropship
+       AND so.marketplace_paid_date IS NOT NULL
+       AND {where}
+"""
+# Paid vendor bills of marketplace PO lines, in the month of the bill
+PAID_OUT_MOVEMENTS_QUERY = """
+    SELECT po.partner_id AS vendor_id, am.company_id, am.currency_id,
+           date_trunc('month', am.invoice_date)::date AS period,
+           0 AS sales_amount, 0 AS cost_amount,
+           0 AS payout_due_amount, aml.price_subtotal AS paid_out_amount
+      FROM account_move_line aml
+      JOIN account_move am ON am.id = aml.move_id
+      JOIN purchase_order_line pol ON pol.id = aml.purchase_line_id
+      JOIN purchase_order po ON po.id = pol.order_id
+     WHERE pol.is_marketplace_dropship
+       AND am.move_type = 'in_invoice'
+       AND {where}
+"""
+
+
+class MarketplaceVendorLedger(models.Model):
+    _name = 'marketplace.vendor.ledger'
+    _description = 'Marketplace Vendor Ledger'
+    _order = 'period desc, vendor_id'
+    _rec_name = 'vendor_id'
+
+    vendor_id = fields.Many2one('res.partner', string='Vendor', required=True, readonly=True, ondelete='cascade')
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', required=True, readonly=True)
+    period = fields.Date(string='Month', required=True, readonly=True)
+    sales_amount = fields.Monetary(string='Sales', readonly=True,
+                                   help='Untaxed customer price of the products ordered from the vendor')
+    cost_amount = fields.Monetary(string='Cost', readonly=True,
+                                  help='Untaxed amount of the confirmed purchase orders of the vendor')
+    margin_amount = fields.Monetary(string='Margin', readonly=True,
+                                    help='Sales minus cost, i.e. the marketplace markup')
+    payout_due_amount = fields.Monetary(string='Payout Due', readonly=True,
+                                        help='Cost of the orders paid by the customers, owed to the vendor')
+    paid_out_amount = fields.Monetary(string='Paid Out', readonly=True,
+                                      help='Amount of the paid vendor bills')
+    pending_payout_amount = fields.Monetary(string='Pending Payout', compute='_compute_pending_payout_amount',
+                                            help='Payout due minus paid out')
+    markup = fields.Float(string='Effective Markup', compute='_compute_markup',
+                          help='Margin over cost, to compare with the markup of the vendor')
+
+    _vendor_period_uniq = models.Constraint(
+        'UNIQUE(vendor_id, company_id, currency_id, period)',
+        'The ledger has a single line per vendor, company, currency and month.',
+    )
+
+    @api.depends('payout_due_amount', 'paid_out_amount')
+    def _compute_pending_payout_amount(self):
+        for line in self:
+            line.pending_payout_amount = line.payout_due_amount - line.paid_out_amount
+
+    @api.depends('margin_amount', 'cost_amount')
+    def _compute_markup(self):
+        for line in self:
+            line.markup = line.margin_amount / line.cost_amount if line.cost_amount else 0.0
+
+    @api.model
+    def _flush_movement_fields(self):
+        """Flush the fields read by the movement queries
+
+        Only these fields are flushed, as movements are recorded while the
+        payment state of invoices is being computed.
+        """
+        self.env['purchase.order'].flush_model(['partner_id', 'company_id', 'currency_id', 'date_approve', 'state'])
+        self.env['purchase.order.line'].flush_model([
+            'order_id', 'sale_line_id', 'is_marketplace_dropship', 'price_subtotal',
+        ])
+        self.env['sale.order.line'].flush_model(['order_id', 'price_subtotal'])
+        self.env['sale.order'].flush_model(['currency_id'])
+        self.env['res.currency.rate'].flush_model(['currency_id', 'company_id', 'name', 'rate'])
+        self.env['account.move'].flush_model(['company_id', 'currency_id', 'invoice_date', 'move_type', 'state'])
+        self.env['account.move.line'].flush_model(['move_id', 'purchase_line_id', 'price_subtotal'])
+
+    @api.model
+    def _record_movements(self, queries, where, params, sign=1):
+        """Add the movements selected by ``queries`` and the ``where`` clause to the ledger
+
+        Movements are summed per vendor, company, currency and month in SQL and
+        added to the ledger lines with a single upsert, so the cost does not
+        depend on the size of the ledger.
+        """
+        self._flush_movement_fields()
+        movements = ' UNION ALL '.join(query.format(where=where) for query in queries)
+        self.env.cr.execute(f"""
+            INSERT INTO marketplace_vendor_ledger
+                   (vendor_id, company_id, currency_id, period, sales_amount, cost_amount, margin_amount,
+                    payout_due_amount, paid_out_amount, create_uid, create_date, write_uid, write_date)
+            SELECT vendor_id, company_id, currency_id, period,
+                   %(sign)s * SUM(sales_amount), %(sign)s * SUM(cost_amount),
+                   %(sign)s * SUM(sales_amount - cost_amount),
+                   %(sign)s * SUM(payout_due_amount), %(sign)s * SUM(paid_out_amount),
+                   %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+              FROM ({movements}) AS movements
+          GROUP BY vendor_id, company_id, currency_id, period
+            ON CONFLICT (vendor_id, company_id, currency_id, period) DO UPDATE
+               SET sales_amount = marketplace_vendor_ledger.sales_amount + EXCLUDED.sales_amount,
+                   cost_amount = marketplace_vendor_ledger.cost_amount + EXCLUDED.cost_amount,
+                   margin_amount = marketplace_vendor_ledger.margin_amount + EXCLUDED.margin_amount,
+                   payout_due_amount = marketplace_vendor_ledger.payout_due_amount + EXCLUDED.payout_due_amount,
+                   paid_out_amount = marketplace_vendor_ledger.paid_out_amount + EXCLUDED.paid_out_amount,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, dict(params, sign=sign, uid=self.env.uid))
+        self.invalidate_model()
+
+    @api.model
+    def _record_purchase_orders(self, purchase_orders, sign=1):
+        """Record the confirmation (or with ``sign=-1`` the cancellation) of confirmed marketplace POs"""
+        if purchase_orders:
+            self._record_movements(
+                [ORDERED_MOVEMENTS_QUERY, PAYOUT_DUE_MOVEMENTS_QUERY], 'po.id = ANY(%(ids)s)',
+                {'ids': purchase_orders.ids}, sign=sign,
+            )
+
+    @api.model
+    def _record_paid_sale_orders(self, sale_orders):
+        """Mark ``sale_orders`` as paid and record the payout due for their confirmed marketplace POs
+
+        Orders already marked as paid are skipped, so that a payment is
+        recorded once however many times the invoices are reconciled.
+        """
+        if not sale_orders:
+            return
+        self.env.cr.execute("""
+            UPDATE sale_order
+               SET marketplace_paid_date = now() AT TIME ZONE 'UTC'
+             WHERE id = ANY(%s)
+               AND marketplace_paid_date IS NULL
+         RETURNING id
+        """, [sale_orders.ids])
+        paid_ids = [row[0] for row in self.env.cr.fetchall()]
+        sale_orders.invalidate_recordset(['marketplace_paid_date'])
+        if paid_ids:
+            self._record_movements(
+                [PAYOUT_DUE_MOVEMENTS_QUERY], "so.id = ANY(%(ids)s) AND po.state IN ('purchase', 'done')",
+                {'ids': paid_ids},
+            )
+
+    @api.model
+    def _record_paid_bills(self, bills):
+        """Record the payout of newly paid vendor bills"""
+        if bills:
+            self._record_movements([PAID_OUT_MOVEMENTS_QUERY], 'am.id = ANY(%(ids)s)', {'ids': bills.ids})
+
+    @api.model
+    def _rebuild(self):
+        """Recompute the whole ledger from the purchase orders, sale orders and vendor bills
+
+        Used to reconcile the ledger, e.g. after vendor bill payments were
+        cancelled. Sale orders stay paid as of their ``marketplace_paid_date``.
+        """
+        self.env.flush_all()
+        self.env.cr.execute('DELETE FROM marketplace_vendor_ledger')
+        self._record_movements(
+            [ORDERED_MOVEMENTS_QUERY, PAYOUT_DUE_MOVEMENTS_QUERY], "po.state IN ('purchase', 'done')", {},
+        )
+        self._record_movements([PAID_OUT_MOVEMENTS_QUERY], "am.state = 'posted' AND am.payment_state = 'paid'", {})
+        self.env.cr.execute('SELECT COUNT(*) FROM marketplace_vendor_ledger')
+        _logger.info('Rebuilt the marketplace vendor ledger: %s lines', self.env.cr.fetchone()[0])
+
+    @api.model
+    def _get_vendor_totals(self, vendors, date_from=None):
+        """Return a dict {vendor: {field: total}} of the ledger amounts of ``vendors``
+
+        Only the ledger of the companies of the environment is read, and its
+        amounts are converted to the currency of the current company at today's
+        rate. Reads one ledger line per vendor, company, currency and month,
+        whatever the number of orders.
+        """
+        domain = [('vendor_id', 'in', vendors.ids), ('company_id', 'in', self.env.companies.ids)]
+        if date_from:
+            domain.append(('period', '>=', date_from))
+        aggregates = ['sales_amount:sum', 'cost_amount:sum', 'margin_amount:sum',
+                      'payout_due_amount:sum', 'paid_out_amount:sum']
+        company = self.env.company
+        today = fields.Date.context_today(self)
+        totals = {}
+        for vendor, line_company, currency, *amounts in self.sudo()._read_group(
+            domain, ['vendor_id', 'company_id', 'currency_id'], aggregates,
+        ):
+            vendor_totals = totals.setdefault(vendor, dict.fromkeys(
+                (aggregate.split(':')[0] for aggregate in aggregates), 0.0,
+            ))
+            for aggregate, amount in zip(aggregates, amounts):
+                vendor_totals[aggregate.split(':')[0]] += currency._convert(
+                    amount, company.currency_id, line_company, today,
+                )
+        return totals
+
+    def action_rebuild(self):
+        self._rebuild()
+        return {'type': 'ir.actions.client', 'tag': 'soft_reload'}
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from datetime import timedelta
+
+from odoo import api, fields, models
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Minimum delay between two digests of a vendor, per cadence
+DIGEST_INTERVALS = {
+    'hourly': timedelta(hours=1),
+    'daily': timedelta(days=1),
+}
+# Sent notifications are kept for this many days
+RETENTION_DAYS = 30
+
+
+class MarketplaceVendorNotification(models.Model):
+    _name = 'marketplace.vendor.notification'
+    _description = 'Marketplace Vendor Order Notification'
+    _order = 'id desc'
+
+    vendor_id = fields.Many2one('res.partner', string='Vendor', required=True, ondelete='cascade', readonly=True)
+    purchase_order_id = fields.Many2one('purchase.order', string='Purchase Order', required=True,
+                                        ondelete='cascade', readonly=True)
+    digest_date = fields.Datetime(string='Sent in Digest On', readonly=True)
+
+    _vendor_pending_idx = models.Index('(vendor_id, id) WHERE digest_date IS NULL')
+
+    @api.model
+    def _enqueue(self, purchase_orders):
+        """Queue a new order notification for each of ``purchase_orders``"""
+        return self.create([{
+            'vendor_id': order.partner_id.id,
+            'purchase_order_id': order.id,
+        } for order in purchase_orders])
+
+    @api.model
+    def _get_due_vendors(self, vendors):
+        """Return the vendors among ``vendors`` whose digest interval is over"""
+        now = fields.Datetime.now()
+        return vendors.filtered(lambda vendor: (
+            not vendor.marketplace_digest_date
+            or vendor.marketplace_digest_date + DIGEST_INTERVALS.get(vendor.marketplace_digest_cadence, timedelta())
+            <= now
+        ))
+
+    def _prepare_digest_mail_values(self, vendor):
+        """Return the values of the digest mail to ``vendor`` for the notifications in self"""
+        purchase_orders = self.purchase_order_id.sorted('id')
+        company = purchase_orders.company_id[:1] or self.env.company
+        body = self.env['ir.qweb']._render('website_sale_marketplace.vendor_order_digest', {
+            'vendor': vendor,
+            'company': company,
+            'purchase_orders': purchase_orders,
+        })
+        return {
+            'subject': f'New marketplace orders ({len(purchase_orders)})',
+            'body_html': body,
+            'email_from': company.email_formatted or self.env['ir.mail_server']._get_default_from_address(),
+            'recipient_ids': [(4, vendor.id)],
+            'model': 'res.partner',
+            'res_id': vendor.id,
+            'auto_delete': True,
+        }
+
+    @api.model
+    def _cron_send_digests(self):
+        """Send one digest per due vendor with all its pending notifications
+
+        Digest mails of all vendors are created with a single create and left
+        to the mail queue.
+        """
+        pending = self.search([('digest_date', '=', False)])
+        if not pending:
+            return
+        notifications_by_vendor = pending.grouped('vendor_id')
+        due_vendors = self._get_due_vendors(self.env['res.partner'].union(*notifications_by_vendor))
+        if not due_vendors:
+            return
+
+        with self.env['marketplace.metric']._instrument('vendor.send_digests', len(due_vendors)):
+            mail_values = []
+            for vendor in due_vendors:
+                if not vendor.email:
+                    # Left pending until the vendor has an email
+                    _logger.warning('Marketplace vendor %s has no email, skipping its order digest', vendor.name)
+                    due_vendors -= vendor
+                    continue
+                values = notifications_by_vendor[vendor]._prepare_digest_mail_values(vendor)
+                if not values['email_from']:
+                    # Left pending until a sender address is configured
+                    _logger.warning('No sender address for the order digest of marketplace vendor %s', vendor.name)
+                    due_vendors -= vendor
+                    continue
+                mail_values.append(values)
+            self.env['mail.mail'].sudo().create(mail_values)
+
+            now = fields.Datetime.now()
+            self.union(*(notifications_by_vendor[vendor] for vendor in due_vendors)).write({'digest_date': now})
+            due_vendors.write({'marketplace_digest_date': now})
+        _logger.info('Sent marketplace order digests to %s vendors', len(mail_values))
+
+    @api.autovacuum
+    def _gc_sent_notifications(self):
+        self.search([
+            ('digest_date', '!=', False),
+            ('digest_date', '<', fields.Datetime.now() - timedelta(days=RETENTION_DAYS)),
+        ]).unlink()
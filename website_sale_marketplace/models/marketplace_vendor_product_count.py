@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from collections import Counter, defaultdict
+
+from odoo import api, fields, models
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Counted fields, and the res.partner fields reporting their total per vendor
+COUNT_FIELDS = {
+    'product_count': 'marketplace_product_count',
+    'draft_count': 'marketplace_product_draft_count',
+    'approval_count': 'marketplace_product_approval_count',
+    'approved_count': 'marketplace_product_approved_count',
+    'published_count': 'marketplace_product_published_count',
+}
+
+
+class MarketplaceVendorProductCount(models.Model):
+    _name = 'marketplace.vendor.product.count'
+    _description = 'Marketplace Vendor Product Count Change'
+    _log_access = False
+
+    vendor_id = fields.Many2one('res.partner', string='Vendor', required=True, index=True, ondelete='cascade')
+    product_count = fields.Integer(string='Products')
+    draft_count = fields.Integer(string='Draft Products')
+    approval_count = fields.Integer(string='Products Pending Approval')
+    approved_count = fields.Integer(string='Approved Products')
+    published_count = fields.Integer(string='Published Products')
+
+    @api.model
+    def _record(self, before, after):
+        """Record the change of the product counts of the vendors from ``before`` to ``after``
+
+        ``before`` and ``after`` are Counters of (vendor id, marketplace state,
+        published) of active products. Changes are appended as new rows
+        instead of updating a row per vendor, so that concurrent imports and
+        feeds of a vendor never wait on each other's row lock.
+        """
+        deltas = defaultdict(Counter)
+        for keys, sign in ((before, -1), (after, 1)):
+            for (vendor_id, state, is_published), count in keys.items():
+                delta = deltas[vendor_id]
+                delta['product_count'] += sign * count
+                if f'{state}_count' in COUNT_FIELDS:
+                    delta[f'{state}_count'] += sign * count
+                if is_published:
+                    delta['published_count'] += sign * count
+        vendor_ids = [vendor_id for vendor_id, delta in deltas.items() if any(delta.values())]
+        if not vendor_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO marketplace_vendor_product_count
+                   (vendor_id, product_count, draft_count, approval_count, approved_count, published_count)
+            SELECT * FROM unnest(%(vendor_ids)s::int[], %(product_count)s::int[], %(draft_count)s::int[],
+                                 %(approval_count)s::int[], %(approved_count)s::int[], %(published_count)s::int[])
+        """, dict(
+            {fname: [deltas[vendor_id][fname] for vendor_id in vendor_ids] for fname in COUNT_FIELDS},
+            vendor_ids=vendor_ids,
+        ))
+        self.invalidate_model()
+        self.env['res.partner'].invalidate_model(list(COUNT_FIELDS.values()))
+
+    @api.model
+    def _get_counts(self, vendors):
+        """Return a dict {vendor id: {field: count}} of the product counts of ``vendors``"""
+        aggregates = [f'{fname}:sum' for fname in COUNT_FIELDS]
+        return {
+            vendor.id: dict(zip(COUNT_FIELDS, counts))
+            for vendor, *counts in self.sudo()._read_group(
+                [('vendor_id', 'in', vendors.ids)], ['vendor_id'], aggregates,
+            )
+        }
+
+    @api.autovacuum
+    def _gc_compact_counts(self):
+        """Sum the changes of each vendor into a single row, so reads stay cheap
+
+        Changes appended while compacting are not deleted, and are added up
+        by the next run.
+        """
+        self.env.cr.execute("""
+            WITH compacted AS (
+                DELETE FROM marketplace_vendor_product_count
+                 WHERE vendor_id IN (
+                        SELECT vendor_id
+                          FROM marketplace_vendor_product_count
+                      GROUP BY vendor_id
+                        HAVING COUNT(*) > 1
+                 )
+             RETURNING *
+            )
+            INSERT INTO marketplace_vendor_product_count
+                   (vendor_id, product_count, draft_count, approval_count, approved_count, published_count)
+            SELECT vendor_id, SUM(product_count), SUM(draft_count), SUM(approval_count),
+                   SUM(approved_count), SUM(published_count)
+              FROM compacted
+          GROUP BY vendor_id
+        """)
+        _logger.info('Compacted the marketplace product counts of %s vendors', self.env.cr.rowcount)
+        self.invalidate_model()
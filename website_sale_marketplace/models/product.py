@@ -1,15 +1,30 @@
 # -*- coding: utf-8 -*-
 # Copyright 2024 ERPGAP/PROMPTEQUATION LDA
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+
+from markupsafe import Markup
+
 from odoo import api, fields, models
 from odoo.exceptions import ValidationError
-from odoo.tools import float_round
+from odoo.tools import float_round, ormcache
+
+# Number of product names listed in a compact tracking note
+COMPACT_TRACKING_MAX_NAMES = 50
+# Fields whose changes update the product counts of the vendors
+MARKETPLACE_COUNTED_FIELDS = {'marketplace_vendor_id', 'marketplace_state', 'is_published', 'active'}
 
 
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
 
     marketplace_vendor_id = fields.Many2one('res.partner', string='Marketplace Vendor')
+    # Vendor company, the partner portal users act for (see res.users.marketplace_vendor_id):
+    # record rules compare it with a single indexed equality
+    marketplace_commercial_vendor_id = fields.Many2one(
+        'res.partner', string='Marketplace Vendor Company', compute='_compute_marketplace_commercial_vendor_id',
+        store=True, index=True)
     marketplace_state = fields.Selection([
         ('draft', 'Draft'),
         ('approval', 'Pending Approval'),
@@ -23,27 +38,139 @@ class ProductTemplate(models.Model):
         sanitize_form=False
     )
 
+    _marketplace_vendor_state_idx = models.Index('(marketplace_vendor_id, marketplace_state)')
+    # Marketplace products are a small part of the catalog: backend lists filter them by state
+    _marketplace_state_idx = models.Index('(marketplace_state) WHERE marketplace_vendor_id IS NOT NULL')
+
+    @api.depends('marketplace_vendor_id.commercial_partner_id')
+    def _compute_marketplace_commercial_vendor_id(self):
+        for product in self:
+            product.marketplace_commercial_vendor_id = product.marketplace_vendor_id.commercial_partner_id
+
     @api.model
     def _get_vendor_partner(self):
-        """Get the vendor partner for the current user"""
-        user = self.env.user
+        """Get the vendor partner for the current user (empty unless portal user)"""
+        return self.env.user.marketplace_vendor_id
+
+    def _get_marketplace_markup(self, vendor_partner):
+        """Get marketplace markup for product, checking category first then vendor"""
+        return self._get_effective_marketplace_markup(self.categ_id.id, vendor_partner.id)
+
+    @api.model
+    @ormcache('categ_id', 'vendor_id')
+    def _get_effective_marketplace_markup(self, categ_id, vendor_id):
+        """Resolve the markup of a (category, vendor) pair
+
+        The nearest category up the hierarchy with a markup wins, then the
+        vendor's markup applies. Results are cached per process; the cache is
+        cleared, in all workers, whenever a markup or a category parent changes.
+        """
+        if categ_id:
+            category = self.env['product.category'].sudo().browse(categ_id)
+            ancestor_ids = [int(ancestor_id) for ancestor_id in category.parent_path.split('/') if ancestor_id]
+            for ancestor in reversed(category.browse(ancestor_ids)):
+                if ancestor.marketplace_markup:
+                    return ancestor.marketplace_markup
+        if vendor_id:
+            return self.env['res.partner'].sudo().browse(vendor_id).marketplace_markup or 0.0
+        return 0.0
+
+    @api.model
+    def _compute_marketplace_cost(self, sale_price, markup_percent):
+        """Return the vendor cost of a sale price: cost = sale_price / (1 + markup)"""
+        if markup_percent > 0:
+            return float_round(sale_price / (1 + markup_percent), precision_digits=2)
+        return sale_price
+
+    def _get_marketplace_costs(self):
+        """Return a dict {product id: vendor cost} for the marketplace products in self"""
+        # Compute costs in one pass over the prefetched products
+        return {
+            product.id: self._compute_marketplace_cost(
+                product.list_price or 0.0,
+                product._get_marketplace_markup(product.marketplace_vendor_id),
+            )
+            for product in self.filtered('marketplace_vendor_id')
+        }
+
+    def _write_marketplace_standard_price(self, cost_by_product_id):
+        """Write product costs with one write per distinct cost
 
-        # Portal users: return parent company if exists, otherwise themselves
-        if user._is_portal():
-            if user.partner_id.parent_id:
-                return user.partner_id.parent_id
+        The cost of single-variant templates is written on their variant
+        directly, as the template inverse would otherwise write variants one
+        template at a time.
+        """
+        template_ids_by_cost = defaultdict(list)
+        variant_ids_by_cost = defaultdict(list)
+        for product in self.browse(list(cost_by_product_id)):
+            cost_price = cost_by_product_id[product.id]
+            if len(product.product_variant_ids) == 1:
+                variant_ids_by_cost[cost_price].append(product.product_variant_ids.id)
             else:
-                return user.partner_id
+                template_ids_by_cost[cost_price].append(product.id)
+        for cost_price, variant_ids in variant_ids_by_cost.items():
+            self.env['product.product'].sudo().browse(variant_ids).write({'standard_price': cost_price})
+        for cost_price, template_ids in template_ids_by_cost.items():
+            self.browse(template_ids).write({'standard_price': cost_price})
+        if variant_ids_by_cost:
+            # Template costs are computed from their variant
+            self.invalidate_recordset(['standard_price'])
 
-        return None
+    def _recompute_marketplace_costs(self):
+        """Recompute cost and vendor price of marketplace products in batch
 
-    def _get_marketplace_markup(self, vendor_partner):
-        """Get marketplace markup for product, checking category first then vendor"""
-        # Check if category has marketplace_markup set
-        if self.categ_id and self.categ_id.marketplace_markup:
-            return self.categ_id.marketplace_markup
-        # Fall back to vendor's marketplace_markup
-        return vendor_partner.marketplace_markup or 0.0
+        Supplier infos are loaded with a single query, and products are grouped
+        by resulting cost so that each distinct value is written once. Products
+        whose cost did not change are not written at all.
+        """
+        products = self.sudo().filtered('marketplace_vendor_id')
+        if not products:
+            return
+
+        with self.env['marketplace.metric']._instrument('product.recompute_costs', len(products)):
+            cost_by_product_id = products._get_marketplace_costs()
+
+            # Update product cost, grouped by value
+            products._write_marketplace_standard_price({
+                product.id: cost_by_product_id[product.id]
+                for product in products
+                if product.standard_price != cost_by_product_id[product.id]
+            })
+
+            # Update the first supplierinfo of the vendor of each product, grouped by value
+            supplierinfos = self.env['product.supplierinfo'].sudo().search_fetch(
+                [('product_tmpl_id', 'in', products.ids)],
+                ['product_tmpl_id', 'partner_id', 'price'],
+            )
+            vendor_supplierinfo = {}
+            for supplierinfo in supplierinfos:
+                vendor_supplierinfo.setdefault(
+                    (supplierinfo.product_tmpl_id.id, supplierinfo.partner_id.id), supplierinfo,
+                )
+            supplierinfo_ids_by_price = defaultdict(list)
+            for product in products:
+                supplierinfo = vendor_supplierinfo.get((product.id, product.marketplace_vendor_id.id))
+                cost_price = cost_by_product_id[product.id]
+                if supplierinfo and supplierinfo.price != cost_price:
+                    supplierinfo_ids_by_price[cost_price].append(supplierinfo.id)
+            for cost_price, supplierinfo_ids in supplierinfo_ids_by_price.items():
+                supplierinfos.browse(supplierinfo_ids).write({'price': cost_price})
+
+    def _get_changed_fields(self, vals, fnames=None):
+        """Return the fields among ``fnames`` (default: all of ``vals``) whose value in
+        ``vals`` differs from the current value of the product"""
+        self.ensure_one()
+        changed_fields = set()
+        for fname in fnames or vals:
+            field = self._fields[fname]
+            if field.type in ('one2many', 'many2many'):
+                # Commands cannot be compared, consider them as changes
+                changed_fields.add(fname)
+                continue
+            new_value = field.convert_to_record(field.convert_to_cache(vals[fname], self), self)
+            if new_value != self[fname]:
+                changed_fields.add(fname)
+        return changed_fields
 
     def write(self, vals):
         """Recalculate cost when sales price changes and reset marketplace state on vendor changes"""
@@ -53,67 +180,76 @@ class ProductTemplate(models.Model):
             'categ_id', 'uom_id', 'uom_po_id', 'image_1920', 'website_description'
         }
 
-        # Check if vendor is editing their own product and changing significant fields
-        should_reset_state = False
-        if any(field in vals for field in vendor_editable_fields):
-            vendor_partner = self._get_vendor_partner()
-            if vendor_partner:
-                for product in self:
-                    # Reset state if vendor is editing their own marketplace product
-                    # and it's currently in 'approved' state
-                    if (product.marketplace_vendor_id == vendor_partner and
-                        product.marketplace_state == 'approved' and
-                        'marketplace_state' not in vals):  # Don't reset if state is being set explicitly
-                        should_reset_state = True
-                        break
-
-        # If state should be reset, add it to vals and unpublish the product
-        if should_reset_state and 'marketplace_state' not in vals:
-            vals['marketplace_state'] = 'draft'
-            # Unpublish the product since it needs re-approval
-            vals['is_published'] = False
-
         # Check if user is a portal vendor
         vendor_partner = self._get_vendor_partner()
         is_portal_vendor = bool(vendor_partner)
 
-        # Portal vendors need sudo to write products (same reason as create - stock module accesses routes)
+        # Only vendor edits are measured, backend writes are not a marketplace hot path
+        Metric = self.env['marketplace.metric']
+        instrument = nullcontext()
         if is_portal_vendor:
-            result = super(ProductTemplate, self.sudo()).write(vals)
-        else:
-            result = super().write(vals)
-
-        # Only recalculate if list_price changed
-        if 'list_price' in vals:
-            for product in self:
-                vendor_partner = product.marketplace_vendor_id
-                if vendor_partner:
-                    # Get marketplace markup (category first, then vendor)
-                    markup_percent = product._get_marketplace_markup(vendor_partner)
-                    sale_price = product.list_price or 0.0
-
-                    # Calculate new cost
-                    if markup_percent > 0:
-                        cost_price = float_round(
-                            sale_price / (1 + markup_percent),
-                            precision_digits=2
+            instrument = Metric._instrument('product.vendor_write', len(self))
+        with instrument:
+            products = self
+            products_to_reset = self.browse()
+            if is_portal_vendor and all(fname in self._fields for fname in vals):
+                # The vendor web client re-sends unchanged values: skip products for which nothing changes
+                with Metric._instrument('product.vendor_write_noop_skip') as stats:
+                    unchanged_products = self.filtered(lambda product: not product._get_changed_fields(vals))
+                    stats['records'] = len(unchanged_products)
+                if unchanged_products:
+                    products -= unchanged_products
+                    if not products:
+                        return True
+
+                # Reset state if vendor is editing their own marketplace product
+                # and it's currently in 'approved' state, and a significant field actually changes
+                significant_fields = vendor_editable_fields.intersection(vals)
+                # Don't reset if state is being set explicitly
+                if significant_fields and 'marketplace_state' not in vals:
+                    approved_products = products.filtered(lambda product: (
+                        product.marketplace_commercial_vendor_id == vendor_partner and
+                        product.marketplace_state == 'approved'
+                    ))
+                    # Approved products stay approved when no significant value actually changes
+                    with Metric._instrument('product.vendor_write_reset_avoided') as stats:
+                        products_to_reset = approved_products.filtered(
+                            lambda product: product._get_changed_fields(vals, significant_fields)
                         )
-                    else:
-                        cost_price = sale_price
+                        stats['records'] = len(approved_products - products_to_reset)
 
-                    # Update product cost (use sudo for portal users)
-                    if product.sudo().standard_price != cost_price:
-                        product.sudo().write({'standard_price': cost_price})
+            # Changes of the vendor product counts are recorded from the values before and after the write
+            count_keys = None
+            if products_to_reset or MARKETPLACE_COUNTED_FIELDS.intersection(vals):
+                count_keys = products._get_marketplace_count_keys()
 
-                    # Update supplierinfo price
-                    supplierinfo = self.env['product.supplierinfo'].sudo().search([
-                        ('product_tmpl_id', '=', product.id),
-                        ('partner_id', '=', vendor_partner.id)
-                    ], limit=1)
-                    if supplierinfo and supplierinfo.price != cost_price:
-                        supplierinfo.sudo().write({'price': cost_price})
+            # Portal vendors need sudo to write products (same reason as create - stock module accesses routes)
+            result = True
+            if products_to_reset:
+                # Unpublish the products since they need re-approval
+                with Metric._instrument('product.vendor_write_state_reset', len(products_to_reset)):
+                    result &= super(ProductTemplate, products_to_reset.sudo()).write(
+                        dict(vals, marketplace_state='draft', is_published=False)
+                    )
+            if products - products_to_reset:
+                if is_portal_vendor:
+                    result &= super(ProductTemplate, (products - products_to_reset).sudo()).write(vals)
+                else:
+                    result &= super(ProductTemplate, products - products_to_reset).write(vals)
 
-        return result
+            # Only recalculate if list_price changed
+            if 'list_price' in vals:
+                products._recompute_marketplace_costs()
+
+            if 'marketplace_vendor_id' in vals:
+                self.env['ir.attachment']._recompute_marketplace_vendor(products)
+
+            if count_keys is not None:
+                self.env['marketplace.vendor.product.count']._record(
+                    count_keys, products._get_marketplace_count_keys(),
+                )
+
+            return result
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -126,67 +262,101 @@ class ProductTemplate(models.Model):
             if not vals.get('marketplace_vendor_id') and vendor_partner:
                 vals['marketplace_vendor_id'] = vendor_partner.id
 
-        # Portal vendors need sudo to create products (stock module accesses routes in defaults)
-        if is_portal_vendor:
-            products = super(ProductTemplate, self.sudo()).create(vals_list)
-            # Setup dropshipping and supplierinfo
-            self.sudo()._setup_vendor_dropshipping(products, vendor_partner)
-        else:
+        if not is_portal_vendor:
             products = super().create(vals_list)
+        else:
+            # Portal vendors need sudo to create products (stock module accesses routes in defaults)
+            with self.env['marketplace.metric']._instrument('product.vendor_create', len(vals_list)):
+                products = super(ProductTemplate, self.sudo()).create(vals_list)
+                # Setup dropshipping and supplierinfo
+                self.sudo()._setup_vendor_dropshipping(products, vendor_partner)
 
+        self.env['marketplace.vendor.product.count']._record(Counter(), products._get_marketplace_count_keys())
         return products
 
+    def unlink(self):
+        count_keys = self._get_marketplace_count_keys()
+        result = super().unlink()
+        self.env['marketplace.vendor.product.count']._record(count_keys, Counter())
+        return result
+
+    def _get_marketplace_count_keys(self):
+        """Return a Counter of the (vendor id, marketplace state, published) of the active vendor products"""
+        return Counter(
+            (product.marketplace_vendor_id.id, product.marketplace_state, product.is_published)
+            for product in self.sudo()
+            if product.marketplace_vendor_id and product.active
+        )
+
     def _setup_vendor_dropshipping(self, products, vendor_partner):
-        """Setup dropshipping and supplier info for vendor products"""
-        # Get dropship route
+        """Setup dropshipping and supplier info for vendor products
+
+        Set-based: one route write for the batch, one cost write per distinct
+        cost and a single multi-create of supplier infos.
+        """
+        vendor_products = products.filtered(lambda product: product.marketplace_vendor_id == vendor_partner)
+        if not vendor_products:
+            return
+
+        # Set dropship route
         dropship_route = self.env.ref('stock_dropshipping.route_drop_shipping', raise_if_not_found=False)
+        if dropship_route:
+            vendor_products.write({'route_ids': [(4, dropship_route.id)]})
 
-        for product in products:
-            if product.marketplace_vendor_id == vendor_partner:
-                # Get marketplace markup (category first, then vendor)
-                markup_percent = product._get_marketplace_markup(vendor_partner)
-
-                # Calculate cost based on markup: cost = sale_price / (1 + markup/100)
-                sale_price = product.list_price or 0.0
-                if markup_percent > 0:
-                    cost_price = float_round(
-                        sale_price / (1 + markup_percent),
-                        precision_digits=2
-                    )
-                else:
-                    cost_price = sale_price
-
-                # Set dropship route and cost
-                update_vals = {'standard_price': cost_price}
-                if dropship_route:
-                    update_vals['route_ids'] = [(4, dropship_route.id)]
-                product.write(update_vals)
-
-                # Create supplierinfo record with calculated cost
-                self.env['product.supplierinfo'].create({
-                    'partner_id': vendor_partner.id,
-                    'product_tmpl_id': product.id,
-                    'min_qty': 1.0,
-                    'price': cost_price,
-                })
+        # Calculate cost based on markup (category first, then vendor): cost = sale_price / (1 + markup/100)
+        cost_by_product_id = vendor_products._get_marketplace_costs()
+        vendor_products._write_marketplace_standard_price(cost_by_product_id)
+
+        # Create supplierinfo records with calculated cost
+        self.env['product.supplierinfo'].create([{
+            'partner_id': vendor_partner.id,
+            'product_tmpl_id': product.id,
+            'min_qty': 1.0,
+            'price': cost_by_product_id[product.id],
+        } for product in vendor_products])
+
+    def _set_marketplace_state(self, state):
+        """Write the marketplace state of the products in self with a single write
+
+        With the ``marketplace_compact_tracking`` context key, product changes
+        are not tracked one by one; a single summary note is logged on each
+        vendor instead.
+        """
+        products = self.filtered(lambda product: product.marketplace_state != state)
+        if not products:
+            return products
+        with self.env['marketplace.metric']._instrument(f'product.set_state_{state}', len(products)):
+            if not self.env.context.get('marketplace_compact_tracking'):
+                products.write({'marketplace_state': state})
+                return products
+
+            products.with_context(mail_notrack=True).write({'marketplace_state': state})
+            state_label = dict(self._fields['marketplace_state'].selection)[state]
+            for vendor, vendor_products in products.grouped('marketplace_vendor_id').items():
+                names = vendor_products[:COMPACT_TRACKING_MAX_NAMES].mapped('display_name')
+                if len(vendor_products) > COMPACT_TRACKING_MAX_NAMES:
+                    names.append(f'... and {len(vendor_products) - COMPACT_TRACKING_MAX_NAMES} more')
+                vendor.sudo()._message_log(body=Markup('<p>%s</p><ul>%s</ul>') % (
+                    f'{len(vendor_products)} marketplace products set to {state_label}',
+                    Markup().join(Markup('<li>%s</li>') % name for name in names),
+                ))
+            return products
 
     def action_send_for_approval(self):
         """Send marketplace product for approval"""
-        for product in self:
-            if product.marketplace_vendor_id and product.marketplace_state == 'draft':
-                product.marketplace_state = 'approval'
+        self.filtered(lambda product: (
+            product.marketplace_vendor_id and product.marketplace_state == 'draft'
+        ))._set_marketplace_state('approval')
 
     def action_approve(self):
         """Approve marketplace product (backend users only)"""
-        for product in self:
-            if product.marketplace_vendor_id and product.marketplace_state == 'approval':
-                product.marketplace_state = 'approved'
+        self.filtered(lambda product: (
+            product.marketplace_vendor_id and product.marketplace_state == 'approval'
+        ))._set_marketplace_state('approved')
 
     def action_set_draft(self):
         """Set marketplace product back to draft"""
-        for product in self:
-            if product.marketplace_vendor_id:
-                product.marketplace_state = 'draft'
+        self.filtered('marketplace_vendor_id')._set_marketplace_state('draft')
 
     @api.constrains('is_published', 'marketplace_vendor_id', 'marketplace_state')
     def _check_marketplace_publish(self):
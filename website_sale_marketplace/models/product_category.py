@@ -13,5 +13,26 @@ class ProductCategory(models.Model):
         help="Markup percentage applied to vendor products in this category. "
              "Cost = Sale Price / (1 + Markup/100). "
              "Example: If markup is 5% and sale price is 100, cost will be 95.24. "
-             "If set, this overrides the vendor's default markup."
-    )
\ No newline at end of file
+             "If set, this overrides the vendor's default markup. "
+             "Subcategories without a markup inherit it."
+    )
+
+    def write(self, vals):
+        """Reprice vendor products in the background when the markup changes"""
+        result = super().write(vals)
+        # Markups are inherited, so moving a category may change its products' markup too
+        if 'marketplace_markup' in vals or 'parent_id' in vals:
+            # Cached markup resolutions may be stale in every worker
+            self.env.registry.clear_cache()
+            self.env['marketplace.reprice.job'].sudo()._schedule(categories=self)
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.env.registry.clear_cache()
+        return result
+
+    def action_preview_marketplace_repricing(self):
+        """Preview the impact of the current markup on the vendor products"""
+        jobs = self.env['marketplace.reprice.job'].sudo()._schedule(categories=self, dry_run=True)
+        return jobs._get_records_action(name='Repricing Preview')
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from datetime import timedelta
+
+from odoo import Command, api, fields, models
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class PurchaseOrder(models.Model):
+    _inherit = 'purchase.order'
+
+    marketplace_sale_order_ids = fields.Many2many(
+        'sale.order', 'sale_order_marketplace_purchase_rel', 'purchase_order_id', 'sale_order_id',
+        string='Marketplace Sale Orders', copy=False, readonly=True,
+        help='Sale orders whose marketplace dropship demand is purchased with this order'
+    )
+    has_marketplace_dropship = fields.Boolean(
+        string='Marketplace Dropship', compute='_compute_has_marketplace_dropship',
+        store=True, index=True,
+        help='This order contains marketplace vendor products shipped with the dropship route'
+    )
+
+    @api.depends('order_line.is_marketplace_dropship')
+    def _compute_has_marketplace_dropship(self):
+        for order in self:
+            order.has_marketplace_dropship = any(order.order_line.mapped('is_marketplace_dropship'))
+
+    def button_confirm(self):
+        """Notify digest vendors of their confirmed marketplace orders in their next digest
+
+        The state change of their orders is not tracked, so that each
+        confirmation does not email the vendor, and the orders are queued for
+        the digest instead. Pickings and moves created by the confirmation are
+        tracked as usual.
+        """
+        digest_orders = self.filtered(lambda order: (
+            order.has_marketplace_dropship
+            and order.state in ('draft', 'sent')
+            and order.partner_id.marketplace_digest_cadence != 'immediate'
+        ))
+        if not digest_orders:
+            return super().button_confirm()
+
+        result = True
+        if self - digest_orders:
+            result = super(PurchaseOrder, self - digest_orders).button_confirm()
+        super(PurchaseOrder, digest_orders.with_context(marketplace_digest_confirm=True)).button_confirm()
+        confirmed_orders = digest_orders.filtered(lambda order: order.state == 'purchase')
+        confirmed_orders._message_log_batch(
+            bodies={order.id: 'Order confirmed, the vendor is notified in its order digest'
+                    for order in confirmed_orders},
+        )
+        self.env['marketplace.vendor.notification'].sudo()._enqueue(confirmed_orders)
+        return result
+
+    def write(self, vals):
+        if 'state' in vals and self.env.context.get('marketplace_digest_confirm'):
+            # Only the state change of the confirmed orders is left untracked
+            return super(PurchaseOrder, self.with_context(mail_notrack=True)).write(vals)
+        return super().write(vals)
+
+    def button_approve(self, force=False):
+        """Record the confirmed marketplace POs in the vendor ledger"""
+        orders = self.filtered(lambda order: order.has_marketplace_dropship and order.state not in ('purchase', 'done'))
+        result = super().button_approve(force=force)
+        self.env['marketplace.vendor.ledger'].sudo()._record_purchase_orders(
+            orders.filtered(lambda order: order.state in ('purchase', 'done'))
+        )
+        return result
+
+    def button_cancel(self):
+        """Remove the cancelled marketplace POs from the vendor ledger"""
+        orders = self.filtered(lambda order: order.has_marketplace_dropship and order.state in ('purchase', 'done'))
+        result = super().button_cancel()
+        self.env['marketplace.vendor.ledger'].sudo()._record_purchase_orders(
+            orders.filtered(lambda order: order.state == 'cancel'), sign=-1,
+        )
+        return result
+
+    @api.model
+    def _get_marketplace_consolidation_domain(self):
+        return [
+            ('has_marketplace_dropship', '=', True),
+            ('state', '=', 'draft'),
+            ('partner_id.marketplace_po_consolidation', '=', True),
+        ]
+
+    def _merge_marketplace_dropship(self):
+        """Merge the draft POs in self sharing vendor, delivery address, company, currency and operation type
+
+        Lines are moved as they are, so each keeps its sale order line, and the
+        sale orders of the merged POs are linked to the remaining one. Returns
+        the remaining POs.
+        """
+        remaining_orders = self.browse()
+        for orders in self.grouped(lambda order: (
+            order.partner_id, order.dest_address_id, order.company_id, order.currency_id, order.picking_type_id,
+        )).values():
+            target = orders.sorted('id')[0]
+            merged_orders = orders - target
+            if merged_orders:
+                target.write({
+                    'origin': ', '.join(dict.fromkeys(origin for origin in orders.mapped('origin') if origin)),
+                    'marketplace_sale_order_ids': [
+                        Command.link(sale_order.id) for sale_order in merged_orders.marketplace_sale_order_ids
+                    ],
+                })
+                merged_orders.order_line.write({'order_id': target.id})
+                merged_orders.button_cancel()
+                merged_orders.unlink()
+            remaining_orders |= target
+        return remaining_orders
+
+    @api.model
+    def _cron_consolidate_marketplace_pos(self):
+        """Merge and confirm the draft POs of the consolidating vendors whose window is over"""
+        purchase_orders = self.search(self._get_marketplace_consolidation_domain())
+        now = fields.Datetime.now()
+        due_orders = self.browse()
+        for vendor, vendor_orders in purchase_orders.grouped('partner_id').items():
+            window_end = min(vendor_orders.mapped('create_date')) + timedelta(
+                hours=vendor.marketplace_po_consolidation_hours,
+            )
+            if window_end <= now:
+                due_orders |= vendor_orders
+        if not due_orders:
+            return
+
+        with self.env['marketplace.metric']._instrument('purchase.consolidate_pos', len(due_orders)) as stats:
+            consolidated_orders = due_orders._merge_marketplace_dropship()
+            # Failures are reported per consolidated PO instead of per sale order
+            failures = self.env['sale.order']._confirm_marketplace_po_batches({
+                order: order for order in consolidated_orders
+            })
+            stats['errors'] = len(failures)
+        _logger.info('Consolidated %s marketplace POs into %s',
+                     len(due_orders), len(consolidated_orders))
+        if failures:
+            # Failed POs stay in draft and are retried by the next run
+            _logger.error(
+                'Failed to confirm %s consolidated marketplace POs: %s',
+                len(failures), ', '.join(order.name for order in failures),
+                extra={'marketplace_po_failures': [{
+                    'purchase_order': order.name,
+                    'sale_orders': order.marketplace_sale_order_ids.mapped('name'),
+                    'error': str(error),
+                } for order, error in failures.items()]},
+            )
+
+
+class PurchaseOrderLine(models.Model):
+    _inherit = 'purchase.order.line'
+
+    is_marketplace_dropship = fields.Boolean(
+        string='Marketplace Dropship', compute='_compute_is_marketplace_dropship', store=True,
+        help='The product is a marketplace vendor product shipped with the dropship route'
+    )
+
+    @api.depends('product_id.product_tmpl_id.marketplace_vendor_id', 'product_id.product_tmpl_id.route_ids')
+    def _compute_is_marketplace_dropship(self):
+        dropship_route = self.env.ref('stock_dropshipping.route_drop_shipping', raise_if_not_found=False)
+        for line in self:
+            product_tmpl = line.product_id.product_tmpl_id
+            line.is_marketplace_dropship = bool(
+                product_tmpl.marketplace_vendor_id and dropship_route and dropship_route in product_tmpl.route_ids
+            )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Link the originating sale orders when procurement creates marketplace lines"""
+        lines = super().create(vals_list)
+        lines._link_marketplace_sale_orders()
+        return lines
+
+    def write(self, vals):
+        result = super().write(vals)
+        if 'sale_line_id' in vals or 'order_id' in vals:
+            self._link_marketplace_sale_orders()
+        return result
+
+    def _link_marketplace_sale_orders(self):
+        """Link the purchase order of marketplace lines to the sale orders they come from"""
+        lines = self.filtered(lambda line: line.sale_line_id and line.is_marketplace_dropship)
+        for purchase_order, po_lines in lines.grouped('order_id').items():
+            sale_orders = po_lines.sale_line_id.order_id - purchase_order.marketplace_sale_order_ids
+            if sale_orders:
+                purchase_order.sudo().marketplace_sale_order_ids = [Command.link(so.id) for so in sale_orders]
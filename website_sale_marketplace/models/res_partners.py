@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 # Copyright 2024 ERPGAP/PROMPTEQUATION LDA
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
-from odoo import fields, models
+from odoo import api, fields, models
+
+# Vendor trust levels, from the least to the most trusted
+TRUST_LEVELS = [
+    ('new', 'New'),
+    ('trusted', 'Trusted'),
+    ('verified', 'Verified'),
+]
 
 
 class ResPartner(models.Model):
@@ -16,3 +23,101 @@ class ResPartner(models.Model):
              "Cost = Sale Price / (1 + Markup/100). "
              "Example: If markup is 5% and sale price is 100, cost will be 95.24"
     )
+    marketplace_trust_level = fields.Selection(
+        TRUST_LEVELS, string="Marketplace Trust Level", default='new',
+        help="Auto-approval rules only approve the products of vendors with a sufficient trust level"
+    )
+    marketplace_po_consolidation = fields.Boolean(
+        string="Consolidate Purchase Orders",
+        help="Leave the dropship purchase orders of this vendor in draft, then merge them per delivery address "
+             "and confirm them together at the end of the consolidation window. Only orders shipped to the same "
+             "address are merged, so this pays off for vendors receiving several orders of the same customers; "
+             "every order of the vendor is sent to them up to the window later."
+    )
+    marketplace_po_consolidation_hours = fields.Integer(
+        string="Consolidation Window (Hours)", default=2,
+        help="Hours after the oldest draft purchase order of the vendor at which the pending orders are confirmed. "
+             "A longer window merges more orders but delays their shipping."
+    )
+    marketplace_digest_cadence = fields.Selection([
+        ('immediate', 'Immediate'),
+        ('hourly', 'Hourly Digest'),
+        ('daily', 'Daily Digest'),
+    ], string="Order Notifications", default='hourly',
+        help="Immediate: the vendor is notified of every confirmed marketplace purchase order. "
+             "Digest: the new orders are listed in a single email per hour or per day."
+    )
+    marketplace_digest_date = fields.Datetime(string="Last Order Digest", readonly=True, copy=False)
+    marketplace_pending_payout = fields.Monetary(
+        string="Pending Marketplace Payout", compute='_compute_marketplace_pending_payout',
+        currency_field='marketplace_payout_currency_id',
+        help="Cost of the marketplace orders paid by the customers and not yet paid to the vendor, "
+             "in the currency of the current company"
+    )
+    marketplace_payout_currency_id = fields.Many2one('res.currency', compute='_compute_marketplace_pending_payout')
+    marketplace_product_ids = fields.One2many('product.template', 'marketplace_vendor_id',
+                                              string="Marketplace Products")
+    # Read from the appended count changes, so the portal home page does not count the products
+    # and product changes never write the vendor row
+    marketplace_product_count = fields.Integer(
+        string="Marketplace Products", compute='_compute_marketplace_product_counts')
+    marketplace_product_draft_count = fields.Integer(
+        string="Draft Marketplace Products", compute='_compute_marketplace_product_counts')
+    marketplace_product_approval_count = fields.Integer(
+        string="Marketplace Products Pending Approval", compute='_compute_marketplace_product_counts')
+    marketplace_product_approved_count = fields.Integer(
+        string="Approved Marketplace Products", compute='_compute_marketplace_product_counts')
+    marketplace_product_published_count = fields.Integer(
+        string="Published Marketplace Products", compute='_compute_marketplace_product_counts')
+
+    def _compute_marketplace_product_counts(self):
+        """Sum the product count changes of the vendors with a single grouped query"""
+        counts = self.env['marketplace.vendor.product.count']._get_counts(self)
+        for partner in self:
+            vendor_counts = counts.get(partner.id, {})
+            partner.marketplace_product_count = vendor_counts.get('product_count', 0)
+            partner.marketplace_product_draft_count = vendor_counts.get('draft_count', 0)
+            partner.marketplace_product_approval_count = vendor_counts.get('approval_count', 0)
+            partner.marketplace_product_approved_count = vendor_counts.get('approved_count', 0)
+            partner.marketplace_product_published_count = vendor_counts.get('published_count', 0)
+
+    def _compute_marketplace_pending_payout(self):
+        totals = self.env['marketplace.vendor.ledger']._get_vendor_totals(self)
+        for partner in self:
+            partner_totals = totals.get(partner, {})
+            partner.marketplace_pending_payout = (
+                partner_totals.get('payout_due_amount', 0.0) - partner_totals.get('paid_out_amount', 0.0)
+            )
+            partner.marketplace_payout_currency_id = self.env.company.currency_id
+
+    def write(self, vals):
+        """Reprice vendor products in the background when the markup changes"""
+        result = super().write(vals)
+        if 'parent_id' in vals or 'is_company' in vals:
+            if self.env['res.users'].sudo().search_count([('partner_id', 'child_of', self.ids)], limit=1):
+                # Record rules of portal vendors depend on their company and are cached
+                self.env.registry.clear_cache()
+            # The vendor company of their products, or of their contacts' products, changed
+            products = self.env['product.template'].sudo().with_context(active_test=False).search([
+                ('marketplace_vendor_id', 'child_of', self.ids),
+            ])
+            if products:
+                self.env['ir.attachment']._recompute_marketplace_vendor(products)
+        if 'marketplace_markup' in vals:
+            self.env.registry.clear_cache()
+            vendors = self.filtered('is_marketplace_vendor')
+            if vendors:
+                self.env['marketplace.reprice.job'].sudo()._schedule(vendors=vendors)
+        return result
+
+    def action_preview_marketplace_repricing(self):
+        """Preview the impact of the current markup on the vendor products"""
+        jobs = self.env['marketplace.reprice.job'].sudo()._schedule(vendors=self, dry_run=True)
+        return jobs._get_records_action(name='Repricing Preview')
+
+    def action_view_marketplace_ledger(self):
+        self.ensure_one()
+        return self.env['marketplace.vendor.ledger']._get_records_action(
+            name='Vendor Ledger',
+            domain=[('vendor_id', '=', self.id)],
+        )
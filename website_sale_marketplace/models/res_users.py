@@ -9,9 +9,22 @@ class ResUsers(models.Model):
 
     is_marketplace_vendor = fields.Boolean(
         compute='_compute_is_marketplace_vendor', store=True, string="Marketplace Vendor")
+    # Not stored: computed once per environment and invalidated when the partner's company changes
+    marketplace_vendor_id = fields.Many2one(
+        'res.partner', compute='_compute_marketplace_vendor_id', string="Marketplace Vendor Partner",
+        help="Partner whose marketplace products a portal user manages")
 
     @api.depends('partner_id.is_marketplace_vendor', 'partner_id.parent_id.is_marketplace_vendor')
     def _compute_is_marketplace_vendor(self):
         for user in self:
             user.is_marketplace_vendor = user.partner_id.is_marketplace_vendor or \
                                          user.partner_id.parent_id.is_marketplace_vendor or False
+
+    @api.depends('partner_id.commercial_partner_id', 'share')
+    def _compute_marketplace_vendor_id(self):
+        for user in self:
+            # Portal users act for their company, as products store the company of their vendor
+            if user._is_portal():
+                user.marketplace_vendor_id = user.partner_id.commercial_partner_id
+            else:
+                user.marketplace_vendor_id = False
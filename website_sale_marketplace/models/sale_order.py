@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 # Copyright 2024 ERPGAP/PROMPTEQUATION LDA
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
-from odoo import models
+from odoo import fields, models
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -10,44 +10,120 @@ _logger = logging.getLogger(__name__)
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
 
+    marketplace_purchase_ids = fields.Many2many(
+        'purchase.order', 'sale_order_marketplace_purchase_rel', 'sale_order_id', 'purchase_order_id',
+        string='Marketplace Purchase Orders', copy=False, readonly=True,
+        help='Marketplace dropship purchase orders generated by this sale order'
+    )
+    marketplace_paid_date = fields.Datetime(
+        string='Marketplace Paid On', copy=False, readonly=True,
+        help='When all the invoices of the order were paid, making the vendor payouts due'
+    )
+
     def action_confirm(self):
         """Override to auto-confirm marketplace vendor POs after SO confirmation"""
         result = super().action_confirm()
 
-        for order in self:
-            # Auto-confirm marketplace POs after procurement creates them
-            order._auto_confirm_marketplace_pos()
+        # Auto-confirm marketplace POs after procurement creates them, for the whole batch at once
+        self._auto_confirm_marketplace_pos()
 
         return result
 
-    def _auto_confirm_marketplace_pos(self):
-        """Auto-confirm purchase orders for marketplace products (dropship)"""
-        self.ensure_one()
+    def _get_marketplace_purchase_orders(self):
+        """Return a dict {sale order: purchase orders} with the unconfirmed marketplace
+        dropship POs generated by the orders in self, using a single indexed search
 
-        # Get all purchase orders linked to this sale order
+        POs of vendors consolidating their orders are left to the consolidation job.
+        """
         purchase_orders = self.env['purchase.order'].search([
-            ('origin', '=', self.name),
-            ('state', 'in', ['draft', 'sent', 'to approve'])
+            ('marketplace_sale_order_ids', 'in', self.ids),
+            ('has_marketplace_dropship', '=', True),
+            ('state', 'in', ['draft', 'sent', 'to approve']),
+            ('partner_id.marketplace_po_consolidation', '=', False),
         ])
+        pos_by_order = {}
+        for po in purchase_orders:
+            for order in po.marketplace_sale_order_ids & self:
+                pos_by_order[order] = pos_by_order.get(order, po.browse()) | po
+        return pos_by_order
 
-        _logger.info(f'SO {self.name}: Found {len(purchase_orders)} POs to check: {purchase_orders.mapped("name")}')
+    def _filter_marketplace_fully_paid(self, payment_states=None):
+        """Return the orders having posted customer invoices that are all paid
 
-        for po in purchase_orders:
-            # Check if PO contains marketplace vendor products with dropship route
-            has_marketplace_dropship = False
-            dropship_route = self.env.ref('stock_dropshipping.route_drop_shipping', raise_if_not_found=False)
-
-            for line in po.order_line:
-                product_tmpl = line.product_id.product_tmpl_id
-                is_marketplace = bool(product_tmpl.marketplace_vendor_id)
-                is_dropship = dropship_route and dropship_route in product_tmpl.route_ids
-
-                if is_marketplace and is_dropship:
-                    has_marketplace_dropship = True
-                    break
-
-            if has_marketplace_dropship:
-                try:
-                    po.button_confirm()
-                except Exception as e:
-                    _logger.error(f'SO {self.name}: Failed to auto-confirm PO {po.name}: {str(e)}', exc_info=True)
+        Evaluated with a single grouped query for the whole recordset.
+        ``payment_states`` optionally maps invoice ids to payment states that
+        are not flushed to the database yet (e.g. while they are computed).
+        """
+        if not self:
+            return self
+        payment_states = payment_states or {}
+        self.env['account.move'].flush_model(['move_type', 'state'])
+        self.env['account.move.line'].flush_model(['move_id', 'sale_line_ids'])
+        self.env['sale.order.line'].flush_model(['order_id'])
+        self.env.cr.execute("""
+            SELECT sol.order_id
+              FROM sale_order_line sol
+              JOIN sale_order_line_invoice_rel rel ON rel.order_line_id = sol.id
+              JOIN account_move_line aml ON aml.id = rel.invoice_line_id
+              JOIN account_move am ON am.id = aml.move_id
+             WHERE sol.order_id = ANY(%(order_ids)s)
+               AND am.move_type = 'out_invoice'
+               AND am.state = 'posted'
+          GROUP BY sol.order_id
+            HAVING bool_and(CASE WHEN am.id = ANY(%(overridden_ids)s) THEN am.id = ANY(%(paid_ids)s)
+                                 ELSE am.payment_state = 'paid' END)
+        """, {
+            'order_ids': self.ids,
+            'overridden_ids': list(payment_states),
+            'paid_ids': [move_id for move_id, state in payment_states.items() if state == 'paid'],
+        })
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _auto_confirm_marketplace_pos(self):
+        """Auto-confirm purchase orders for marketplace products (dropship)
+
+        Works on the whole recordset: the POs of all orders are confirmed with a
+        single ``button_confirm`` call. Returns a dict {sale order: exception} of
+        the orders whose POs failed.
+        """
+        pos_by_order = self._get_marketplace_purchase_orders()
+        _logger.info('Auto-confirming marketplace POs of %s sale orders', len(pos_by_order))
+
+        with self.env['marketplace.metric']._instrument('sale.auto_confirm_pos', len(pos_by_order)) as stats:
+            failures = self._confirm_marketplace_po_batches(pos_by_order)
+            stats['errors'] = len(failures)
+        if failures:
+            # One structured record for the whole batch, the details are in the extra attributes
+            _logger.error(
+                'Failed to auto-confirm the marketplace POs of %s sale orders: %s',
+                len(failures), ', '.join(order.name for order in failures),
+                extra={'marketplace_po_failures': [{
+                    'sale_order': order.name,
+                    'purchase_orders': pos_by_order[order].mapped('name'),
+                    'error': str(error),
+                } for order, error in failures.items()]},
+            )
+        return failures
+
+    def _confirm_marketplace_po_batches(self, pos_by_order):
+        """Confirm the POs of all orders together and isolate failing orders
+
+        When the grouped confirmation fails, the batch is split in halves until the
+        failing orders are found, so a few bad orders cost O(log n) extra attempts
+        instead of one confirmation per order. Returns a dict {sale order: exception}.
+        """
+        failures = {}
+        batches = [list(pos_by_order.items())] if pos_by_order else []
+        while batches:
+            batch = batches.pop()
+            purchase_orders = self.env['purchase.order'].union(*(pos for _order, pos in batch))
+            try:
+                with self.env.cr.savepoint():
+                    purchase_orders.button_confirm()
+            except Exception as e:
+                if len(batch) == 1:
+                    failures[batch[0][0]] = e
+                else:
+                    middle = len(batch) // 2
+                    batches += [batch[:middle], batch[middle:]]
+        return failures
@@ -0,0 +1,46 @@
+/** @odoo-module **/
+
+import { Component, onWillStart, xml } from "@odoo/owl";
+import { loadBundle } from "@web/core/assets";
+import { registry } from "@web/core/registry";
+
+const fieldRegistry = registry.category("fields");
+
+// The HTML editor is by far the heaviest part of the vendor web client: it is
+// only downloaded when a form with an HTML field is opened.
+export const HTML_EDITOR_BUNDLE = "website_sale_marketplace.webclient_html_editor";
+
+/**
+ * Loads the HTML editor bundle, then renders the standard html field.
+ */
+export class LazyHtmlField extends Component {
+    static template = xml`<t t-component="htmlField.component" t-props="htmlFieldProps"/>`;
+    static props = ["*"];
+
+    setup() {
+        onWillStart(async () => {
+            if (!fieldRegistry.contains("html")) {
+                await loadBundle(HTML_EDITOR_BUNDLE);
+            }
+            this.htmlField = fieldRegistry.get("html");
+        });
+    }
+
+    get htmlFieldProps() {
+        const { fieldInfo, dynamicInfo, ...props } = this.props;
+        if (this.htmlField.extractProps) {
+            Object.assign(props, this.htmlField.extractProps(fieldInfo, dynamicInfo));
+        }
+        return props;
+    }
+}
+
+export const lazyHtmlField = {
+    component: LazyHtmlField,
+    displayName: "HTML (lazy)",
+    supportedTypes: ["html"],
+    // The props of the html field are extracted once its code is loaded
+    extractProps: (fieldInfo, dynamicInfo) => ({ fieldInfo, dynamicInfo }),
+};
+
+fieldRegistry.add("marketplace_lazy_html", lazyHtmlField);
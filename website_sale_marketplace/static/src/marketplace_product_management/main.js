@@ -2,5 +2,28 @@
 
 import { startWebClient } from '@web/start';
 import { WebClient } from '@web/webclient/webclient';
+import { session } from '@web/session';
 
-startWebClient(WebClient);
\ No newline at end of file
+/**
+ * Opens the product action embedded in the session info when the URL does
+ * not point to another action, without loading it from the server first.
+ */
+export class MarketplaceProductWebClient extends WebClient {
+    async loadRouterState() {
+        await super.loadRouterState();
+        if (!this.actionService.currentController && session.marketplace_action) {
+            await this.actionService.doAction(session.marketplace_action, {
+                clearBreadcrumbs: true,
+                additionalContext: {
+                    default_marketplace_vendor_id: session.vendor_partner_id,
+                    vendor_partner_id: session.vendor_partner_id,
+                },
+            });
+        }
+        // Marks when the vendor portal becomes interactive in the browser performance
+        // timeline, for manual profiling: no budget is enforced on it
+        performance.mark('marketplace_webclient_interactive');
+    }
+}
+
+startWebClient(MarketplaceProductWebClient);
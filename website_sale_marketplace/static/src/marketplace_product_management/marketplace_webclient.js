@@ -22,11 +22,12 @@ export class MarketplaceWebClient extends Component {
     }
 
     async loadAction() {
-        const actionName = session.action_name;
+        // The action is embedded in the session info, fall back on loading it by name
+        const action = session.marketplace_action || session.action_name;
         const vendorPartnerId = session.vendor_partner_id;
 
-        if (actionName) {
-            await this.actionService.doAction(actionName, {
+        if (action) {
+            await this.actionService.doAction(action, {
                 clearBreadcrumbs: true,
                 additionalContext: {
                     default_marketplace_vendor_id: vendorPartnerId,
@@ -3,3 +3,19 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 from . import test_portal_menu
 from . import test_product_save
+from . import test_marketplace_purchase
+from . import test_po_outbox
+from . import test_po_consolidation
+from . import test_vendor_digest
+from . import test_vendor_ledger
+from . import test_marketplace_pricing
+from . import test_vendor_dropshipping
+from . import test_product_import
+from . import test_price_feed
+from . import test_product_approval
+from . import test_auto_approval
+from . import test_webclient_bundle
+from . import test_product_indexes
+from . import test_attachment_access
+from . import test_operation_metrics
+from . import test_performance
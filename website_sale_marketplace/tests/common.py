@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase
+
+
+class MarketplacePurchaseCommon(TransactionCase):
+    """Marketplace vendor selling a dropship product to a customer"""
+
+    def setUp(self):
+        super().setUp()
+
+        # Create a marketplace vendor partner
+        self.vendor_partner = self.env['res.partner'].create({
+            'name': 'Test Vendor Purchase',
+            'is_marketplace_vendor': True,
+            'email': 'vendorpurchase@test.com',
+        })
+        self.customer = self.env['res.partner'].create({
+            'name': 'Test Marketplace Customer',
+            'email': 'customer@test.com',
+        })
+
+        # Marketplace product sold through the dropship route
+        self.dropship_route = self.env.ref('stock_dropshipping.route_drop_shipping')
+        self.product = self.env['product.template'].create({
+            'name': 'Test Dropship Product',
+            'type': 'consu',
+            'list_price': 120.0,
+            'marketplace_vendor_id': self.vendor_partner.id,
+            'route_ids': [(6, 0, self.dropship_route.ids)],
+            'seller_ids': [(0, 0, {
+                'partner_id': self.vendor_partner.id,
+                'min_qty': 1.0,
+                'price': 100.0,
+            })],
+        })
+
+    def _create_sale_orders(self, count):
+        return self.env['sale.order'].create([{
+            'partner_id': self.customer.id,
+            'order_line': [(0, 0, {
+                'product_id': self.product.product_variant_id.id,
+                'product_uom_qty': 1.0,
+            })],
+        } for _i in range(count)])
+
+    def _confirm_without_auto_confirm(self, orders):
+        """Confirm sale orders but leave their marketplace POs in draft"""
+        SaleOrder = type(self.env['sale.order'])
+        with patch.object(SaleOrder, '_auto_confirm_marketplace_pos', lambda self: {}):
+            orders.action_confirm()
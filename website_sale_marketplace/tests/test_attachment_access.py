@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import base64
+import logging
+import time
+
+from odoo.fields import Domain
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged('post_install', '-at_install')
+class TestAttachmentAccess(TransactionCase):
+    """Test the access of portal vendors to product attachments"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.vendor_partner = self.env['res.partner'].create({
+            'name': 'Test Vendor Attachments',
+            'is_marketplace_vendor': True,
+        })
+        self.other_vendor = self.env['res.partner'].create({
+            'name': 'Test Other Vendor Attachments',
+            'is_marketplace_vendor': True,
+        })
+        self.portal_user = self.env['res.users'].sudo().with_context(no_reset_password=True).create({
+            'name': 'Portal Vendor Attachments',
+            'login': 'portal_vendor_attachments',
+            'email': 'portal_vendor_attachments@test.com',
+            'partner_id': self.vendor_partner.id,
+            'share': True,
+        })
+        self.product, self.other_product = self.env['product.template'].create([{
+            'name': 'Test Product Attachments',
+            'marketplace_vendor_id': self.vendor_partner.id,
+        }, {
+            'name': 'Test Other Product Attachments',
+            'marketplace_vendor_id': self.other_vendor.id,
+        }])
+        self.images = self.env['product.image'].create([{
+            'name': f'Test Image {product.name}',
+            'product_tmpl_id': product.id,
+        } for product in self.product | self.other_product])
+
+    def _create_attachment(self, name, **values):
+        return self.env['ir.attachment'].create({
+            'name': name,
+            'datas': base64.b64encode(b'attachment'),
+            **values,
+        })
+
+    def test_vendor_attachments_only(self):
+        """
+        Test that portal vendors only access the attachments of their own products.
+        """
+        own = self._create_attachment('own', res_model='product.image', res_id=self.images[0].id)
+        other = self._create_attachment('other', res_model='product.image', res_id=self.images[1].id)
+        unattached = self._create_attachment('unattached')
+        self.assertEqual(own.marketplace_vendor_id, self.vendor_partner)
+        self.assertEqual(other.marketplace_vendor_id, self.other_vendor)
+
+        visible = self.env['ir.attachment'].with_user(self.portal_user).search([
+            ('id', 'in', (own | other | unattached).ids),
+        ])
+        self.assertEqual(visible, own, "Only the attachments of the vendor's products should be visible")
+
+        # The attachments follow the product when it changes vendor
+        self.other_product.marketplace_vendor_id = self.vendor_partner
+        self.env.flush_all()
+        self.assertEqual(other.marketplace_vendor_id, self.vendor_partner)
+
+    def test_access_check_plan(self):
+        """
+        Test that the attachments of a product page are read through indexes, and benchmark the access check.
+
+        Before: the rule ORed ``res_model = False`` and ``res_model IN (...)`` with
+        the other conditions, so every portal read matched the whole product
+        attachment table, whoever the vendor.
+        """
+        attachments = self.env['ir.attachment']
+        for image in self.images:
+            for index in range(20):
+                attachments |= self._create_attachment(f'image {index}', res_model='product.image', res_id=image.id)
+        self.env.flush_all()
+
+        rule_domain = self.env['ir.rule'].with_user(self.portal_user)._compute_domain('ir.attachment', 'read')
+        domain = Domain(rule_domain) & Domain([
+            ('res_model', '=', 'product.image'),
+            ('res_id', 'in', self.images.ids),
+        ])
+        query = self.env['ir.attachment'].sudo()._search(domain)
+        self.env.cr.execute('SET LOCAL enable_seqscan = off')
+        self.env.cr.execute(SQL('EXPLAIN %s', query.select()))
+        plan = '\n'.join(row[0] for row in self.env.cr.fetchall())
+        self.env.cr.execute('RESET enable_seqscan')
+        self.assertIn('Index', plan)
+
+        start = time.perf_counter()
+        visible = self.env['ir.attachment'].with_user(self.portal_user).search([
+            ('res_model', '=', 'product.image'), ('res_id', 'in', self.images.ids),
+        ])
+        _logger.info('Portal vendor attachment access check: %.2f ms for %s attachments',
+                     (time.perf_counter() - start) * 1000, len(attachments))
+        self.assertEqual(len(visible), 20, "Only the attachments of the vendor's image should be visible")
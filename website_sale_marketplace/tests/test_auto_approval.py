@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAutoApproval(TransactionCase):
+    """Test the rule-based auto-approval of marketplace products"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.trusted_vendor = self.env['res.partner'].create({
+            'name': 'Test Trusted Vendor',
+            'is_marketplace_vendor': True,
+            'marketplace_trust_level': 'trusted',
+        })
+        self.new_vendor = self.env['res.partner'].create({
+            'name': 'Test New Vendor',
+            'is_marketplace_vendor': True,
+        })
+        self.rule = self.env['marketplace.approval.rule'].create({
+            'name': 'Test Rule',
+            'max_price': 500.0,
+            'require_image': False,
+            'min_description_length': 10,
+            'auto_publish': True,
+        })
+
+    def _create_pending_products(self, vendor, prices, description='A long enough description'):
+        products = self.env['product.template'].create([{
+            'name': f'Test Auto Approval Product {index}',
+            'list_price': price,
+            'description_sale': description,
+            'marketplace_vendor_id': vendor.id,
+        } for index, price in enumerate(prices)])
+        products.action_send_for_approval()
+        return products
+
+    def test_auto_approve_matching_products(self):
+        """
+        Test that only the products matching a rule are approved and published.
+        """
+        matching = self._create_pending_products(self.trusted_vendor, [100.0, 200.0])
+        too_expensive = self._create_pending_products(self.trusted_vendor, [1000.0])
+        short_description = self._create_pending_products(self.trusted_vendor, [100.0], description='Short')
+        untrusted = self._create_pending_products(self.new_vendor, [100.0])
+
+        self.rule._run()
+
+        self.assertEqual(set(matching.mapped('marketplace_state')), {'approved'})
+        self.assertTrue(all(matching.mapped('is_published')))
+        for product in too_expensive | short_description | untrusted:
+            self.assertEqual(product.marketplace_state, 'approval',
+                             "Products not matching the rule should stay pending")
+
+        logs = self.env['marketplace.approval.log'].search([('rule_id', '=', self.rule.id)])
+        self.assertEqual(logs.product_id, matching, "Each approval should be logged")
+        self.assertTrue(all(logs.mapped('published')))
+
+    def test_dry_run(self):
+        """
+        Test that the preview reports the products a rule would approve without approving them.
+        """
+        products = self._create_pending_products(self.trusted_vendor, [100.0, 200.0])
+
+        self.rule.action_preview()
+
+        self.assertEqual(set(products.mapped('marketplace_state')), {'approval'})
+        self.assertEqual(self.rule.preview_count, 2)
+        self.assertEqual(self.rule.approved_count, 0)
+
+    def test_dry_run_logs_unmatched_products(self):
+        """
+        Test that the preview also reports the pending products no rule would approve.
+        """
+        matching = self._create_pending_products(self.trusted_vendor, [100.0])
+        too_expensive = self._create_pending_products(self.trusted_vendor, [1000.0])
+
+        self.rule.action_preview()
+        self.rule.action_preview()
+
+        logs = self.env['marketplace.approval.log'].search([('dry_run', '=', True)])
+        self.assertEqual(logs.filtered('rule_id').product_id, matching)
+        self.assertEqual(logs.filtered(lambda log: not log.rule_id).product_id, too_expensive,
+                         "Products matching no rule should be logged without rule, once per preview")
+        self.assertEqual(len(logs), 2)
+
+    def test_category_rule_skips_products_without_category(self):
+        """
+        Test that a category rule does not match, nor fail on, products without category.
+        """
+        self.rule.categ_ids = self.env['product.category'].create({'name': 'Test Auto Approval Category'})
+        products = self._create_pending_products(self.trusted_vendor, [100.0])
+        products.categ_id = False
+
+        self.rule._run()
+
+        self.assertEqual(products.marketplace_state, 'approval')
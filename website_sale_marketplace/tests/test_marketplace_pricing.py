@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import float_round
+
+
+@tagged('post_install', '-at_install')
+class TestMarketplacePricing(TransactionCase):
+    """Test the computation of marketplace vendor costs"""
+
+    def setUp(self):
+        super().setUp()
+
+        # Create a marketplace vendor partner
+        self.vendor_partner = self.env['res.partner'].create({
+            'name': 'Test Vendor Pricing',
+            'is_marketplace_vendor': True,
+            'email': 'vendorpricing@test.com',
+            'marketplace_markup': 0.20,  # 20% markup
+        })
+        self.category = self.env['product.category'].create({
+            'name': 'Test Marketplace Category',
+            'marketplace_markup': 0.25,  # 25% markup
+        })
+
+    def _create_products(self, prices, **values):
+        products = self.env['product.template'].create([{
+            'name': f'Test Pricing Product {index}',
+            'list_price': price,
+            'marketplace_vendor_id': self.vendor_partner.id,
+            **values,
+        } for index, price in enumerate(prices)])
+        self.env['product.supplierinfo'].create([{
+            'partner_id': self.vendor_partner.id,
+            'product_tmpl_id': product.id,
+            'min_qty': 1.0,
+            'price': 0.0,
+        } for product in products])
+        return products
+
+    def test_costs_match_markup_formula(self):
+        """
+        Test that batch repricing gives the same costs as sale_price / (1 + markup).
+        """
+        prices = [0.0, 0.01, 9.99, 100.0, 123.45, 1000.0, 99999.99]
+        vendor_products = self._create_products(prices)
+        category_products = self._create_products(prices, categ_id=self.category.id)
+
+        (vendor_products | category_products).write({'list_price': 0.0})
+        for product, price in zip(vendor_products | category_products, prices * 2):
+            product.list_price = price
+        (vendor_products | category_products)._recompute_marketplace_costs()
+
+        for products, markup in ((vendor_products, 0.20), (category_products, 0.25)):
+            for product, price in zip(products, prices):
+                expected_cost = float_round(price / (1 + markup), precision_digits=2)
+                self.assertEqual(product.standard_price, expected_cost)
+                self.assertEqual(product.seller_ids.price, expected_cost)
+
+    def test_only_first_vendor_supplierinfo_updated(self):
+        """
+        Test that only the first supplierinfo of the vendor gets the new cost, as before.
+        """
+        product = self._create_products([100.0])
+        other_supplierinfo = self.env['product.supplierinfo'].create({
+            'partner_id': self.vendor_partner.id,
+            'product_tmpl_id': product.id,
+            'min_qty': 10.0,
+            'price': 1.0,
+            # Supplier infos are ordered by sequence, then by decreasing min_qty
+            'sequence': 100,
+        })
+
+        product.write({'list_price': 120.0})
+
+        self.assertEqual(product.standard_price, 100.0)
+        self.assertEqual((product.seller_ids - other_supplierinfo).price, 100.0)
+        self.assertEqual(other_supplierinfo.price, 1.0)
+
+    def test_query_count_is_flat(self):
+        """
+        Test that repricing does not cost more queries for more products.
+        """
+        small_batch = self._create_products([10.0, 20.0])
+        big_batch = self._create_products([10.0, 20.0, 30.0] * 10)
+
+        query_counts = []
+        for products in (small_batch, big_batch):
+            products.write({'list_price': 0.0})
+            self.env.invalidate_all()
+            count_before = self.env.cr.sql_log_count
+            products.write({'list_price': 50.0})
+            query_counts.append(self.env.cr.sql_log_count - count_before)
+
+        self.assertEqual(query_counts[0], query_counts[1],
+                         "Repricing should run a constant number of queries")
+        self.assertEqual(set(big_batch.mapped('standard_price')), {float_round(50.0 / 1.2, 2)})
+
+    def test_vendor_markup_change_reprices_products(self):
+        """
+        Test that a vendor markup change reprices the vendor products without category markup.
+        """
+        vendor_products = self._create_products([120.0, 240.0])
+        category_product = self._create_products([125.0], categ_id=self.category.id)
+        vendor_products._recompute_marketplace_costs()
+        category_product._recompute_marketplace_costs()
+
+        self.vendor_partner.marketplace_markup = 0.50
+        job = self.env['marketplace.reprice.job'].search([('vendor_id', '=', self.vendor_partner.id)])
+        self.assertEqual(job.state, 'pending')
+
+        self.env['marketplace.reprice.job']._cron_process_jobs()
+
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(job.processed_count, 2, "Category markup takes precedence over vendor markup")
+        self.assertEqual(vendor_products.mapped('standard_price'), [80.0, 160.0])
+        self.assertEqual(category_product.standard_price, 100.0)
+
+    def test_repricing_preview_and_resume(self):
+        """
+        Test that the preview reports the changes without applying them, and that jobs resume by chunk.
+        """
+        products = self._create_products([120.0, 240.0, 360.0], categ_id=self.category.id)
+        products._recompute_marketplace_costs()
+        self.category.marketplace_markup = 0.50
+
+        with patch('odoo.addons.website_sale_marketplace.models.marketplace_reprice_job.CHUNK_SIZE', 2):
+            preview = self.category.action_preview_marketplace_repricing()
+            job = self.env['marketplace.reprice.job'].browse(preview['res_id'])
+            self.assertTrue(job._process_chunk())
+            self.assertEqual(job.state, 'running')
+            self.assertEqual(job.last_product_id, products[1].id)
+
+            # Resume after the last processed chunk
+            job._run()
+
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(job.processed_count, 3)
+        self.assertEqual(job.changed_count, 3)
+        # Margins grow by the cost decrease: (96 - 80) + (192 - 160) + (288 - 240)
+        self.assertAlmostEqual(job.margin_delta, 96.0)
+        self.assertEqual(products.mapped('standard_price'), [96.0, 192.0, 288.0], "Preview changes nothing")
+
+    def test_markup_inherited_from_parent_category(self):
+        """
+        Test that the nearest category with a markup wins, then the vendor markup.
+        """
+        child_category = self.env['product.category'].create({
+            'name': 'Test Marketplace Subcategory',
+            'parent_id': self.category.id,
+        })
+        product = self._create_products([125.0], categ_id=child_category.id)
+        self.assertEqual(product._get_marketplace_markup(self.vendor_partner), 0.25)
+
+        child_category.marketplace_markup = 0.10
+        self.assertEqual(product._get_marketplace_markup(self.vendor_partner), 0.10,
+                         "Cached markup should be invalidated by the change")
+
+        (child_category | self.category).write({'marketplace_markup': 0.0})
+        self.assertEqual(product._get_marketplace_markup(self.vendor_partner), 0.20)
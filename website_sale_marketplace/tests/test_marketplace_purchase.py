@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from unittest.mock import patch
+
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import MarketplacePurchaseCommon
+
+
+@tagged('post_install', '-at_install')
+class TestMarketplacePurchase(MarketplacePurchaseCommon):
+    """Test auto-confirmation of marketplace dropship purchase orders"""
+
+    def test_action_confirm_confirms_marketplace_pos(self):
+        """
+        Test that confirming several sale orders at once confirms all their marketplace POs.
+        """
+        orders = self._create_sale_orders(3)
+        orders.action_confirm()
+
+        pos_by_order = orders._get_marketplace_purchase_orders()
+        self.assertFalse(pos_by_order, "No marketplace PO should be left unconfirmed")
+
+        purchase_orders = orders.marketplace_purchase_ids
+        self.assertEqual(len(purchase_orders), 3)
+        self.assertEqual(set(purchase_orders.mapped('state')), {'purchase'})
+
+    def test_purchase_order_linked_to_sale_order(self):
+        """
+        Test that procurement links the generated marketplace PO to its sale order.
+        """
+        order = self._create_sale_orders(1)
+        self._confirm_without_auto_confirm(order)
+
+        self.assertEqual(len(order.marketplace_purchase_ids), 1,
+                         "Marketplace PO should be linked to the sale order")
+        self.assertEqual(order.marketplace_purchase_ids.marketplace_sale_order_ids, order)
+        self.assertEqual(order.marketplace_purchase_ids.partner_id, self.vendor_partner)
+
+    def test_marketplace_dropship_flag(self):
+        """
+        Test that the marketplace dropship flag follows the PO lines.
+        """
+        order = self._create_sale_orders(1)
+        self._confirm_without_auto_confirm(order)
+        purchase_order = order.marketplace_purchase_ids
+
+        self.assertTrue(purchase_order.order_line.is_marketplace_dropship)
+        self.assertTrue(purchase_order.has_marketplace_dropship)
+
+        # Removing the dropship route clears the flag on lines and order
+        self.product.route_ids = [(3, self.dropship_route.id)]
+        self.assertFalse(purchase_order.order_line.is_marketplace_dropship)
+        self.assertFalse(purchase_order.has_marketplace_dropship)
+        self.assertFalse(order._get_marketplace_purchase_orders())
+
+    def test_lookup_query_count_is_flat(self):
+        """
+        Test that looking up the marketplace POs does not cost more queries for bigger batches.
+        """
+        small_batch = self._create_sale_orders(2)
+        big_batch = self._create_sale_orders(10)
+        self._confirm_without_auto_confirm(small_batch | big_batch)
+
+        query_counts = []
+        for orders in (small_batch, big_batch):
+            self.env.invalidate_all()
+            count_before = self.env.cr.sql_log_count
+            pos_by_order = orders._get_marketplace_purchase_orders()
+            query_counts.append(self.env.cr.sql_log_count - count_before)
+            self.assertEqual(len(pos_by_order), len(orders))
+
+        self.assertEqual(query_counts[0], query_counts[1],
+                         "Query count should not grow with the number of sale orders")
+
+    def test_failing_order_is_isolated(self):
+        """
+        Test that one failing PO does not prevent the other orders' POs from being confirmed.
+        """
+        orders = self._create_sale_orders(5)
+        self._confirm_without_auto_confirm(orders)
+        failing_order = orders[2]
+        failing_po = orders._get_marketplace_purchase_orders()[failing_order]
+
+        PurchaseOrder = type(self.env['purchase.order'])
+        button_confirm = PurchaseOrder.button_confirm
+
+        def button_confirm_failing(purchase_orders):
+            if failing_po & purchase_orders:
+                raise UserError("Vendor is blocked")
+            return button_confirm(purchase_orders)
+
+        with patch.object(PurchaseOrder, 'button_confirm', button_confirm_failing):
+            failed = orders._auto_confirm_marketplace_pos()
+
+        self.assertEqual(list(failed), [failing_order])
+        self.assertEqual(str(failed[failing_order]), "Vendor is blocked")
+        self.assertEqual(failing_po.state, 'draft')
+        remaining = orders._get_marketplace_purchase_orders()
+        self.assertEqual(list(remaining), [failing_order],
+                         "Only the failing order should keep an unconfirmed PO")
+
+    def test_fully_paid_detection(self):
+        """
+        Test that only orders whose posted invoices are all paid are detected, in one go.
+        """
+        self.product.invoice_policy = 'order'
+        orders = self._create_sale_orders(3)
+        self._confirm_without_auto_confirm(orders)
+        invoices = orders._create_invoices(grouped=True)
+        invoices.action_post()
+        first_invoice = orders[0].invoice_ids
+
+        self.assertFalse(orders._filter_marketplace_fully_paid(), "No invoice is paid yet")
+        self.assertEqual(
+            orders._filter_marketplace_fully_paid({first_invoice.id: 'paid'}), orders[0],
+            "Only the order whose invoice is paid should be returned",
+        )
+
+        # Query count does not depend on the number of invoices
+        count_before = self.env.cr.sql_log_count
+        first_invoice._get_marketplace_paid_sale_orders()
+        single_count = self.env.cr.sql_log_count - count_before
+        count_before = self.env.cr.sql_log_count
+        invoices._get_marketplace_paid_sale_orders()
+        self.assertEqual(self.env.cr.sql_log_count - count_before, single_count)
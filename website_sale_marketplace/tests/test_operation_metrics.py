@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestOperationMetrics(TransactionCase):
+    """Test the sampled measures of the marketplace operations"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.Metric = self.env['marketplace.metric']
+        self.env['ir.config_parameter'].set_param('website_sale_marketplace.metrics_sample_rate', '1')
+        self.env.cr.postcommit.data.pop('marketplace.metrics', None)
+
+        self.vendor = self.env['res.partner'].create({
+            'name': 'Test Metrics Vendor',
+            'is_marketplace_vendor': True,
+        })
+        self.products = self.env['product.template'].create([{
+            'name': f'Test Metrics Product {index}',
+            'list_price': 100.0,
+            'marketplace_vendor_id': self.vendor.id,
+        } for index in range(3)])
+
+    def _get_measures(self):
+        return self.env.cr.postcommit.data.get('marketplace.metrics', {})
+
+    def test_approval_measured_and_aggregated(self):
+        """
+        Approval actions are measured once per call, and the measures of
+        successive transactions add up in the metrics of the hour.
+        """
+        self.products.action_send_for_approval()
+        measures = self._get_measures()
+        self.assertEqual(measures['product.set_state_approval']['samples'], 1)
+        self.assertEqual(measures['product.set_state_approval']['records'], 3)
+        self.assertGreater(measures['product.set_state_approval']['queries'], 0)
+
+        self.Metric._flush_measures(measures)
+        self.assertFalse(measures, 'Flushed measures should be cleared')
+        self.Metric._flush_measures({'product.set_state_approval': {
+            'samples': 2, 'errors': 1, 'records': 5, 'queries': 10, 'duration': 4.0, 'max_duration': 3.0,
+        }})
+
+        metric = self.Metric.search([('operation', '=', 'product.set_state_approval')])
+        self.assertEqual(len(metric), 1, 'Measures should be aggregated per operation and hour')
+        self.assertEqual(metric.sample_count, 3)
+        self.assertEqual(metric.record_count, 8)
+        self.assertEqual(metric.error_count, 1)
+        self.assertGreaterEqual(metric.max_duration, 3.0)
+
+    def test_errors_counted(self):
+        """
+        An exception raised in an instrumented block is counted as an error and propagated.
+        """
+        with self.assertRaises(ValueError):
+            with self.Metric._instrument('test.failing', 2):
+                raise ValueError('Test failure')
+        measure = self._get_measures()['test.failing']
+        self.assertEqual(measure['errors'], 1)
+        self.assertEqual(measure['records'], 2)
+
+    def test_sampling_disabled(self):
+        """
+        With a sample rate of 0, operations are not measured at all.
+        """
+        self.env['ir.config_parameter'].set_param('website_sale_marketplace.metrics_sample_rate', '0')
+        self.products.action_send_for_approval()
+        self.products.action_approve()
+        self.assertFalse(self._get_measures())
+
+    def test_vendor_write_counts_measured(self):
+        """
+        Skipped no-op writes, approval resets and avoided resets of vendor edits are recorded as metrics.
+        """
+        portal_user = self.env['res.users'].sudo().with_context(no_reset_password=True).create({
+            'name': 'Portal Metrics Vendor',
+            'login': 'portal_metrics_vendor',
+            'password': 'portal_metrics_vendor',
+            'partner_id': self.vendor.id,
+            'share': True,
+        })
+        self.products.write({'marketplace_state': 'approved'})
+        self.products[0].list_price = 200.0
+
+        self.products.with_user(portal_user).write({'list_price': 100.0})
+        # Only the availability changes: not a reason for a new approval
+        self.products[1:].with_user(portal_user).write({'list_price': 100.0, 'sale_ok': False})
+
+        measures = self._get_measures()
+        self.assertEqual(measures['product.vendor_write_noop_skip']['records'], 2)
+        self.assertEqual(measures['product.vendor_write_state_reset']['records'], 1)
+        self.assertEqual(measures['product.vendor_write_reset_avoided']['records'], 2)
+        self.assertEqual(set(self.products.mapped('marketplace_state')), {'draft', 'approved'})
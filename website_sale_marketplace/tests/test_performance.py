@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+"""Benchmarks of the marketplace hot paths on synthetic catalogs
+
+Not part of the standard test run, run them with::
+
+    odoo-bin -d <db> -i website_sale_marketplace --test-tags marketplace_perf
+
+Each case is measured for every catalog size of ``MARKETPLACE_PERF_SCALES``
+(default ``10,1000``; add ``100000`` for the large catalog). Query counts and
+timings are compared with ``perf_baselines.json`` (or the file named by
+``MARKETPLACE_PERF_BASELINES``); a case more than ``QUERY_THRESHOLD`` (queries)
+or ``TIME_THRESHOLD`` (wall clock) times its baseline fails. A case without
+baseline is only measured, with a warning, until its baseline is recorded.
+
+Run with ``MARKETPLACE_PERF_UPDATE_BASELINES=1`` on the reference machine to
+measure without comparing: the baselines completed with the measured values
+are written to ``MARKETPLACE_PERF_BASELINES_OUTPUT`` (default
+``marketplace_perf_baselines.json`` in the temporary directory), to be reviewed
+and copied over ``perf_baselines.json``.
+"""
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import split_every
+
+_logger = logging.getLogger(__name__)
+
+BASELINES_PATH = os.environ.get('MARKETPLACE_PERF_BASELINES') or os.path.join(
+    os.path.dirname(__file__), 'perf_baselines.json')
+BASELINES_OUTPUT_PATH = os.environ.get('MARKETPLACE_PERF_BASELINES_OUTPUT') or os.path.join(
+    tempfile.gettempdir(), 'marketplace_perf_baselines.json')
+QUERY_THRESHOLD = float(os.environ.get('MARKETPLACE_PERF_QUERY_THRESHOLD', 1.2))
+TIME_THRESHOLD = float(os.environ.get('MARKETPLACE_PERF_TIME_THRESHOLD', 1.5))
+SCALES = [int(scale) for scale in os.environ.get('MARKETPLACE_PERF_SCALES', '10,1000').split(',')]
+UPDATE_BASELINES = os.environ.get('MARKETPLACE_PERF_UPDATE_BASELINES') == '1'
+
+# Products per vendor of the synthetic catalogs
+PRODUCTS_PER_VENDOR = 100
+# Products created or written by a vendor in one operation
+BATCH_SIZE = 10
+# Vendors of the multi-vendor sale orders
+ORDER_VENDOR_COUNT = 5
+
+
+@tagged('marketplace_perf', '-standard', 'post_install', '-at_install')
+class TestMarketplacePerformance(TransactionCase):
+    """Query counts and timings of the marketplace hot paths"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(BASELINES_PATH) as baselines_file:
+            cls.baselines = json.load(baselines_file)
+        cls.measures = {}
+        cls.dropship_route = cls.env.ref('stock_dropshipping.route_drop_shipping')
+        cls.customer = cls.env['res.partner'].create({
+            'name': 'Perf Customer',
+            'email': 'perfcustomer@test.com',
+        })
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE_BASELINES and cls.measures:
+            baselines = dict(cls.baselines, **cls.measures)
+            with open(BASELINES_OUTPUT_PATH, 'w') as baselines_file:
+                json.dump(baselines, baselines_file, indent=4, sort_keys=True)
+                baselines_file.write('\n')
+            _logger.info('Marketplace benchmark baselines written to %s', BASELINES_OUTPUT_PATH)
+        super().tearDownClass()
+
+    def _create_catalog(self, product_count):
+        """Create ``product_count`` dropship products spread over vendors with a portal user each"""
+        vendor_count = max(1, product_count // PRODUCTS_PER_VENDOR)
+        vendors = self.env['res.partner'].create([{
+            'name': f'Perf Vendor {index}',
+            'is_marketplace_vendor': True,
+            'marketplace_markup': 0.2,
+            'email': f'perfvendor{index}@test.com',
+        } for index in range(vendor_count)])
+        self.env['res.users'].with_context(no_reset_password=True).create([{
+            'name': vendor.name,
+            'login': f'perf_vendor_{vendor.id}',
+            'email': vendor.email,
+            'partner_id': vendor.id,
+            'share': True,
+        } for vendor in vendors])
+
+        products = self.env['product.template']
+        for indexes in split_every(1000, range(product_count)):
+            products |= products.create([{
+                'name': f'Perf Product {index}',
+                'type': 'consu',
+                'list_price': 100.0 + index % 50,
+                'marketplace_vendor_id': vendors[index % vendor_count].id,
+                'route_ids': [(6, 0, self.dropship_route.ids)],
+                'seller_ids': [(0, 0, {
+                    'partner_id': vendors[index % vendor_count].id,
+                    'min_qty': 1.0,
+                    'price': 80.0,
+                })],
+            } for index in indexes])
+            self.env.flush_all()
+            self.env.invalidate_all()
+        return vendors, products
+
+    @contextmanager
+    def _measure(self, case, scale):
+        """Measure the queries and wall-clock time of the block, then compare them with the baseline"""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        cr = self.env.cr
+        query_count = cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        self.env.flush_all()
+        measure = {
+            'queries': cr.sql_log_count - query_count,
+            'seconds': round(time.perf_counter() - start, 4),
+        }
+        key = f'{case}@{scale}'
+        self.measures[key] = measure
+        _logger.info('Marketplace benchmark %s: %s queries, %.3f s', key, measure['queries'], measure['seconds'])
+
+        if UPDATE_BASELINES:
+            return
+        baseline = self.baselines.get(key)
+        if not baseline:
+            # Not recorded on the reference machine yet: nothing to compare with
+            _logger.warning('Marketplace benchmark %s has no baseline, record it with '
+                            'MARKETPLACE_PERF_UPDATE_BASELINES=1', key)
+            return
+        self.assertLessEqual(
+            measure['queries'], baseline['queries'] * QUERY_THRESHOLD,
+            f"{key}: {measure['queries']} queries, baseline is {baseline['queries']}",
+        )
+        self.assertLessEqual(
+            measure['seconds'], baseline['seconds'] * TIME_THRESHOLD,
+            f"{key}: {measure['seconds']} s, baseline is {baseline['seconds']} s",
+        )
+
+    def _create_sale_order(self, products):
+        return self.env['sale.order'].create({
+            'partner_id': self.customer.id,
+            'order_line': [(0, 0, {
+                'product_id': product.product_variant_id.id,
+                'product_uom_qty': 1.0,
+            }) for product in products],
+        })
+
+    def _multi_vendor_products(self, vendors, products):
+        """One product of each of the first vendors"""
+        order_vendors = vendors[:ORDER_VENDOR_COUNT]
+        return self.env['product.template'].union(*(
+            products.filtered(lambda product, vendor=vendor: product.marketplace_vendor_id == vendor)[:1]
+            for vendor in order_vendors
+        ))
+
+    def test_vendor_product_create_write(self):
+        """
+        Benchmark product creation and edition by a portal vendor.
+        """
+        for scale in SCALES:
+            with self.subTest(scale=scale):
+                vendors, products = self._create_catalog(scale)
+                vendor_user = vendors[0].user_ids
+                Product = self.env['product.template'].with_user(vendor_user)
+
+                with self._measure('vendor_create', scale):
+                    Product.create([{
+                        'name': f'Perf New Product {index}',
+                        'list_price': 100.0,
+                    } for index in range(BATCH_SIZE)])
+
+                vendor_products = Product.browse(
+                    products.filtered(lambda product: product.marketplace_vendor_id == vendors[0])[:BATCH_SIZE].ids
+                )
+                with self._measure('vendor_write', scale):
+                    vendor_products.write({'list_price': 150.0})
+
+    def test_approval_actions(self):
+        """
+        Benchmark the approval of a whole vendor catalog.
+        """
+        for scale in SCALES:
+            with self.subTest(scale=scale):
+                _vendors, products = self._create_catalog(scale)
+
+                with self._measure('send_for_approval', scale):
+                    products.action_send_for_approval()
+
+                with self._measure('approve_compact', scale):
+                    products.with_context(marketplace_compact_tracking=True).action_approve()
+
+    def test_sale_order_confirm(self):
+        """
+        Benchmark the confirmation of a multi-vendor sale order and of its marketplace POs.
+        """
+        for scale in SCALES:
+            with self.subTest(scale=scale):
+                vendors, products = self._create_catalog(scale)
+                order = self._create_sale_order(self._multi_vendor_products(vendors, products))
+
+                with self._measure('sale_order_confirm', scale):
+                    order.action_confirm()
+
+                self.assertTrue(order.marketplace_purchase_ids)
+
+    def test_invoice_payment_auto_confirm(self):
+        """
+        Benchmark the payment of the invoice of a multi-vendor sale order, confirming its POs.
+        """
+        # Confirm the POs in the payment transaction instead of the cron
+        self.env['ir.config_parameter'].set_param('website_sale_marketplace.outbox_sync', 'True')
+        for scale in SCALES:
+            with self.subTest(scale=scale):
+                vendors, products = self._create_catalog(scale)
+                products.invoice_policy = 'order'
+                order = self._create_sale_order(self._multi_vendor_products(vendors, products))
+                SaleOrder = type(self.env['sale.order'])
+                # Leave the POs in draft so that the payment confirms them
+                with patch.object(SaleOrder, '_auto_confirm_marketplace_pos', lambda self: {}):
+                    order.action_confirm()
+                invoice = order._create_invoices()
+                invoice.action_post()
+
+                with self._measure('invoice_payment', scale):
+                    self.env['account.payment.register'].with_context(
+                        active_model='account.move', active_ids=invoice.ids,
+                    ).create({})._create_payments()
+
+                self.assertEqual(set(order.marketplace_purchase_ids.mapped('state')), {'purchase'})
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo.tests import tagged
+
+from .common import MarketplacePurchaseCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPoConsolidation(MarketplacePurchaseCommon):
+    """Test the consolidation of the dropship purchase orders of a vendor"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.vendor_partner.write({
+            'marketplace_po_consolidation': True,
+            'marketplace_po_consolidation_hours': 0,
+        })
+        self.PurchaseOrder = self.env['purchase.order']
+
+    def test_consolidating_vendor_pos_left_in_draft(self):
+        """
+        Test that confirming sale orders leaves the POs of a consolidating vendor in draft.
+        """
+        orders = self._create_sale_orders(3)
+        orders.action_confirm()
+
+        purchase_orders = orders.marketplace_purchase_ids
+        self.assertEqual(len(purchase_orders), 3)
+        self.assertEqual(set(purchase_orders.mapped('state')), {'draft'})
+
+    def test_pos_merged_and_confirmed(self):
+        """
+        Test that the consolidation job merges the draft POs of the vendor into one
+        confirmed PO, still linked to every sale order and sale order line.
+        """
+        orders = self._create_sale_orders(3)
+        orders.action_confirm()
+
+        self.PurchaseOrder._cron_consolidate_marketplace_pos()
+
+        purchase_order = orders.marketplace_purchase_ids
+        self.assertEqual(len(purchase_order), 1, "POs to the same address should be merged")
+        self.assertEqual(purchase_order.state, 'purchase')
+        self.assertEqual(purchase_order.marketplace_sale_order_ids, orders)
+        self.assertEqual(len(purchase_order.order_line), 3, "Lines should be kept per sale order line")
+        self.assertEqual(purchase_order.order_line.sale_line_id, orders.order_line)
+        for order in orders:
+            self.assertEqual(order.marketplace_purchase_ids, purchase_order)
+
+    def test_pos_wait_for_window(self):
+        """
+        Test that the POs stay in draft until the consolidation window is over.
+        """
+        self.vendor_partner.marketplace_po_consolidation_hours = 24
+        orders = self._create_sale_orders(2)
+        orders.action_confirm()
+
+        self.PurchaseOrder._cron_consolidate_marketplace_pos()
+
+        purchase_orders = orders.marketplace_purchase_ids
+        self.assertEqual(len(purchase_orders), 2)
+        self.assertEqual(set(purchase_orders.mapped('state')), {'draft'})
+
+    def test_pos_kept_per_delivery_address(self):
+        """
+        Test that dropship POs shipping to different customers are not merged.
+        """
+        other_customer = self.env['res.partner'].create({
+            'name': 'Test Other Marketplace Customer',
+            'email': 'othercustomer@test.com',
+        })
+        orders = self._create_sale_orders(2)
+        other_order = self._create_sale_orders(1)
+        other_order.partner_id = other_customer
+        (orders | other_order).action_confirm()
+
+        self.PurchaseOrder._cron_consolidate_marketplace_pos()
+
+        purchase_orders = (orders | other_order).marketplace_purchase_ids
+        self.assertEqual(len(purchase_orders), 2)
+        self.assertEqual(set(purchase_orders.mapped('state')), {'purchase'})
+        self.assertEqual(other_order.marketplace_purchase_ids.marketplace_sale_order_ids, other_order)
+
+    def test_pos_reduced_with_several_customers(self):
+        """
+        Test that consolidation reduces the POs of a vendor to one per customer
+        when several customers order several times within the window.
+        """
+        customers = self.customer | self.env['res.partner'].create([{
+            'name': f'Test Marketplace Customer {index}',
+            'email': f'customer{index}@test.com',
+        } for index in range(2)])
+        orders = self.env['sale.order']
+        for customer in customers:
+            customer_orders = self._create_sale_orders(3)
+            customer_orders.partner_id = customer
+            orders |= customer_orders
+        orders.action_confirm()
+        self.assertEqual(len(orders.marketplace_purchase_ids), 9)
+
+        self.PurchaseOrder._cron_consolidate_marketplace_pos()
+
+        purchase_orders = orders.marketplace_purchase_ids
+        self.assertEqual(len(purchase_orders), 3, "The 9 POs should be merged into one per customer")
+        self.assertEqual(set(purchase_orders.mapped('state')), {'purchase'})
+        self.assertEqual(purchase_orders.mapped('dest_address_id'), customers)
+        self.assertEqual(len(purchase_orders.order_line), 9)
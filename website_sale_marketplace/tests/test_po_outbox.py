@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from unittest.mock import patch
+
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import MarketplacePurchaseCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPoOutbox(MarketplacePurchaseCommon):
+    """Test the queue confirming marketplace POs of paid sale orders"""
+
+    def setUp(self):
+        super().setUp()
+        self.Outbox = self.env['marketplace.po.outbox']
+        self.order = self._create_sale_orders(1)
+        self._confirm_without_auto_confirm(self.order)
+        self.purchase_order = self.order.marketplace_purchase_ids
+
+        # Invoice payment is not under test here: consider every order as paid
+        SaleOrder = type(self.env['sale.order'])
+        patcher = patch.object(
+            SaleOrder, '_filter_marketplace_fully_paid', lambda self, payment_states=None: self,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_enqueue_is_idempotent(self):
+        """
+        Test that a sale order gets a single pending event however many times it is queued.
+        """
+        events = self.Outbox._enqueue(self.order)
+        self.assertEqual(len(events), 1)
+        self.assertFalse(self.Outbox._enqueue(self.order), "Order is already queued")
+        self.assertEqual(self.Outbox.search_count([('sale_order_id', '=', self.order.id)]), 1)
+
+        # PO confirmation is left to the worker
+        self.assertEqual(self.purchase_order.state, 'draft')
+
+    def test_worker_confirms_purchase_orders(self):
+        """
+        Test that the cron worker drains the queue and confirms the POs.
+        """
+        event = self.Outbox._enqueue(self.order)
+        self.Outbox._cron_process_outbox()
+
+        self.assertEqual(event.state, 'done')
+        self.assertEqual(self.purchase_order.state, 'purchase')
+
+        # Once processed, the order can be queued again
+        self.assertTrue(self.Outbox._enqueue(self.order))
+
+    def test_worker_retries_with_backoff(self):
+        """
+        Test that failing events are rescheduled, then given up after too many attempts.
+        """
+        event = self.Outbox._enqueue(self.order)
+        SaleOrder = type(self.env['sale.order'])
+        with patch.object(SaleOrder, '_auto_confirm_marketplace_pos',
+                          lambda self: dict.fromkeys(self, UserError("Vendor is blocked"))):
+            event._process()
+            self.assertEqual(event.state, 'pending')
+            self.assertEqual(event.attempt_count, 1)
+            self.assertEqual(event.last_error, "Vendor is blocked", "The actual error should be kept")
+            first_retry = event.next_attempt_date
+
+            event._process()
+            self.assertGreater(event.next_attempt_date, first_retry, "Retry delay should grow")
+
+            for _i in range(3):
+                event._process()
+        self.assertEqual(event.state, 'failed')
+        self.assertEqual(self.purchase_order.state, 'draft')
+
+        event.action_retry()
+        self.assertEqual(event.state, 'pending')
+        self.assertEqual(event.attempt_count, 0)
+
+
+@tagged('post_install', '-at_install')
+class TestPoOutboxPayment(MarketplacePurchaseCommon):
+    """Test the queue with real invoice payments"""
+
+    def setUp(self):
+        super().setUp()
+        self.product.invoice_policy = 'order'
+        self.order = self._create_sale_orders(1)
+        self._confirm_without_auto_confirm(self.order)
+        self.purchase_order = self.order.marketplace_purchase_ids
+        self.invoice = self.order._create_invoices()
+        self.invoice.action_post()
+
+    def _pay_invoice(self):
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=self.invoice.ids,
+        ).create({})._create_payments()
+
+    def test_sync_mode(self):
+        """
+        Test that the local test mode confirms the POs when the invoice is paid,
+        although the new payment state is not flushed yet.
+        """
+        self.env['ir.config_parameter'].set_param('website_sale_marketplace.outbox_sync', 'True')
+        self._pay_invoice()
+
+        self.assertEqual(self.invoice.payment_state, 'paid')
+        event = self.env['marketplace.po.outbox'].search([('sale_order_id', '=', self.order.id)])
+        self.assertEqual(event.state, 'done')
+        self.assertEqual(self.purchase_order.state, 'purchase')
+
+    def test_payment_queues_event(self):
+        """
+        Test that paying the invoice queues the order for the worker, which confirms its POs.
+        """
+        self._pay_invoice()
+
+        event = self.env['marketplace.po.outbox'].search([('sale_order_id', '=', self.order.id)])
+        self.assertEqual(event.state, 'pending')
+        self.assertEqual(self.purchase_order.state, 'draft')
+
+        event._process()
+        self.assertEqual(event.state, 'done')
+        self.assertEqual(self.purchase_order.state, 'purchase')
@@ -127,3 +127,87 @@ class TestPortalMenuVisibility(HttpCase):
         # Note: The menu might not appear at all, or might appear with 0 count
         # We're checking that if it appears, it doesn't have the link functionality
         # This test documents expected behavior for non-vendor users
+
+    def test_products_page_conditional_get(self):
+        """
+        Test that a repeat visit of the products page with the same ETag is answered with a 304.
+        """
+        self.authenticate(self.portal_user.login, 'portal_vendor')
+
+        response = self.url_open('/my/products')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers.get('ETag')
+        self.assertTrue(etag, "The products page should carry an ETag")
+
+        response = self.url_open('/my/products', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304, "An unchanged page should not be rendered again")
+
+
+@tagged('post_install', '-at_install')
+class TestPortalProductCounters(TransactionCase):
+    """Test the per-state product counters of marketplace vendors"""
+
+    def test_product_counters(self):
+        """
+        Test that the vendor counters follow product creation, state changes and deletion.
+        """
+        vendor_partner = self.env['res.partner'].create({
+            'name': 'Test Vendor Counters',
+            'is_marketplace_vendor': True,
+        })
+        products = self.env['product.template'].create([{
+            'name': f'Test Counter Product {index}',
+            'list_price': 100.0,
+            'marketplace_vendor_id': vendor_partner.id,
+        } for index in range(4)])
+        self.assertEqual(vendor_partner.marketplace_product_count, 4)
+        self.assertEqual(vendor_partner.marketplace_product_draft_count, 4)
+
+        products[:3].action_send_for_approval()
+        products[:2].action_approve()
+        products[0].is_published = True
+        self.assertEqual(vendor_partner.marketplace_product_draft_count, 1)
+        self.assertEqual(vendor_partner.marketplace_product_approval_count, 1)
+        self.assertEqual(vendor_partner.marketplace_product_approved_count, 2)
+        self.assertEqual(vendor_partner.marketplace_product_published_count, 1)
+
+        products[3].unlink()
+        self.assertEqual(vendor_partner.marketplace_product_count, 3)
+        self.assertEqual(vendor_partner.marketplace_product_draft_count, 0)
+
+    def test_product_changes_do_not_write_vendor(self):
+        """
+        Test that product changes append count changes instead of writing the vendor row,
+        and that compacting them keeps the counts.
+        """
+        vendor_partner = self.env['res.partner'].create({
+            'name': 'Test Vendor Count Changes',
+            'is_marketplace_vendor': True,
+        })
+        self.env.flush_all()
+        self.env.cr.execute('SELECT write_date FROM res_partner WHERE id = %s', [vendor_partner.id])
+        write_date = self.env.cr.fetchone()[0]
+        ProductCount = self.env['marketplace.vendor.product.count']
+
+        products = self.env['product.template'].create([{
+            'name': f'Test Count Change Product {index}',
+            'list_price': 100.0,
+            'marketplace_vendor_id': vendor_partner.id,
+        } for index in range(3)])
+        products[:2].action_send_for_approval()
+        products[2].action_archive()
+        self.env.flush_all()
+
+        self.env.cr.execute('SELECT write_date FROM res_partner WHERE id = %s', [vendor_partner.id])
+        self.assertEqual(self.env.cr.fetchone()[0], write_date, "Product changes should not write the vendor")
+        self.assertGreater(ProductCount.search_count([('vendor_id', '=', vendor_partner.id)]), 1)
+        self.assertEqual(vendor_partner.marketplace_product_count, 2)
+        self.assertEqual(vendor_partner.marketplace_product_approval_count, 2)
+
+        ProductCount._gc_compact_counts()
+        vendor_partner.invalidate_recordset()
+
+        self.assertEqual(ProductCount.search_count([('vendor_id', '=', vendor_partner.id)]), 1)
+        self.assertEqual(vendor_partner.marketplace_product_count, 2)
+        self.assertEqual(vendor_partner.marketplace_product_draft_count, 0)
+        self.assertEqual(vendor_partner.marketplace_product_approval_count, 2)
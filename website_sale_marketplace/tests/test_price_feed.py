@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestPriceFeed(TransactionCase):
+    """Test the price and availability feeds of vendor products"""
+
+    def setUp(self):
+        super().setUp()
+
+        # Create a marketplace vendor partner
+        self.vendor_partner = self.env['res.partner'].create({
+            'name': 'Test Vendor Feed',
+            'is_marketplace_vendor': True,
+            'email': 'vendorfeed@test.com',
+            'marketplace_markup': 0.20,  # 20% markup
+        })
+        self.portal_user = self.env['res.users'].sudo().with_context(no_reset_password=True).create({
+            'name': 'Portal Vendor Feed User',
+            'login': 'portal_vendor_feed',
+            'password': 'portal_vendor_feed',
+            'email': 'portal_vendor_feed@test.com',
+            'partner_id': self.vendor_partner.id,
+            'share': True,
+        })
+        self.FeedBatch = self.env['marketplace.feed.batch'].sudo()
+        self.vendor_env = self.env(user=self.portal_user)
+        self.products = self.env['product.template'].with_user(self.portal_user).create([{
+            'name': f'Feed Product {index}',
+            'default_code': f'FEED-{index}',
+            'list_price': 10.0,
+        } for index in range(4)])
+
+    def test_price_feed_applies_deltas_once(self):
+        """
+        Test that a price feed batch drops no-ops, writes the actual changes and is applied once per key.
+        """
+        products = self.products
+        deltas = [
+            {'sku': 'FEED-0', 'list_price': 120.0},
+            {'sku': 'FEED-1', 'list_price': 240.0},
+            {'sku': 'FEED-2', 'list_price': 10.0},
+            {'sku': 'FEED-3', 'available': False},
+            {'sku': 'UNKNOWN', 'list_price': 1.0},
+        ]
+
+        summary = self.FeedBatch._receive(self.vendor_partner, 'batch-1', deltas, self.vendor_env)
+
+        self.assertEqual(summary['received'], 5)
+        self.assertEqual(summary['applied'], 3)
+        self.assertEqual(summary['noop'], 1)
+        self.assertEqual([error['sku'] for error in summary['errors']], ['UNKNOWN'])
+        self.assertEqual(products.mapped('list_price'), [120.0, 240.0, 10.0, 10.0])
+        self.assertAlmostEqual(products[0].standard_price, 100.0, places=2)
+        self.assertAlmostEqual(products[1].standard_price, 200.0, places=2)
+        self.assertAlmostEqual(products[2].standard_price, 10.0 / 1.2, places=2,
+                               msg="Products whose price did not change keep their cost")
+        self.assertFalse(products[3].sale_ok)
+
+        # Replaying the batch does not apply it again
+        products[0].list_price = 50.0
+        replay = self.FeedBatch._receive(self.vendor_partner, 'batch-1', deltas, self.vendor_env)
+        self.assertTrue(replay['replayed'])
+        self.assertEqual(products[0].list_price, 50.0)
+
+    def test_price_feed_resets_approved_products(self):
+        """
+        Test that repricing approved products through a feed sends them back to draft, as a vendor edit does.
+        """
+        products = self.products[:2]
+        products.sudo().write({'marketplace_state': 'approved', 'is_published': True})
+
+        self.FeedBatch._receive(self.vendor_partner, 'batch-2', [
+            {'sku': 'FEED-0', 'list_price': 150.0},
+            {'sku': 'FEED-1', 'list_price': 10.0},
+        ], self.vendor_env)
+
+        self.assertEqual(products[0].marketplace_state, 'draft')
+        self.assertFalse(products[0].is_published)
+        self.assertEqual(products[1].marketplace_state, 'approved', "Unchanged products stay approved")
+        self.assertEqual(self.vendor_partner.marketplace_product_published_count, 1)
+
+    def test_price_feed_ignores_other_vendor_skus(self):
+        """
+        Test that a SKU shared with a published product of another vendor only reaches the vendor's own product.
+        """
+        other_vendor = self.env['res.partner'].create({
+            'name': 'Other Vendor Feed',
+            'is_marketplace_vendor': True,
+        })
+        other_product = self.env['product.template'].create({
+            'name': 'Other Vendor Feed Product',
+            'default_code': 'FEED-0',
+            'list_price': 10.0,
+            'marketplace_vendor_id': other_vendor.id,
+            'marketplace_state': 'approved',
+            'is_published': True,
+        })
+
+        summary = self.FeedBatch._receive(self.vendor_partner, 'batch-3', [
+            {'sku': 'FEED-0', 'list_price': 30.0},
+        ], self.vendor_env)
+
+        self.assertEqual(summary['applied'], 1)
+        self.assertEqual(self.products[0].list_price, 30.0)
+        self.assertEqual(other_product.list_price, 10.0)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestProductApproval(TransactionCase):
+    """Test the marketplace product approval workflow"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.vendor_partner = self.env['res.partner'].create({
+            'name': 'Test Vendor Approval',
+            'is_marketplace_vendor': True,
+            'email': 'vendorapproval@test.com',
+        })
+        self.products = self.env['product.template'].create([{
+            'name': f'Test Approval Product {index}',
+            'list_price': 100.0,
+            'marketplace_vendor_id': self.vendor_partner.id,
+        } for index in range(5)])
+
+    def test_approval_workflow_batch(self):
+        """
+        Test that the workflow actions only move the eligible products.
+        """
+        self.products[:3].action_send_for_approval()
+        self.products[:2].action_approve()
+        self.products.action_approve()
+
+        self.assertEqual(self.products.mapped('marketplace_state'),
+                         ['approved', 'approved', 'approved', 'draft', 'draft'],
+                         "Only products pending approval should be approved")
+
+        self.products.action_set_draft()
+        self.assertEqual(set(self.products.mapped('marketplace_state')), {'draft'})
+
+    def test_compact_tracking(self):
+        """
+        Test that compact tracking logs a single note on the vendor instead of one per product.
+        """
+        self.products.action_send_for_approval()
+        messages_before = self.env['mail.message'].search_count([
+            ('model', '=', 'product.template'), ('res_id', 'in', self.products.ids),
+        ])
+        vendor_messages_before = len(self.vendor_partner.message_ids)
+
+        self.products.with_context(marketplace_compact_tracking=True).action_approve()
+
+        self.assertEqual(set(self.products.mapped('marketplace_state')), {'approved'})
+        self.assertEqual(self.env['mail.message'].search_count([
+            ('model', '=', 'product.template'), ('res_id', 'in', self.products.ids),
+        ]), messages_before, "No tracking message should be posted on the products")
+        self.vendor_partner.invalidate_recordset(['message_ids'])
+        self.assertEqual(len(self.vendor_partner.message_ids), vendor_messages_before + 1,
+                         "A single summary note should be logged on the vendor")
+        self.assertIn('5 marketplace products set to Approved', self.vendor_partner.message_ids[0].body)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import csv
+import io
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+from ..models.marketplace_product_import import IMPORT_COLUMNS
+
+
+@tagged('post_install', '-at_install')
+class TestProductImport(TransactionCase):
+    """Test the bulk import of vendor products"""
+
+    def setUp(self):
+        super().setUp()
+
+        # Create a marketplace vendor partner
+        self.vendor_partner = self.env['res.partner'].create({
+            'name': 'Test Vendor Import',
+            'is_marketplace_vendor': True,
+            'email': 'vendorimport@test.com',
+            'marketplace_markup': 0.20,  # 20% markup
+        })
+        self.portal_user = self.env['res.users'].sudo().with_context(no_reset_password=True).create({
+            'name': 'Portal Vendor Import User',
+            'login': 'portal_vendor_import',
+            'password': 'portal_vendor_import',
+            'email': 'portal_vendor_import@test.com',
+            'partner_id': self.vendor_partner.id,
+            'share': True,
+        })
+        self.category = self.env['product.category'].create({'name': 'Test Import Category'})
+
+    def _import(self, rows):
+        content = io.StringIO()
+        writer = csv.DictWriter(content, fieldnames=IMPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+        product_import = self.env['marketplace.product.import'].with_user(self.portal_user).sudo()._schedule(
+            self.vendor_partner, 'products.csv', content.getvalue().encode(),
+        )
+        self.assertEqual(product_import.state, 'pending', "The upload should only queue the import")
+        product_import._run()
+        return product_import
+
+    def test_import_creates_and_updates_products(self):
+        """
+        Test that rows create new products, update existing ones and report errors.
+        """
+        existing = self.env['product.template'].with_user(self.portal_user).create({
+            'name': 'Existing Import Product',
+            'default_code': 'SKU-1',
+            'list_price': 10.0,
+        })
+        rows = [
+            {'default_code': 'SKU-1', 'name': '', 'list_price': '120'},
+            {'default_code': 'SKU-2', 'name': 'New Import Product', 'list_price': '240',
+             'category': self.category.complete_name},
+            {'default_code': 'SKU-3', 'name': 'Bad Price Product', 'list_price': 'abc'},
+            {'default_code': 'SKU-4', 'name': 'Bad Category Product', 'category': 'Nope'},
+            {'default_code': 'SKU-5', 'name': ''},
+        ]
+
+        with patch('odoo.addons.website_sale_marketplace.models.marketplace_product_import.CHUNK_SIZE', 2):
+            product_import = self._import(rows)
+
+        self.assertEqual(product_import.state, 'done')
+        self.assertEqual(product_import.row_count, 5)
+        self.assertEqual(product_import.created_count, 1)
+        self.assertEqual(product_import.updated_count, 1)
+        self.assertEqual(product_import.error_count, 3)
+        self.assertIn('Row 4:', product_import.error_report)
+        self.assertIn('Row 6:', product_import.error_report)
+
+        self.assertEqual(existing.list_price, 120.0)
+        self.assertAlmostEqual(existing.standard_price, 100.0, places=2,
+                               msg="Cost should be recalculated on import")
+        new_product = self.env['product.template'].search([('default_code', '=', 'SKU-2')])
+        self.assertEqual(new_product.marketplace_vendor_id, self.vendor_partner)
+        self.assertEqual(new_product.categ_id, self.category)
+        self.assertAlmostEqual(new_product.standard_price, 200.0, places=2)
+        self.assertEqual(new_product.seller_ids.partner_id, self.vendor_partner)
+        self.assertFalse(product_import.import_file, "The file should be dropped once imported")
+
+    def test_import_resumes_after_last_chunk(self):
+        """
+        Test that an import interrupted by the time budget resumes after its last processed chunk.
+        """
+        rows = [{'default_code': f'RESUME-{index}', 'name': f'Resume Product {index}'} for index in range(3)]
+        content = io.StringIO()
+        writer = csv.DictWriter(content, fieldnames=IMPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+        product_import = self.env['marketplace.product.import'].with_user(self.portal_user).sudo()._schedule(
+            self.vendor_partner, 'products.csv', content.getvalue().encode(),
+        )
+
+        with patch('odoo.addons.website_sale_marketplace.models.marketplace_product_import.CHUNK_SIZE', 2), \
+                patch('odoo.addons.website_sale_marketplace.models.marketplace_product_import.time') as mock_time:
+            # Deadline, first chunk, then out of time before the second chunk
+            mock_time.monotonic.side_effect = [0, 0, 1000]
+            self.assertFalse(product_import._run(time_budget=10))
+        self.assertEqual(product_import.state, 'running')
+        self.assertEqual(product_import.row_count, 2)
+
+        product_import._run()
+
+        self.assertEqual(product_import.state, 'done')
+        self.assertEqual(product_import.row_count, 3)
+        self.assertEqual(product_import.created_count, 3)
+        self.assertEqual(self.env['product.template'].search_count([('default_code', '=like', 'RESUME-%')]), 3)
+
+    def test_import_groups_updates(self):
+        """
+        Test that the rows updating products with the same values are written together.
+        """
+        products = self.env['product.template'].with_user(self.portal_user).create([{
+            'name': f'Grouped Import Product {index}',
+            'default_code': f'GROUP-{index}',
+            'list_price': 10.0,
+        } for index in range(4)])
+        rows = [{'default_code': f'GROUP-{index}', 'list_price': '50'} for index in range(3)]
+        rows.append({'default_code': 'GROUP-3', 'list_price': '60'})
+
+        ProductTemplate = type(self.env['product.template'])
+        with patch.object(ProductTemplate, 'write', autospec=True, side_effect=ProductTemplate.write) as mock_write:
+            product_import = self._import(rows)
+
+        self.assertEqual(product_import.updated_count, 4)
+        self.assertEqual(products.mapped('list_price'), [50.0, 50.0, 50.0, 60.0])
+        price_writes = [call for call in mock_write.call_args_list if 'list_price' in call.args[1]]
+        self.assertEqual(len(price_writes), 2, "Products getting the same price should be written at once")
+
+    def test_import_respects_vendor_rules(self):
+        """
+        Test that a vendor cannot update another vendor's product through the import,
+        and gets its own product for the same internal reference instead.
+        """
+        other_vendor = self.env['res.partner'].create({
+            'name': 'Other Vendor Import',
+            'is_marketplace_vendor': True,
+        })
+        other_product = self.env['product.template'].create({
+            'name': 'Other Vendor Product',
+            'default_code': 'SKU-OTHER',
+            'list_price': 10.0,
+            'marketplace_vendor_id': other_vendor.id,
+        })
+
+        self._import([{'default_code': 'SKU-OTHER', 'name': 'Hijacked', 'list_price': '1'}])
+
+        self.assertEqual(other_product.name, 'Other Vendor Product')
+        self.assertEqual(other_product.list_price, 10.0)
+        own_product = self.env['product.template'].search([
+            ('default_code', '=', 'SKU-OTHER'),
+            ('marketplace_vendor_id', '=', self.vendor_partner.id),
+        ])
+        self.assertEqual(own_product.name, 'Hijacked')
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import SQL
+
+
+@tagged('post_install', '-at_install')
+class TestProductIndexes(TransactionCase):
+    """Test that the marketplace product access patterns can use indexes
+
+    The test tables are small, so the planner is made to prefer indexes: these
+    tests check that a usable index exists, not the speed of the queries.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.vendor_company = self.env['res.partner'].create({
+            'name': 'Test Vendor Company Indexes',
+            'is_company': True,
+            'is_marketplace_vendor': True,
+        })
+        self.vendor_contact = self.env['res.partner'].create({
+            'name': 'Test Vendor Contact Indexes',
+            'parent_id': self.vendor_company.id,
+        })
+
+    def _explain(self, domain):
+        """Return the query plan of a product search, with sequential scans disabled"""
+        query = self.env['product.template']._search(domain)
+        self.env.flush_all()
+        self.env.cr.execute('SET LOCAL enable_seqscan = off')
+        self.env.cr.execute(SQL('EXPLAIN %s', query.select()))
+        plan = '\n'.join(row[0] for row in self.env.cr.fetchall())
+        self.env.cr.execute('RESET enable_seqscan')
+        return plan
+
+    def test_commercial_vendor(self):
+        """
+        Test that products of a vendor contact belong to the vendor company.
+        """
+        product = self.env['product.template'].create({
+            'name': 'Test Product Indexes',
+            'marketplace_vendor_id': self.vendor_contact.id,
+        })
+        self.assertEqual(product.marketplace_commercial_vendor_id, self.vendor_company)
+
+        product.marketplace_vendor_id = self.vendor_company
+        self.assertEqual(product.marketplace_commercial_vendor_id, self.vendor_company)
+
+    def test_commercial_vendor_nested_contact(self):
+        """
+        Test that products of a contact nested in another contact belong to the vendor company,
+        and follow the contact when it moves to another company.
+        """
+        nested_contact = self.env['res.partner'].create({
+            'name': 'Test Nested Vendor Contact Indexes',
+            'parent_id': self.vendor_contact.id,
+        })
+        product = self.env['product.template'].create({
+            'name': 'Test Nested Product Indexes',
+            'marketplace_vendor_id': nested_contact.id,
+        })
+        self.assertEqual(product.marketplace_commercial_vendor_id, self.vendor_company)
+
+        other_company = self.env['res.partner'].create({
+            'name': 'Test Other Vendor Company Indexes',
+            'is_company': True,
+            'is_marketplace_vendor': True,
+        })
+        self.vendor_contact.parent_id = other_company
+        self.assertEqual(product.marketplace_commercial_vendor_id, other_company)
+
+    def test_record_rule_plan(self):
+        """
+        Test that the vendor record rule is a single equality that can use an index.
+        """
+        plan = self._explain([('marketplace_commercial_vendor_id', '=', self.vendor_company.id)])
+        self.assertIn('marketplace_commercial_vendor_id_index', plan)
+
+    def test_vendor_state_plan(self):
+        """
+        Test that the products of a vendor in a state can be found with the composite index.
+        """
+        plan = self._explain([
+            ('marketplace_vendor_id', '=', self.vendor_company.id),
+            ('marketplace_state', '=', 'approval'),
+        ])
+        self.assertIn('marketplace_vendor_state_idx', plan)
+
+    def test_backend_to_approve_plan(self):
+        """
+        Test that the backend "To Approve" list of marketplace products can use an index.
+        """
+        plan = self._explain([
+            ('marketplace_vendor_id', '!=', False),
+            ('marketplace_state', '=', 'approval'),
+        ])
+        # The planner picks the partial index, or the composite one on small tables
+        self.assertRegex(plan, r'marketplace_(vendor_)?state_idx')
@@ -131,3 +131,71 @@ class TestProductSave(TransactionCase):
 
         self.assertEqual(product.marketplace_state, 'draft',
                         "State should reset to draft when vendor edits approved product")
+
+    def test_marketplace_state_kept_on_noop_edit(self):
+        """
+        Test that re-saving unchanged values does not reset an approved product.
+        """
+        product = self.env['product.template'].with_user(self.portal_user).create({
+            'name': 'Test Product Noop',
+            'list_price': 100.0,
+            'uom_id': self.uom_unit.id,
+            'uom_po_id': self.uom_unit.id,
+        })
+        product.sudo().write({'marketplace_state': 'approved', 'is_published': True})
+
+        # The web client sends back the unchanged values of the form
+        product.with_user(self.portal_user).write({
+            'name': 'Test Product Noop',
+            'list_price': 100.0,
+        })
+
+        self.assertEqual(product.marketplace_state, 'approved',
+                        "State should not reset when no value actually changes")
+        self.assertTrue(product.is_published)
+
+    def test_marketplace_state_reset_per_product(self):
+        """
+        Test that only the approved products whose values change are reset.
+        """
+        products = self.env['product.template'].with_user(self.portal_user).create([{
+            'name': 'Test Product Batch',
+            'list_price': list_price,
+            'uom_id': self.uom_unit.id,
+            'uom_po_id': self.uom_unit.id,
+        } for list_price in (100.0, 120.0)])
+        products.sudo().write({'marketplace_state': 'approved'})
+
+        products.with_user(self.portal_user).write({'list_price': 120.0})
+
+        self.assertEqual(products[0].marketplace_state, 'draft',
+                        "State should reset on the product whose price changed")
+        self.assertEqual(products[1].marketplace_state, 'approved',
+                        "State should not reset on the product already at that price")
+        self.assertEqual(products[0].list_price, 120.0)
+
+    def test_vendor_partner_follows_parent_company(self):
+        """
+        Test that a vendor contact acts for its parent company, also after a parent change.
+        """
+        self.assertEqual(self.portal_user.marketplace_vendor_id, self.vendor_partner)
+
+        company = self.env['res.partner'].create({
+            'name': 'Test Vendor Company',
+            'is_company': True,
+            'is_marketplace_vendor': True,
+        })
+        self.vendor_partner.parent_id = company
+        self.assertEqual(self.portal_user.marketplace_vendor_id, company,
+                        "Vendor partner should be recomputed when the parent changes")
+
+        product = self.env['product.template'].with_user(self.portal_user).create({
+            'name': 'Test Product Company',
+            'list_price': 100.0,
+            'uom_id': self.uom_unit.id,
+            'uom_po_id': self.uom_unit.id,
+        })
+        self.assertEqual(product.marketplace_vendor_id, company)
+        self.assertEqual(self.env['product.template'].with_user(self.portal_user).search([
+            ('name', '=', 'Test Product Company'),
+        ]), product, "Record rules should give access to the company products")
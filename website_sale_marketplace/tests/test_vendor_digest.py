@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from .common import MarketplacePurchaseCommon
+
+
+@tagged('post_install', '-at_install')
+class TestVendorDigest(MarketplacePurchaseCommon):
+    """Test the digest notifications of the new marketplace orders of vendors"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.Notification = self.env['marketplace.vendor.notification']
+        self.vendor_partner.marketplace_digest_cadence = 'hourly'
+
+    def _get_vendor_mails(self, vendor=None):
+        return self.env['mail.mail'].search([('recipient_ids', 'in', (vendor or self.vendor_partner).ids)])
+
+    def test_confirmed_pos_queued(self):
+        """
+        Test that auto-confirmed POs of a digest vendor are queued for the digest.
+        """
+        orders = self._create_sale_orders(3)
+        orders.action_confirm()
+
+        purchase_orders = orders.marketplace_purchase_ids
+        self.assertEqual(set(purchase_orders.mapped('state')), {'purchase'})
+        notifications = self.Notification.search([('purchase_order_id', 'in', purchase_orders.ids)])
+        self.assertEqual(len(notifications), 3)
+        self.assertEqual(notifications.vendor_id, self.vendor_partner)
+        self.assertFalse(any(notifications.mapped('digest_date')))
+
+    def test_digest_vendor_gets_fewer_mails(self):
+        """
+        Test that over the same confirmations a vendor notified immediately gets an email
+        per order, while a digest vendor gets a single digest.
+        """
+        # Vendors follow the confirmation of their POs
+        self.env['mail.message.subtype'].search([('res_model', '=', 'purchase.order')]).default = True
+        immediate_vendor = self.env['res.partner'].create({
+            'name': 'Test Immediate Vendor',
+            'is_marketplace_vendor': True,
+            'email': 'immediatevendor@test.com',
+            'marketplace_digest_cadence': 'immediate',
+        })
+        immediate_product = self.product.copy({
+            'marketplace_vendor_id': immediate_vendor.id,
+            'seller_ids': [(0, 0, {'partner_id': immediate_vendor.id, 'min_qty': 1.0, 'price': 100.0})],
+        })
+        order_count = 3
+        orders = self._create_sale_orders(order_count) | self.env['sale.order'].create([{
+            'partner_id': self.customer.id,
+            'order_line': [(0, 0, {'product_id': immediate_product.product_variant_id.id, 'product_uom_qty': 1.0})],
+        } for _i in range(order_count)])
+        digest_mails_before = self._get_vendor_mails()
+        immediate_mails_before = self._get_vendor_mails(immediate_vendor)
+
+        orders.action_confirm()
+        # Tracking messages are posted when the transaction commits
+        self.env.flush_all()
+        self.env.cr.precommit.run()
+        self.Notification._cron_send_digests()
+
+        immediate_mails = self._get_vendor_mails(immediate_vendor) - immediate_mails_before
+        digest_mails = self._get_vendor_mails() - digest_mails_before
+        self.assertGreaterEqual(len(immediate_mails), order_count)
+        self.assertEqual(len(digest_mails), 1)
+
+    def test_one_digest_per_vendor(self):
+        """
+        Test that the digest job sends a single email listing all the pending orders of the vendor,
+        then waits for the next interval.
+        """
+        orders = self._create_sale_orders(3)
+        orders.action_confirm()
+        mails_before = self._get_vendor_mails()
+
+        self.Notification._cron_send_digests()
+
+        digest = self._get_vendor_mails() - mails_before
+        self.assertEqual(len(digest), 1)
+        for purchase_order in orders.marketplace_purchase_ids:
+            self.assertIn(purchase_order.name, digest.body_html)
+        self.assertTrue(self.vendor_partner.marketplace_digest_date)
+        self.assertFalse(self.Notification.search([
+            ('vendor_id', '=', self.vendor_partner.id), ('digest_date', '=', False),
+        ]))
+
+        # New orders wait for the end of the hour
+        self._create_sale_orders(1).action_confirm()
+        self.Notification._cron_send_digests()
+        self.assertEqual(len(self._get_vendor_mails() - mails_before), 1)
+
+    def test_immediate_vendor_not_queued(self):
+        """
+        Test that the POs of a vendor notified immediately are not queued.
+        """
+        self.vendor_partner.marketplace_digest_cadence = 'immediate'
+        orders = self._create_sale_orders(2)
+        orders.action_confirm()
+
+        self.assertEqual(set(orders.marketplace_purchase_ids.mapped('state')), {'purchase'})
+        self.assertFalse(self.Notification.search([('vendor_id', '=', self.vendor_partner.id)]))
+
+    def test_digest_without_company_email(self):
+        """
+        Test that the digest falls back to the default sender when the company has no email,
+        and stays pending when there is no sender at all.
+        """
+        self._create_sale_orders(1).action_confirm()
+        self.env.company.email = False
+        mails_before = self._get_vendor_mails()
+        IrMailServer = type(self.env['ir.mail_server'])
+
+        with patch.object(IrMailServer, '_get_default_from_address', lambda self: False):
+            self.Notification._cron_send_digests()
+        self.assertEqual(self._get_vendor_mails(), mails_before)
+        self.assertTrue(self.Notification.search([
+            ('vendor_id', '=', self.vendor_partner.id), ('digest_date', '=', False),
+        ]))
+
+        with patch.object(IrMailServer, '_get_default_from_address', lambda self: 'noreply@test.com'):
+            self.Notification._cron_send_digests()
+        digest = self._get_vendor_mails() - mails_before
+        self.assertEqual(len(digest), 1)
+        self.assertEqual(digest.email_from, 'noreply@test.com')
+
+    def test_digest_without_vendor_email(self):
+        """
+        Test that the notifications of a vendor without email stay pending until it gets one.
+        """
+        self._create_sale_orders(1).action_confirm()
+        mails_before = self._get_vendor_mails()
+        email = self.vendor_partner.email
+        self.vendor_partner.email = False
+
+        self.Notification._cron_send_digests()
+        self.assertEqual(self._get_vendor_mails(), mails_before)
+        self.assertTrue(self.Notification.search([
+            ('vendor_id', '=', self.vendor_partner.id), ('digest_date', '=', False),
+        ]))
+
+        self.vendor_partner.email = email
+        self.Notification._cron_send_digests()
+        self.assertEqual(len(self._get_vendor_mails() - mails_before), 1)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo.tests import TransactionCase, tagged
+
+
+class VendorDropshippingCommon(TransactionCase):
+    """Vendor and helpers measuring the dropshipping setup of vendor products"""
+
+    def setUp(self):
+        super().setUp()
+
+        # Create a marketplace vendor partner
+        self.vendor_partner = self.env['res.partner'].create({
+            'name': 'Test Vendor Dropshipping',
+            'is_marketplace_vendor': True,
+            'email': 'vendordropshipping@test.com',
+            'marketplace_markup': 0.20,  # 20% markup
+        })
+        self.dropship_route = self.env.ref('stock_dropshipping.route_drop_shipping')
+
+    def _create_products(self, count):
+        return self.env['product.template'].create([{
+            'name': f'Test Dropshipping Product {index}',
+            'list_price': 100.0 + index % 3,
+            'marketplace_vendor_id': self.vendor_partner.id,
+        } for index in range(count)])
+
+    def _setup_query_count(self, count):
+        """Return the number of queries needed to set up ``count`` products"""
+        products = self._create_products(count)
+        self.env.invalidate_all()
+        count_before = self.env.cr.sql_log_count
+        self.env['product.template'].sudo()._setup_vendor_dropshipping(products, self.vendor_partner)
+        query_count = self.env.cr.sql_log_count - count_before
+
+        self.assertEqual(len(products.seller_ids), count)
+        self.assertTrue(all(self.dropship_route in product.route_ids for product in products))
+        for product in products[:3]:
+            expected_cost = round(product.list_price / 1.20, 2)
+            self.assertAlmostEqual(product.standard_price, expected_cost, places=2)
+            self.assertAlmostEqual(product.seller_ids.price, expected_cost, places=2)
+        return query_count
+
+
+@tagged('post_install', '-at_install')
+class TestVendorDropshipping(VendorDropshippingCommon):
+    """Test the dropshipping setup of vendor products created in batch"""
+
+    def test_setup_query_count(self):
+        """
+        Test that setting up 100 products costs the same number of queries as 1 product.
+        """
+        single_count = self._setup_query_count(1)
+        self.assertEqual(self._setup_query_count(100), single_count)
+
+
+@tagged('marketplace_perf', '-standard', 'post_install', '-at_install')
+class TestVendorDropshippingLargeBatch(VendorDropshippingCommon):
+    """Test the dropshipping setup of large batches, out of the standard run as it creates 11,000 products"""
+
+    def test_setup_query_count_large_batch(self):
+        """
+        Test that setting up 10,000 products costs no more queries per 1,000 products than a batch of 1,000.
+        """
+        # The ORM splits reads, writes and inserts into chunks of at most 1,000 records
+        chunk_count = self._setup_query_count(1000)
+        self.assertLessEqual(self._setup_query_count(10000) / 10, chunk_count)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import MarketplacePurchaseCommon
+
+
+@tagged('post_install', '-at_install')
+class TestVendorLedger(MarketplacePurchaseCommon):
+    """Test the incremental sales and payout ledger of the vendors"""
+
+    def setUp(self):
+        super().setUp()
+        self.Ledger = self.env['marketplace.vendor.ledger']
+
+    def _get_totals(self):
+        return self.Ledger._get_vendor_totals(self.vendor_partner).get(self.vendor_partner, {})
+
+    def _pay(self, moves):
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=moves.ids,
+        ).create({})._create_payments()
+
+    def _get_foreign_currency(self, rate):
+        currency = self.env['res.currency'].with_context(active_test=False).search([
+            ('id', '!=', self.env.company.currency_id.id),
+        ], limit=1)
+        currency.active = True
+        self.env['res.currency.rate'].create({
+            'currency_id': currency.id,
+            'company_id': self.env.company.id,
+            'name': '2000-01-01',
+            'rate': rate,
+        })
+        return currency
+
+    def test_confirmed_pos_recorded(self):
+        """
+        Test that confirming marketplace POs adds their sales, cost and margin to the ledger.
+        """
+        orders = self._create_sale_orders(2)
+        orders.action_confirm()
+
+        ledger_lines = self.Ledger.search([('vendor_id', '=', self.vendor_partner.id)])
+        self.assertEqual(len(ledger_lines), 1, "Both orders should be recorded on the line of the month")
+        self.assertAlmostEqual(ledger_lines.sales_amount, 240.0)
+        self.assertAlmostEqual(ledger_lines.cost_amount, 200.0)
+        self.assertAlmostEqual(ledger_lines.margin_amount, 40.0)
+        self.assertAlmostEqual(ledger_lines.markup, 0.2)
+        self.assertAlmostEqual(ledger_lines.payout_due_amount, 0.0)
+
+    def test_paid_orders_recorded_once(self):
+        """
+        Test that the payout of a paid order becomes due once, however many times it is recorded.
+        """
+        orders = self._create_sale_orders(2)
+        orders.action_confirm()
+
+        self.Ledger._record_paid_sale_orders(orders[0])
+        self.Ledger._record_paid_sale_orders(orders[0])
+
+        self.assertTrue(orders[0].marketplace_paid_date)
+        self.assertAlmostEqual(self._get_totals()['payout_due_amount'], 100.0)
+        self.assertAlmostEqual(self.vendor_partner.marketplace_pending_payout, 100.0)
+
+    def test_payout_due_when_paid_before_confirmation(self):
+        """
+        Test that a PO confirmed after the payment of its sale order makes its payout due.
+        """
+        order = self._create_sale_orders(1)
+        self._confirm_without_auto_confirm(order)
+        self.Ledger._record_paid_sale_orders(order)
+        self.assertFalse(self._get_totals(), "Nothing is recorded before the PO confirmation")
+
+        order.marketplace_purchase_ids.button_confirm()
+
+        totals = self._get_totals()
+        self.assertAlmostEqual(totals['cost_amount'], 100.0)
+        self.assertAlmostEqual(totals['payout_due_amount'], 100.0)
+
+    def test_cancelled_pos_removed(self):
+        """
+        Test that cancelling a confirmed PO removes it from the ledger.
+        """
+        orders = self._create_sale_orders(2)
+        orders.action_confirm()
+
+        orders[0].marketplace_purchase_ids.button_cancel()
+
+        totals = self._get_totals()
+        self.assertAlmostEqual(totals['sales_amount'], 120.0)
+        self.assertAlmostEqual(totals['cost_amount'], 100.0)
+
+    def test_rebuild_matches_increments(self):
+        """
+        Test that rebuilding the ledger gives the amounts maintained incrementally.
+        """
+        orders = self._create_sale_orders(3)
+        orders.action_confirm()
+        self.Ledger._record_paid_sale_orders(orders[1])
+        orders[2].marketplace_purchase_ids.button_cancel()
+        incremental_totals = self._get_totals()
+
+        self.Ledger._rebuild()
+
+        rebuilt_totals = self._get_totals()
+        for fname, amount in incremental_totals.items():
+            self.assertAlmostEqual(rebuilt_totals[fname], amount, msg=fname)
+
+    def test_invoice_payment_records_payout(self):
+        """
+        Test that paying the customer invoice makes the cost of the order due to the vendor.
+        """
+        self.product.invoice_policy = 'order'
+        order = self._create_sale_orders(1)
+        order.action_confirm()
+        invoice = order._create_invoices()
+        invoice.action_post()
+
+        self._pay(invoice)
+
+        self.assertEqual(invoice.payment_state, 'paid')
+        self.assertTrue(order.marketplace_paid_date)
+        self.assertAlmostEqual(self._get_totals()['payout_due_amount'], 100.0)
+        self.assertAlmostEqual(self.vendor_partner.marketplace_pending_payout, 100.0)
+
+    def test_paid_bills_recorded(self):
+        """
+        Test that paying the vendor bill of a marketplace PO records the payout.
+        """
+        self.product.purchase_method = 'purchase'
+        order = self._create_sale_orders(1)
+        order.action_confirm()
+        self.Ledger._record_paid_sale_orders(order)
+        purchase_order = order.marketplace_purchase_ids
+        purchase_order.action_create_invoice()
+        bill = purchase_order.invoice_ids
+        bill.invoice_date = fields.Date.today()
+        bill.action_post()
+        self.assertAlmostEqual(self._get_totals()['paid_out_amount'], 0.0, msg="Posting the bill pays nothing")
+
+        self._pay(bill)
+
+        self.assertEqual(bill.payment_state, 'paid')
+        totals = self._get_totals()
+        self.assertAlmostEqual(totals['paid_out_amount'], 100.0)
+        self.assertAlmostEqual(totals['payout_due_amount'], 100.0)
+        self.assertAlmostEqual(self.vendor_partner.marketplace_pending_payout, 0.0)
+
+    def test_sales_converted_to_po_currency(self):
+        """
+        Test that sales of a sale order in another currency are recorded in the currency of the PO.
+        """
+        currency = self._get_foreign_currency(2.0)
+        pricelist = self.env['product.pricelist'].create({'name': 'Foreign Pricelist', 'currency_id': currency.id})
+        order = self.env['sale.order'].create({
+            'partner_id': self.customer.id,
+            'pricelist_id': pricelist.id,
+            'order_line': [(0, 0, {'product_id': self.product.product_variant_id.id, 'product_uom_qty': 1.0})],
+        })
+        self.assertAlmostEqual(order.order_line.price_subtotal, 240.0)
+
+        order.action_confirm()
+
+        ledger_line = self.Ledger.search([('vendor_id', '=', self.vendor_partner.id)])
+        self.assertEqual(ledger_line.currency_id, order.marketplace_purchase_ids.currency_id)
+        self.assertAlmostEqual(ledger_line.sales_amount, 120.0)
+        self.assertAlmostEqual(ledger_line.margin_amount, 20.0)
+
+    def test_totals_converted_to_company_currency(self):
+        """
+        Test that vendor totals add up lines in several currencies in the company currency,
+        and leave out the ledger of other companies.
+        """
+        currency = self._get_foreign_currency(2.0)
+        other_company = self.env['res.company'].create({'name': 'Other Marketplace Company'})
+        self.Ledger.create([{
+            'vendor_id': self.vendor_partner.id,
+            'company_id': company.id,
+            'currency_id': line_currency.id,
+            'period': '2024-01-01',
+            'payout_due_amount': amount,
+        } for company, line_currency, amount in [
+            (self.env.company, self.env.company.currency_id, 100.0),
+            (self.env.company, currency, 200.0),
+            (other_company, other_company.currency_id, 1000.0),
+        ]])
+
+        self.assertAlmostEqual(self._get_totals()['payout_due_amount'], 200.0)
+        self.assertAlmostEqual(self.vendor_partner.marketplace_pending_payout, 200.0)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Copyright 2024 ERPGAP/PROMPTEQUATION LDA
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+import logging
+import os
+
+from odoo.tests import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+# Budget in bytes of the JS and templates sources of the first-paint vendor web client bundle,
+# fixed whatever the other installed modules
+WEBCLIENT_SIZE_BUDGET = 9 * 1024 * 1024
+
+
+@tagged('post_install', '-at_install')
+class TestWebclientBundle(TransactionCase):
+    """Test the content and size of the vendor web client bundles"""
+
+    def _get_bundle_paths(self, bundle):
+        IrAsset = self.env['ir.asset']
+        return [
+            (path.lstrip('/'), full_path)
+            for path, full_path, *_rest in IrAsset._get_asset_paths(bundle, IrAsset._get_asset_params())
+        ]
+
+    def _get_sources_size(self, paths):
+        """Size in bytes of the JS and template sources of a bundle"""
+        return sum(
+            os.path.getsize(full_path)
+            for path, full_path in paths
+            if path.endswith(('.js', '.xml')) and full_path and os.path.isfile(full_path)
+        )
+
+    def test_first_paint_bundle(self):
+        """
+        Test that heavy libraries are left out of the first-paint bundle, which stays within its budget.
+        """
+        paths = self._get_bundle_paths('website_sale_marketplace.webclient')
+        for path, _full_path in paths:
+            self.assertFalse(path.startswith(('html_editor/', 'bus/', 'web/static/lib/jquery/')),
+                             f"{path} should not be loaded before the first paint")
+
+        size = self._get_sources_size(paths)
+        _logger.info('Vendor web client bundle: %s bytes of sources in %s files', size, len(paths))
+        self.assertLessEqual(size, WEBCLIENT_SIZE_BUDGET,
+                             f"The vendor web client bundle is {size} bytes, over its budget of "
+                             f"{WEBCLIENT_SIZE_BUDGET} bytes")
+
+    def test_html_editor_out_of_first_paint_bundle(self):
+        """
+        Test that no file of the HTML editor bundle is loaded, or imported, by the first-paint bundle.
+        """
+        paths = self._get_bundle_paths('website_sale_marketplace.webclient')
+        editor_paths = {
+            path for path, _full_path in self._get_bundle_paths('website_sale_marketplace.webclient_html_editor')
+            if path.startswith('html_editor/')
+        }
+        self.assertTrue(editor_paths)
+        self.assertFalse(editor_paths & {path for path, _full_path in paths})
+
+        for path, full_path in paths:
+            if path.startswith('website_sale_marketplace/') and path.endswith('.js'):
+                with open(full_path) as source:
+                    self.assertNotIn('@html_editor/', source.read(),
+                                     f"{path} should load the HTML editor through its lazy bundle")
+
+    def test_lazy_html_editor_bundle(self):
+        """
+        Test that the HTML editor is available in its lazily loaded bundle, with the bus services it relies on.
+        """
+        paths = self._get_bundle_paths('website_sale_marketplace.webclient_html_editor')
+        self.assertTrue(any(path.startswith('html_editor/static/src/fields/') for path, _full_path in paths))
+        self.assertTrue(any(path.startswith('bus/static/src/') for path, _full_path in paths))